@@ -0,0 +1,371 @@
+import os
+import json
+import time
+import queue
+import itertools
+import threading
+import urllib.request
+from collections import deque
+from typing import Any, AsyncIterator, Dict, List, Optional
+from .broadcast import CLOSED, Subscription
+
+# Lower numbers are dispatched first
+ALARM_PRIORITIES = {"fire": 0, "fire_and_smoke": 0, "smoke": 1}
+
+ALARM_MESSAGES = {
+    "fire": "🚨 FIRE ALARM ACTIVATED! 🚨",
+    "fire_and_smoke": "🚨 FIRE ALARM ACTIVATED! 🚨",
+    "smoke": "🚨 SMOKE ALARM ACTIVATED! 🚨",
+}
+
+# Queued behind every pending alarm to stop a sink worker
+_SHUTDOWN = object()
+
+
+class Alarm:
+    """One alarm raised by a stream, stamped with the time its triggering frame was captured or decoded"""
+
+    __slots__ = ("stream_id", "alarm_type", "frame_timestamp", "triggered_at", "delivered")
+
+    def __init__(self, stream_id: str, alarm_type: str, frame_timestamp: Optional[float] = None):
+        self.stream_id = stream_id
+        self.alarm_type = alarm_type
+        self.triggered_at = time.time()
+        self.frame_timestamp = frame_timestamp if frame_timestamp is not None else self.triggered_at
+        # Milliseconds from the frame to delivery, per sink
+        self.delivered: Dict[str, float] = {}
+
+    @property
+    def priority(self) -> int:
+        return ALARM_PRIORITIES.get(self.alarm_type, len(ALARM_PRIORITIES))
+
+    @property
+    def sound(self) -> str:
+        """Sound to play; fire and smoke together sound the fire alarm"""
+        return "fire" if self.alarm_type == "fire_and_smoke" else self.alarm_type
+
+    def latency_seconds(self) -> float:
+        return max(time.time() - self.frame_timestamp, 0.0)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "stream_id": self.stream_id,
+            "type": self.alarm_type,
+            "frame_timestamp": self.frame_timestamp,
+            "triggered_at": self.triggered_at,
+        }
+
+
+class AudioSink:
+    """Plays alarm sounds on the local speaker through pygame
+
+    The sounds are decoded once when the dispatcher starts. Each alarm plays on
+    its own mixer channel and returns straight away, so alarms on different
+    streams overlap instead of waiting for each other.
+    """
+
+    name = "audio"
+
+    def __init__(self, sounds: Dict[str, str]):
+        self.sound_paths = sounds
+        self._sounds = {}
+        self._mixer = None
+
+    def open(self):
+        try:
+            import pygame
+            pygame.mixer.init()
+        except Exception as e:
+            print(f"Alarm audio unavailable: {e}")
+            return
+        self._mixer = pygame.mixer
+        for alarm_type, path in self.sound_paths.items():
+            if os.path.exists(path):
+                self._sounds[alarm_type] = pygame.mixer.Sound(path)
+            else:
+                print(f"Warning: Alarm sound file not found at {path}")
+
+    def send(self, alarm: Alarm):
+        sound = self._sounds.get(alarm.sound)
+        if self._mixer is None or sound is None:
+            return
+        # Force a channel so a new alarm replaces the oldest sound when all channels are busy
+        self._mixer.find_channel(True).play(sound)
+
+    def close(self):
+        if self._mixer is not None:
+            self._mixer.quit()
+            self._mixer = None
+
+
+class WebhookSink:
+    """POSTs each alarm as JSON to a URL
+
+    Requests are sent from several worker threads, so a slow endpoint delays
+    neither the other sinks nor the alarms queued behind the one in flight.
+    """
+
+    name = "webhook"
+
+    def __init__(self, url: str, timeout: float = 2.0, workers: int = 4):
+        self.url = url
+        self.timeout = timeout
+        self.workers = workers
+
+    def open(self):
+        pass
+
+    def send(self, alarm: Alarm):
+        request = urllib.request.Request(
+            self.url, data=json.dumps(alarm.as_dict()).encode("utf-8"),
+            headers={"Content-Type": "application/json"}, method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    def close(self):
+        pass
+
+
+class SSEAlarmSink:
+    """Fans alarms out to every client connected to the alarm event stream"""
+
+    name = "sse"
+
+    def __init__(self, queue_size: int = 16):
+        self.queue_size = queue_size
+        self._subscribers: List[Subscription] = []
+        self._lock = threading.Lock()
+        self.closed = False
+
+    def open(self):
+        pass
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self.queue_size)
+        with self._lock:
+            if self.closed:
+                subscription.offer(CLOSED)
+            else:
+                self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def send(self, alarm: Alarm):
+        event = f"event: alarm\ndata: {json.dumps(alarm.as_dict())}\n\n"
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.offer(event)
+
+    async def events(self, keepalive_seconds: float = 15.0) -> AsyncIterator[str]:
+        """Server-sent events for one client until the sink closes"""
+        subscription = self.subscribe()
+        try:
+            while True:
+                event = await subscription.aget(timeout=keepalive_seconds)
+                if event is CLOSED:
+                    break
+                yield ": keep-alive\n\n" if event is None else event
+        finally:
+            self.unsubscribe(subscription)
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+            subscribers, self._subscribers = self._subscribers, []
+        for subscription in subscribers:
+            subscription.offer(CLOSED)
+
+
+def build_alarm_sinks(names: str, fire_sound: str, smoke_sound: str, webhook_url: str = "",
+                      webhook_timeout: float = 2.0, webhook_workers: int = 4) -> List[Any]:
+    """Build sinks from a comma-separated list: audio, sse and webhook"""
+    sinks = []
+    for name in filter(None, (part.strip() for part in names.split(","))):
+        if name == "audio":
+            sinks.append(AudioSink({"fire": fire_sound, "smoke": smoke_sound}))
+        elif name == "sse":
+            sinks.append(SSEAlarmSink())
+        elif name == "webhook":
+            if not webhook_url:
+                raise ValueError("The webhook alarm sink needs a webhook URL")
+            sinks.append(WebhookSink(webhook_url, webhook_timeout, webhook_workers))
+        else:
+            raise ValueError(f"Unknown alarm sink: {name}")
+    return sinks
+
+
+class _SinkWorker:
+    """Priority queue and worker threads of one sink, so a slow sink never delays the others"""
+
+    def __init__(self, sink, dispatcher: "AlarmDispatcher"):
+        self.sink = sink
+        self.dispatcher = dispatcher
+        self.queue = queue.PriorityQueue()
+        self.delivered = 0
+        self.errors = 0
+        self._counts_lock = threading.Lock()
+        self._opened = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._run, args=(i == 0,), name=f"alarm-{sink.name}-{i}", daemon=True)
+            for i in range(max(1, getattr(sink, "workers", 1)))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def put(self, alarm: Alarm, order: int):
+        self.queue.put((alarm.priority, order, alarm))
+
+    def _run(self, opener: bool):
+        if opener:
+            try:
+                self.sink.open()
+            except Exception as e:
+                print(f"Error opening {self.sink.name} alarm sink: {e}")
+            self._opened.set()
+        else:
+            self._opened.wait()
+
+        while True:
+            _, _, alarm = self.queue.get()
+            if alarm is _SHUTDOWN:
+                break
+            self.dispatcher._picked_up(alarm)
+            try:
+                self.sink.send(alarm)
+            except Exception as e:
+                with self._counts_lock:
+                    self.errors += 1
+                print(f"Error sending alarm to {self.sink.name} sink: {e}")
+                continue
+            with self._counts_lock:
+                self.delivered += 1
+            self.dispatcher._delivered(alarm, self.sink.name)
+
+    def shutdown(self, timeout: Optional[float]):
+        for _ in self._threads:
+            self.queue.put((float("inf"), next(self.dispatcher._order), _SHUTDOWN))
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        try:
+            self.sink.close()
+        except Exception as e:
+            print(f"Error closing {self.sink.name} alarm sink: {e}")
+
+
+class AlarmDispatcher:
+    """Delivers alarms to every sink without blocking the streams that raise them
+
+    trigger() only queues the alarm. Each sink has its own priority queue and
+    worker threads, so fire goes out before smoke and a slow webhook never holds
+    back the audio or SSE sinks. Per stream and alarm type, a trigger is dropped
+    while the same alarm is still queued, or within cooldown_seconds of the last
+    one; a smoke alarm on one stream therefore never holds back a fire alarm on
+    another. Latency is measured from the triggering frame's timestamp to
+    delivery by each sink.
+    """
+
+    def __init__(self, sinks: List[Any], cooldown_seconds: float = 10.0, metrics=None, history: int = 50):
+        self.sinks = sinks
+        self.cooldown_seconds = cooldown_seconds
+        self.metrics = metrics
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+        # Sinks that have not yet picked up each queued (stream, alarm type)
+        self._pending: Dict[tuple, int] = {}
+        self._last_triggered: Dict[tuple, float] = {}
+        self.recent = deque(maxlen=history)
+
+        self.triggered = 0
+        self.deduplicated = 0
+        self.rate_limited = 0
+        self.dispatched = 0
+        self._workers = [_SinkWorker(sink, self) for sink in sinks]
+
+    def sink(self, name: str) -> Optional[Any]:
+        return next((sink for sink in self.sinks if sink.name == name), None)
+
+    def trigger(self, stream_id: str, alarm_type: str, frame_timestamp: Optional[float] = None) -> bool:
+        """Queue an alarm for every sink; returns False when it was deduplicated or rate-limited"""
+        key = (stream_id, alarm_type)
+        now = time.monotonic()
+        with self._lock:
+            self.triggered += 1
+            if key in self._pending:
+                self.deduplicated += 1
+                return False
+            last = self._last_triggered.get(key)
+            if last is not None and now - last < self.cooldown_seconds:
+                self.rate_limited += 1
+                return False
+            if self._workers:
+                self._pending[key] = len(self._workers)
+            self._last_triggered[key] = now
+            self.dispatched += 1
+
+        alarm = Alarm(stream_id, alarm_type, frame_timestamp)
+        self.recent.append(alarm)
+        print(f"{ALARM_MESSAGES.get(alarm_type, alarm_type)} (stream {stream_id})")
+        order = next(self._order)
+        for worker in self._workers:
+            worker.put(alarm, order)
+        return True
+
+    def _picked_up(self, alarm: Alarm):
+        key = (alarm.stream_id, alarm.alarm_type)
+        with self._lock:
+            remaining = self._pending.get(key, 0) - 1
+            if remaining > 0:
+                self._pending[key] = remaining
+            else:
+                self._pending.pop(key, None)
+
+    def _delivered(self, alarm: Alarm, sink_name: str):
+        latency = alarm.latency_seconds()
+        alarm.delivered[sink_name] = round(latency * 1000.0, 1)
+        if self.metrics is not None:
+            self.metrics.histogram(
+                "alarm_latency_seconds", "Time from the triggering frame to alarm delivery per sink",
+                stream=alarm.stream_id, type=alarm.alarm_type, sink=sink_name
+            ).observe(latency)
+
+    @property
+    def pending(self) -> int:
+        return sum(worker.queue.qsize() for worker in self._workers)
+
+    def shutdown(self, timeout: Optional[float] = 5.0):
+        """Deliver queued alarms, close the sinks and stop the workers"""
+        for worker in self._workers:
+            worker.shutdown(timeout)
+
+    def metric_samples(self):
+        yield "alarms_triggered_total", "counter", "Alarm triggers, including dropped ones", {}, self.triggered
+        yield "alarms_dropped_total", "counter", "Alarm triggers dropped before dispatch", \
+            {"reason": "duplicate"}, self.deduplicated
+        yield "alarms_dropped_total", "counter", "Alarm triggers dropped before dispatch", \
+            {"reason": "rate_limited"}, self.rate_limited
+        yield "alarms_dispatched_total", "counter", "Alarms queued for the sinks", {}, self.dispatched
+        for worker in self._workers:
+            sink = {"sink": worker.sink.name}
+            yield "alarms_pending", "gauge", "Alarms waiting for each sink", sink, worker.queue.qsize()
+            yield "alarm_deliveries_total", "counter", "Alarms delivered per sink", sink, worker.delivered
+            yield "alarm_sink_errors_total", "counter", "Failed alarm deliveries per sink", sink, worker.errors
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "sinks": [sink.name for sink in self.sinks],
+            "cooldown_seconds": self.cooldown_seconds,
+            "pending": self.pending,
+            "triggered": self.triggered,
+            "deduplicated": self.deduplicated,
+            "rate_limited": self.rate_limited,
+            "dispatched": self.dispatched,
+            "delivered": {worker.sink.name: worker.delivered for worker in self._workers},
+            "sink_errors": {worker.sink.name: worker.errors for worker in self._workers},
+            "recent": [{**alarm.as_dict(), "delivered_ms": dict(alarm.delivered)} for alarm in list(self.recent)],
+        }
@@ -0,0 +1,97 @@
+import os
+import glob
+import shutil
+import hashlib
+from typing import Optional, Tuple
+
+# Inference backends a model can be served with; exported formats are loaded
+# through ultralytics' AutoBackend so the rest of the service is unchanged
+SUPPORTED_BACKENDS = ("pytorch", "onnx", "openvino", "onnx_int8")
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Hash a file in chunks so large weights are not read into memory at once"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _artifact_key(weights_path: str, weights_hash: str, imgsz: int) -> str:
+    stem, _ = os.path.splitext(weights_path)
+    return f"{stem}.{weights_hash[:12]}.{imgsz}"
+
+
+def cached_artifact_path(weights_path: str, backend: str, weights_hash: str, imgsz: int = 640,
+                         calibration: Optional[str] = None) -> str:
+    """Location of the exported artifact for weights_path, keyed by the weights' hash and the input size
+
+    INT8 models are also keyed by their calibration, since the same weights
+    calibrated on other frames give a different model.
+    """
+    key = _artifact_key(weights_path, weights_hash, imgsz)
+    if backend == "onnx":
+        return f"{key}.onnx"
+    if backend == "onnx_int8":
+        if not calibration:
+            raise ValueError("INT8 artifacts need a calibration key")
+        return f"{key}.int8.{calibration}.onnx"
+    if backend == "openvino":
+        # ultralytics recognises OpenVINO models by the _openvino_model directory suffix
+        return f"{key}_openvino_model"
+    raise ValueError(f"Unsupported inference backend: {backend}")
+
+
+def export_model(weights_path: str, backend: str, imgsz: int = 640) -> str:
+    """Export .pt weights to the backend's format once and return the cached artifact path"""
+    if backend == "pytorch":
+        return weights_path
+    if backend not in SUPPORTED_BACKENDS:
+        raise ValueError(f"Unsupported inference backend: {backend}")
+
+    weights_hash = file_sha256(weights_path)
+    if backend == "onnx_int8":
+        # INT8 models need calibration data, so they are produced by the quantization tool;
+        # the most recent calibration for these weights and input size is served
+        pattern = glob.escape(_artifact_key(weights_path, weights_hash, imgsz)) + ".int8.*.onnx"
+        candidates = [path for path in glob.glob(pattern) if not path.endswith(".prep.onnx")]
+        if not candidates:
+            raise FileNotFoundError(
+                f"No INT8 model for {weights_path} at imgsz {imgsz}; create it with: "
+                f"python -m app.quantization --weights {weights_path} --imgsz {imgsz}"
+            )
+        return max(candidates, key=os.path.getmtime)
+
+    artifact_path = cached_artifact_path(weights_path, backend, weights_hash, imgsz)
+    if os.path.exists(artifact_path):
+        return artifact_path
+
+    from ultralytics import YOLO
+
+    print(f"Exporting {weights_path} to {backend} at imgsz {imgsz}, this only happens once per weights file and size")
+    # Dynamic input shapes let the micro-batcher send batches of any size
+    exported_path = YOLO(weights_path).export(format=backend, imgsz=imgsz, dynamic=True)
+    shutil.move(str(exported_path), artifact_path)
+    print(f"Cached {backend} model at: {artifact_path}")
+    return artifact_path
+
+
+def select_device() -> str:
+    """Pick CUDA when available; imports torch, so call it lazily"""
+    import torch
+    return 'cuda' if torch.cuda.is_available() else 'cpu'
+
+
+def load_model(weights_path: str, backend: str = "pytorch", device: str = "cpu",
+               imgsz: int = 640) -> Tuple[object, str]:
+    """Load a YOLO model for the given backend, exporting and caching it first if needed"""
+    from ultralytics import YOLO
+
+    artifact_path = export_model(weights_path, backend, imgsz)
+    if backend == "pytorch":
+        model = YOLO(artifact_path)
+        model.to(device)
+    else:
+        model = YOLO(artifact_path, task="detect")
+    return model, artifact_path
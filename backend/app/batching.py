@@ -0,0 +1,67 @@
+import time
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, List, Tuple
+
+
+class _BatchItem:
+    __slots__ = ("source", "future", "enqueued_at")
+
+    def __init__(self, source: Any):
+        self.source = source
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class MicroBatcher:
+    """Merge concurrent single-source inference requests into batched model calls"""
+
+    def __init__(self, infer_fn: Callable[[List[Any]], List[Any]],
+                 max_batch_size: int = 8, max_wait_ms: float = 5.0):
+        self.infer_fn = infer_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_ms = max(0.0, max_wait_ms)
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, source: Any) -> Future:
+        """Queue a source for inference; the future resolves to (result, queue_ms)"""
+        item = _BatchItem(source)
+        self._queue.put(item)
+        return item.future
+
+    def infer(self, source: Any) -> Tuple[Any, float]:
+        """Run a single source through the batcher and wait for its result"""
+        return self.submit(source).result()
+
+    def _collect(self) -> List[_BatchItem]:
+        """Block for the first request, then gather more until the batch is full or the wait expires"""
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait_ms / 1000.0
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            dispatched_at = time.perf_counter()
+            try:
+                results = self.infer_fn([item.source for item in batch])
+            except Exception as e:
+                for item in batch:
+                    item.future.set_exception(e)
+                continue
+
+            for item, result in zip(batch, results):
+                queue_ms = round((dispatched_at - item.enqueued_at) * 1000.0, 1)
+                item.future.set_result((result, queue_ms))
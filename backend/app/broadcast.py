@@ -0,0 +1,249 @@
+import json
+import queue
+import asyncio
+import base64
+import threading
+from typing import Any, Callable, Dict, List, Optional
+from .pipeline import offer_latest
+from .inference import Detections
+
+
+class EncodedFrame:
+    """One annotated JPEG plus its detections, serialised lazily once per transport"""
+
+    def __init__(self, stream_id: str, jpeg: bytes, detections: Detections, timestamp: float, seq: int = 0):
+        self.stream_id = stream_id
+        self.seq = seq
+        self.jpeg = jpeg
+        self.detections = detections
+        self.timestamp = timestamp
+        self._sse_event = None
+        self._mjpeg_part = None
+
+    def sse_event(self) -> str:
+        """Legacy transport: base64 JPEG inside a JSON server-sent event"""
+        if self._sse_event is None:
+            frame_data = {
+                "stream_id": self.stream_id,
+                "seq": self.seq,
+                "frame": base64.b64encode(self.jpeg).decode('utf-8'),
+                "detections": self.detections.to_list(),
+                "timestamp": self.timestamp
+            }
+            self._sse_event = f"data: {json.dumps(frame_data)}\n\n"
+        return self._sse_event
+
+    def mjpeg_part(self) -> bytes:
+        """Binary transport: raw JPEG bytes as one multipart/x-mixed-replace part"""
+        if self._mjpeg_part is None:
+            self._mjpeg_part = (b'--frame\r\n'
+                                b'Content-Type: image/jpeg\r\n'
+                                b'Content-Length: ' + str(len(self.jpeg)).encode() + b'\r\n\r\n' +
+                                self.jpeg + b'\r\n')
+        return self._mjpeg_part
+
+
+def detections_event(stream_id: str, detections: Detections, timestamp: float, seq: int = 0) -> str:
+    """Lightweight server-sent event carrying only compact detection metadata"""
+    data = {
+        "stream_id": stream_id,
+        "seq": seq,
+        "timestamp": timestamp,
+        "detections": detections.compact(),
+    }
+    return f"data: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+# Delivered to subscribers when the broadcaster closes
+CLOSED = object()
+
+# How often an idle encoder wakes to check whether it still has subscribers
+IDLE_CHECK_SECONDS = 1.0
+
+
+class FrameSlot:
+    """Latest published value with a sequence number; waiters wake only when a newer value arrives"""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._value = None
+        self.seq = 0
+        self.closed = False
+
+    def publish(self, value: Any) -> int:
+        with self._condition:
+            self._value = value
+            self.seq += 1
+            self._condition.notify_all()
+            return self.seq
+
+    def latest(self):
+        """Return (seq, value) for the most recent publication"""
+        with self._condition:
+            return self.seq, self._value
+
+    def wait_newer(self, seq: int, timeout: Optional[float] = None):
+        """Block until a value newer than seq is published; returns (seq, value), or None if closed or timed out"""
+        with self._condition:
+            self._condition.wait_for(lambda: self.seq > seq or self.closed, timeout=timeout)
+            if self.seq > seq:
+                return self.seq, self._value
+            return None
+
+    def close(self):
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+
+class Subscription:
+    """Bounded per-client queue fed by a FrameBroadcaster, readable from a thread or an event loop"""
+
+    def __init__(self, queue_size: int):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.delivered = 0
+        self.dropped = 0
+        # Set by the first aget() so producers can wake the waiting coroutine
+        self._loop = None
+        self._wake = None
+
+    def offer(self, payload: Any) -> int:
+        """Queue a payload without blocking, dropping the oldest when full; returns the number dropped"""
+        dropped = offer_latest(self.queue, payload)
+        self.dropped += dropped
+        loop = self._loop
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(self._wake.set)
+            except RuntimeError:
+                # The client's event loop has already shut down
+                pass
+        return dropped
+
+    def _take(self) -> Any:
+        payload = self.queue.get_nowait()
+        if payload is not CLOSED:
+            self.delivered += 1
+        return payload
+
+    def get(self, timeout: Optional[float] = None) -> Any:
+        """Block for the next payload; returns CLOSED at end of stream or None if timeout expires first"""
+        try:
+            payload = self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if payload is not CLOSED:
+            self.delivered += 1
+        return payload
+
+    async def aget(self, timeout: Optional[float] = None) -> Any:
+        """Like get(), but waits on the event loop instead of holding a worker thread"""
+        if self._wake is None:
+            self._wake = asyncio.Event()
+            self._loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else self._loop.time() + timeout
+        while True:
+            # Cleared before checking, so a payload offered after the check still wakes us
+            self._wake.clear()
+            try:
+                return self._take()
+            except queue.Empty:
+                pass
+            remaining = None if deadline is None else deadline - self._loop.time()
+            if remaining is not None and remaining <= 0:
+                return None
+            try:
+                await asyncio.wait_for(self._wake.wait(), remaining)
+            except asyncio.TimeoutError:
+                return None
+
+
+class FrameBroadcaster:
+    """Encode each new source frame once and fan the same bytes out to every subscriber"""
+
+    def __init__(self, slot: FrameSlot, encode_fn: Callable[[Any, int], Any], queue_size: int = 2,
+                 name: str = "broadcaster"):
+        self.slot = slot
+        self.encode_fn = encode_fn
+        self.queue_size = max(1, queue_size)
+        self.name = name
+        self._subscribers: List[Subscription] = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self._last_seq = 0
+        self._last_payload = None
+        self.closed = False
+        self.frames_encoded = 0
+        # Drops across every subscriber, past and present, so it never goes down
+        self.frames_dropped = 0
+
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subscribers)
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self.queue_size)
+        with self._lock:
+            if self.closed:
+                subscription.offer(CLOSED)
+                return subscription
+            # Late joiners start from the frame everyone else already has
+            if self._last_payload is not None:
+                subscription.offer(self._last_payload)
+            self._subscribers.append(subscription)
+
+            # The encoder only runs while someone is listening
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def close(self):
+        """End every subscription and stop the encoder"""
+        with self._lock:
+            self.closed = True
+            subscribers = list(self._subscribers)
+            self._subscribers = []
+        for subscription in subscribers:
+            subscription.offer(CLOSED)
+        self.slot.close()
+
+    def _run(self):
+        """Wait for each new frame in the slot, encode it once and offer it to every subscriber"""
+        while True:
+            published = self.slot.wait_newer(self._last_seq, timeout=IDLE_CHECK_SECONDS)
+
+            with self._lock:
+                if self.closed or self.slot.closed or not self._subscribers:
+                    self._thread = None
+                    return
+                if published is None:
+                    continue
+                subscribers = list(self._subscribers)
+            seq, value = published
+            self._last_seq = seq
+
+            payload = self.encode_fn(value, seq)
+            if payload is None:
+                continue
+            self.frames_encoded += 1
+            self._last_payload = payload
+
+            # A slow client only loses its own oldest frames and never blocks the others
+            for subscription in subscribers:
+                self.frames_dropped += subscription.offer(payload)
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        return {
+            "subscribers": len(subscribers),
+            "frames_encoded": self.frames_encoded,
+            "frames_dropped": self.frames_dropped,
+            "last_seq": self._last_seq,
+        }
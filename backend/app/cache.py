@@ -0,0 +1,84 @@
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class CachedResult:
+    """A prediction payload and the stored file holding its annotated artifact"""
+
+    def __init__(self, payload: Dict[str, Any], artifact_name: str, artifact: Optional[bytes] = None):
+        self.payload = payload
+        self.artifact_name = artifact_name
+        # Small artifacts (images) are kept in memory so a file evicted from storage can be
+        # restored; large ones (videos) are only referenced and count against the storage quota
+        self.artifact = artifact
+        self.size = len(json.dumps(payload)) + (len(artifact) if artifact is not None else 0)
+
+
+class ResultCache:
+    """Content-addressed LRU cache of prediction results under a size cap
+
+    Keys are (content hash, model ID, confidence threshold, variant), so the same
+    file analysed with another model, threshold or stream setting is a miss.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple, CachedResult]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(content_hash: str, model_id: str, confidence: float, variant: str = "") -> Tuple:
+        return content_hash, model_id, round(confidence, 4), variant
+
+    def get(self, key: Tuple) -> Optional[CachedResult]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def invalidate(self, key: Tuple, counted_as_hit: bool = True):
+        """Drop an entry whose artifact is gone; a lookup that found it is recounted as a miss"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._total_bytes -= entry.size
+            if counted_as_hit:
+                self.hits -= 1
+                self.misses += 1
+
+    def put(self, key: Tuple, entry: CachedResult):
+        if self.max_bytes <= 0 or entry.size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous.size
+            self._entries[key] = entry
+            self._total_bytes += entry.size
+            while self._total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= evicted.size
+                self.evictions += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+            }
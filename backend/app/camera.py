@@ -0,0 +1,99 @@
+import cv2
+import time
+import threading
+from collections import deque
+from typing import Any, Dict, Optional, Tuple
+
+
+class LatestFrameCapture:
+    """Camera reader thread that keeps only the newest frame in a single-slot buffer"""
+
+    def __init__(self, source: Any = 0):
+        self.source = source
+        self.cap = None
+        self.running = False
+        self.thread = None
+
+        self._condition = threading.Condition()
+        self._frame = None
+        self._captured_at = 0.0
+        self._seq = 0
+        self._consumed_seq = 0
+
+        self.frames_captured = 0
+        self.frames_dropped = 0
+
+    def start(self):
+        """Open the camera and start overwriting the slot with every captured frame"""
+        self.cap = cv2.VideoCapture(self.source)
+        if not self.cap.isOpened():
+            raise RuntimeError("Could not start camera.")
+        # Keep the driver from queueing stale frames on backends that support it
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="camera-capture", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        with self._condition:
+            self._condition.notify_all()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout=2.0)
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+    def _run(self):
+        while self.running:
+            success, frame = self.cap.read()
+            if not success:
+                break
+            captured_at = time.time()
+
+            with self._condition:
+                # The previous frame was never taken by the consumer
+                if self._seq > self._consumed_seq:
+                    self.frames_dropped += 1
+                self._frame = frame
+                self._captured_at = captured_at
+                self._seq += 1
+                self.frames_captured += 1
+                self._condition.notify_all()
+
+        self.running = False
+        with self._condition:
+            self._condition.notify_all()
+
+    def read_latest(self, timeout: float = 1.0) -> Optional[Tuple[Any, float]]:
+        """Wait for a frame newer than the last one returned; returns (frame, captured_at) or None"""
+        with self._condition:
+            self._condition.wait_for(lambda: self._seq > self._consumed_seq or not self.running, timeout=timeout)
+            if self._seq <= self._consumed_seq:
+                return None
+            self._consumed_seq = self._seq
+            return self._frame, self._captured_at
+
+
+class LiveStats:
+    """Dropped-frame and capture-to-alarm latency counters for the live camera"""
+
+    def __init__(self, window: int = 100):
+        self.frames_processed = 0
+        self.latencies_ms = deque(maxlen=window)
+
+    def record(self, captured_at: float):
+        self.frames_processed += 1
+        self.latencies_ms.append((time.time() - captured_at) * 1000.0)
+
+    def as_dict(self, capture: Optional[LatestFrameCapture]) -> Dict[str, Any]:
+        latencies = list(self.latencies_ms)
+        return {
+            "frames_captured": capture.frames_captured if capture else 0,
+            "frames_dropped": capture.frames_dropped if capture else 0,
+            "frames_processed": self.frames_processed,
+            "latency_ms_last": round(latencies[-1], 1) if latencies else None,
+            "latency_ms_avg": round(sum(latencies) / len(latencies), 1) if latencies else None,
+            "latency_ms_max": round(max(latencies), 1) if latencies else None,
+        }
@@ -0,0 +1,121 @@
+import cv2
+import time
+from typing import Any, Dict, List, Optional
+
+
+class StageCounter:
+    """Pass rate and latency for one cascade stage"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.screened = 0
+        self.passed = 0
+        self.total_ms = 0.0
+
+    def record(self, passed: bool, elapsed_ms: float):
+        self.screened += 1
+        self.passed += int(passed)
+        self.total_ms += elapsed_ms
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "screened": self.screened,
+            "passed": self.passed,
+            "pass_rate": round(self.passed / self.screened, 4) if self.screened else None,
+            "avg_ms": round(self.total_ms / self.screened, 3) if self.screened else None,
+        }
+
+
+class ColorScreen:
+    """Low-resolution HSV screen for flame-coloured pixels and grey, low-texture smoke"""
+
+    name = "color"
+
+    def __init__(self, width: int = 160, fire_fraction: float = 0.002, smoke_fraction: float = 0.05):
+        self.width = width
+        self.fire_fraction = fire_fraction
+        self.smoke_fraction = smoke_fraction
+
+    def __call__(self, frame) -> bool:
+        height = max(1, int(frame.shape[0] * self.width / frame.shape[1]))
+        small = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+        hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+        pixels = float(self.width * height)
+
+        # Flames: saturated, bright red/orange/yellow
+        fire_mask = cv2.inRange(hsv, (0, 80, 150), (35, 255, 255))
+        if cv2.countNonZero(fire_mask) / pixels >= self.fire_fraction:
+            return True
+
+        # Smoke: unsaturated mid-grey regions with little fine texture
+        grey_mask = cv2.inRange(hsv, (0, 0, 80), (180, 50, 230))
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        texture = cv2.convertScaleAbs(cv2.Laplacian(gray, cv2.CV_16S, ksize=3))
+        smooth_mask = cv2.inRange(texture, 0, 12)
+        smoke_mask = cv2.bitwise_and(grey_mask, smooth_mask)
+        return cv2.countNonZero(smoke_mask) / pixels >= self.smoke_fraction
+
+
+class ModelScreen:
+    """Small, low-resolution model pass that only needs to say whether anything is there"""
+
+    name = "model"
+
+    def __init__(self, service, model_name: str, imgsz: int = 320, conf: float = 0.15):
+        self.service = service
+        self.model_name = model_name
+        self.imgsz = imgsz
+        self.conf = conf
+
+    def __call__(self, frame) -> bool:
+        loaded = self.service.models.get(self.model_name)
+        with loaded.lock:
+            results = loaded.model(frame, conf=self.conf, imgsz=self.imgsz, verbose=False)
+        return len(results[0].boxes) > 0
+
+
+class Cascade:
+    """Cheap screening stages that must all pass before a frame is escalated to the main model"""
+
+    def __init__(self, stages: List[Any]):
+        self.stages = stages
+        self.counters = [StageCounter(stage.name) for stage in stages]
+        self.frames = 0
+        self.escalated = 0
+
+    def screen(self, frame) -> bool:
+        """Return True if the frame should go to the main model"""
+        self.frames += 1
+        for stage, counter in zip(self.stages, self.counters):
+            started = time.perf_counter()
+            passed = bool(stage(frame))
+            counter.record(passed, (time.perf_counter() - started) * 1000.0)
+            if not passed:
+                return False
+        self.escalated += 1
+        return True
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "frames": self.frames,
+            "escalated": self.escalated,
+            "escalation_rate": round(self.escalated / self.frames, 4) if self.frames else None,
+            "stages": {counter.name: counter.as_dict() for counter in self.counters},
+        }
+
+
+def build_cascade(mode: Optional[str], service=None, model_name: Optional[str] = None) -> Optional[Cascade]:
+    """Build a cascade from a mode string: off, color, model or color+model"""
+    if not mode or mode == "off":
+        return None
+    stages = []
+    for part in mode.split("+"):
+        if part == "color":
+            stages.append(ColorScreen())
+        elif part == "model":
+            if service is None or not model_name:
+                raise ValueError("The model cascade stage needs a screening model name")
+            stages.append(ModelScreen(service, model_name))
+        else:
+            raise ValueError(f"Unknown cascade stage: {part}")
+    return Cascade(stages)
@@ -0,0 +1,116 @@
+import os
+
+# Micro-batching of single-image predictions
+BATCH_MAX_SIZE = int(os.getenv("SAFDS_BATCH_MAX_SIZE", "8"))
+BATCH_MAX_WAIT_MS = float(os.getenv("SAFDS_BATCH_MAX_WAIT_MS", "5"))
+
+# Bounded worker pool for blocking inference work in request handlers
+INFERENCE_WORKERS = int(os.getenv("SAFDS_INFERENCE_WORKERS", "4"))
+INFERENCE_QUEUE_DEPTH = int(os.getenv("SAFDS_INFERENCE_QUEUE_DEPTH", "16"))
+
+# Multi-stream video engine
+STREAM_MAX_ACTIVE = int(os.getenv("SAFDS_STREAM_MAX_ACTIVE", "32"))
+# Ended streams kept for status queries before the oldest are forgotten
+STREAM_MAX_FINISHED = int(os.getenv("SAFDS_STREAM_MAX_FINISHED", "32"))
+STREAM_BATCH_MAX_SIZE = int(os.getenv("SAFDS_STREAM_BATCH_MAX_SIZE", "16"))
+STREAM_BATCH_MAX_WAIT_MS = float(os.getenv("SAFDS_STREAM_BATCH_MAX_WAIT_MS", "10"))
+
+# Capacity of the bounded queues between video pipeline stages
+PIPELINE_QUEUE_SIZE = int(os.getenv("SAFDS_PIPELINE_QUEUE_SIZE", "8"))
+
+# Live camera source passed to cv2.VideoCapture (device index or URL)
+CAMERA_SOURCE = os.getenv("SAFDS_CAMERA_SOURCE", "0")
+CAMERA_SOURCE = int(CAMERA_SOURCE) if CAMERA_SOURCE.isdigit() else CAMERA_SOURCE
+
+# Frame skipping for video streams: run inference on every Nth frame, skip
+# frames the motion gate sees as unchanged, and go back to every frame once
+# fire or smoke reaches the escalation confidence
+STREAM_INFERENCE_STRIDE = int(os.getenv("SAFDS_STREAM_INFERENCE_STRIDE", "1"))
+STREAM_MOTION_GATE = os.getenv("SAFDS_STREAM_MOTION_GATE", "0") == "1"
+STREAM_ESCALATE_CONFIDENCE = float(os.getenv("SAFDS_STREAM_ESCALATE_CONFIDENCE", "0.25"))
+
+# Frames buffered per live viewer before the oldest is dropped
+BROADCAST_CLIENT_QUEUE = int(os.getenv("SAFDS_BROADCAST_CLIENT_QUEUE", "2"))
+
+# Idle seconds before an event stream sends a keep-alive comment
+STREAM_KEEPALIVE_SECONDS = float(os.getenv("SAFDS_STREAM_KEEPALIVE_SECONDS", "15"))
+
+# Confidence thresholds for uploaded images and for video/stream frames
+IMAGE_CONFIDENCE = float(os.getenv("SAFDS_IMAGE_CONFIDENCE", "0.4"))
+FRAME_CONFIDENCE = float(os.getenv("SAFDS_FRAME_CONFIDENCE", "0.3"))
+
+# Model weights and the backend they are served with: pytorch, onnx, openvino or
+# onnx_int8 (produced by python -m app.quantization)
+MODEL_PATH = os.getenv("SAFDS_MODEL_PATH", "YOLOv11m_best.pt")
+INFERENCE_BACKEND = os.getenv("SAFDS_BACKEND", "pytorch").lower()
+# Input size of the main detector. It is passed on every call, because ultralytics
+# keeps the last imgsz on an exported model's predictor and the cascade screens smaller
+INFERENCE_IMGSZ = int(os.getenv("SAFDS_INFERENCE_IMGSZ", "640"))
+
+# Models that can be served, as name=weights pairs, and the one used by default
+MODELS = dict(
+    item.split("=", 1) for item in os.getenv(
+        "SAFDS_MODELS", f"v11m={MODEL_PATH},v8m=YOLOv8m_best.pt,v5m=YOLOv5m_best.pt"
+    ).split(",") if "=" in item
+)
+ACTIVE_MODEL = os.getenv("SAFDS_ACTIVE_MODEL", "v11m")
+MODEL_MEMORY_BUDGET_MB = float(os.getenv("SAFDS_MODEL_MEMORY_MB", "2048"))
+
+# Background warm-up of the active model: attempts before giving up, and the
+# delay before the first retry, doubled after each failure
+WARM_UP_ATTEMPTS = int(os.getenv("SAFDS_WARM_UP_ATTEMPTS", "3"))
+WARM_UP_RETRY_SECONDS = float(os.getenv("SAFDS_WARM_UP_RETRY_SECONDS", "2"))
+
+# Optional screening before the main model: off, color, model or color+model;
+# the model stage uses CASCADE_MODEL from the registry at low resolution
+CASCADE_MODE = os.getenv("SAFDS_CASCADE", "off").lower()
+CASCADE_MODEL = os.getenv("SAFDS_CASCADE_MODEL", "v5m")
+
+# Sliced inference for high-resolution streams: frames are cut into overlapping
+# tiles of TILE_SIZE pixels (0 disables tiling) that run as one batch
+TILE_SIZE = int(os.getenv("SAFDS_TILE_SIZE", "0"))
+TILE_OVERLAP = float(os.getenv("SAFDS_TILE_OVERLAP", "0.2"))
+
+# Uploads and annotated results: written in the background by a small writer
+# pool and evicted least recently used first beyond the size or age limit
+# (an age of 0 keeps files until the size limit is reached)
+RESULTS_DIR = os.getenv("SAFDS_RESULTS_DIR", "results")
+RESULTS_MAX_MB = float(os.getenv("SAFDS_RESULTS_MAX_MB", "2048"))
+RESULTS_MAX_AGE_HOURS = float(os.getenv("SAFDS_RESULTS_MAX_AGE_HOURS", "0"))
+RESULTS_WRITERS = int(os.getenv("SAFDS_RESULTS_WRITERS", "2"))
+
+# Streaming uploads: written to disk in chunks with a size limit. Analysis can
+# start once UPLOAD_AUTOSTART_MB have arrived, and a decoder that catches up with
+# the upload resumes after another UPLOAD_RESUME_MB
+UPLOAD_MAX_MB = float(os.getenv("SAFDS_UPLOAD_MAX_MB", "4096"))
+UPLOAD_CHUNK_BYTES = int(os.getenv("SAFDS_UPLOAD_CHUNK_KB", "1024")) * 1024
+UPLOAD_AUTOSTART_BYTES = int(float(os.getenv("SAFDS_UPLOAD_AUTOSTART_MB", "8")) * 1024 * 1024)
+UPLOAD_RESUME_BYTES = int(float(os.getenv("SAFDS_UPLOAD_RESUME_MB", "2")) * 1024 * 1024)
+
+# Content-addressed cache of prediction results, keyed by file hash, model and
+# confidence threshold, evicted least recently used beyond RESULT_CACHE_MAX_MB
+RESULT_CACHE_MAX_MB = float(os.getenv("SAFDS_RESULT_CACHE_MAX_MB", "256"))
+# Uploaded videos whose content hash is remembered for caching streams started on them
+VIDEO_HASHES_MAX = int(os.getenv("SAFDS_VIDEO_HASHES_MAX", "1024"))
+
+# Video decode/encode: opencv, ffmpeg (ffmpeg binary on PATH), pyav (av
+# package) or auto, which picks the first of pyav, ffmpeg and opencv that is
+# available. Annotated videos are encoded with VIDEO_ENCODER on a background
+# thread; STREAM_DECODE_WIDTH downscales frames while decoding (0 keeps the
+# source resolution)
+VIDEO_BACKEND = os.getenv("SAFDS_VIDEO_BACKEND", "auto").lower()
+VIDEO_ENCODER = os.getenv("SAFDS_VIDEO_ENCODER", "libx264")
+VIDEO_WRITER_QUEUE = int(os.getenv("SAFDS_VIDEO_WRITER_QUEUE", "32"))
+STREAM_DECODE_WIDTH = int(os.getenv("SAFDS_STREAM_DECODE_WIDTH", "0"))
+
+# Alarm dispatch: ALARM_SINKS is a comma-separated list of audio, sse and
+# webhook (the webhook sink needs ALARM_WEBHOOK_URL and posts from
+# ALARM_WEBHOOK_WORKERS threads). The same alarm type on the same stream is sent
+# at most once per ALARM_COOLDOWN_SECONDS
+ALARM_SINKS = os.getenv("SAFDS_ALARM_SINKS", "audio,sse").lower()
+ALARM_COOLDOWN_SECONDS = float(os.getenv("SAFDS_ALARM_COOLDOWN_SECONDS", "10"))
+ALARM_FIRE_SOUND = os.getenv("SAFDS_ALARM_FIRE_SOUND", "sounds/fire_alert_sound.mp3")
+ALARM_SMOKE_SOUND = os.getenv("SAFDS_ALARM_SMOKE_SOUND", "sounds/smoke_alert_sound.mp3")
+ALARM_WEBHOOK_URL = os.getenv("SAFDS_ALARM_WEBHOOK_URL", "")
+ALARM_WEBHOOK_TIMEOUT = float(os.getenv("SAFDS_ALARM_WEBHOOK_TIMEOUT", "2"))
+ALARM_WEBHOOK_WORKERS = int(os.getenv("SAFDS_ALARM_WEBHOOK_WORKERS", "4"))
@@ -1,23 +1,257 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi import APIRouter, HTTPException, UploadFile, File, Request
+from typing import List, Optional
+from fastapi.responses import FileResponse, StreamingResponse, JSONResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 from datetime import datetime
 import os
+import time
+import hashlib
 import mimetypes
+import cv2
+import numpy as np
 from .models import (
     LoginRequest, VideoProcessingRequest, VideoUploadResponse, 
-    PredictionResponse, StatusResponse
+    PredictionResponse, BatchPredictionResponse, StatusResponse, ModelActivationRequest
 )
 from .services import DetectionService
+from .executor import BoundedExecutor, ExecutorBusyError
+from .streams import StreamLimitError, DEFAULT_STREAM_ID, STREAM_ID_PATTERN, analysis_variant
+from .cache import CachedResult, ResultCache
+from .uploads import UploadWriter, UploadTooLargeError
+from .registry import ModelUnavailableError, UnknownModelError
+from .storage import new_result_id
+from . import config
 
 router = APIRouter()
 
-# Initialize detection service
+VIDEO_EXTENSIONS = [".mp4", ".avi", ".mov", ".mkv"]
+
+# Initialize detection service (cheap; the model is loaded by a background warm-up)
 detection_service = DetectionService()
 
+# Blocking inference work runs here so the event loop stays free for streams
+inference_executor = BoundedExecutor(
+    max_workers=config.INFERENCE_WORKERS,
+    max_queue=config.INFERENCE_QUEUE_DEPTH
+)
+
+
+def executor_metrics():
+    yield "inference_queue_depth", "gauge", "Inference jobs running or waiting on the executor", {}, \
+        inference_executor.pending
+
+
+detection_service.metrics.register_collector(executor_metrics)
+
+
+async def run_inference_job(fn, *args):
+    """Await a blocking job on the inference executor, rejecting it with 503 when the queue is full"""
+    try:
+        return await inference_executor.run(fn, *args)
+    except ModelUnavailableError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ExecutorBusyError:
+        raise HTTPException(
+            status_code=503,
+            detail="Inference queue is full, please retry shortly",
+            headers={"Retry-After": "1"}
+        )
+
+
+def decode_upload(contents: bytes):
+    """Decode uploaded image bytes into a BGR array, or None if they are not an image"""
+    return cv2.imdecode(np.frombuffer(contents, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+def require_ready():
+    """Reject inference requests with 503 until the model has been loaded and warmed up"""
+    if detection_service.ready.is_set():
+        return
+    if detection_service.warm_up_failed:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Detection model failed to load: {detection_service.warm_up_error}"
+        )
+    raise HTTPException(
+        status_code=503,
+        detail="Detection model is still loading, please retry shortly",
+        headers={"Retry-After": "2"}
+    )
+
+
+def resolve_model(model: Optional[str]) -> str:
+    """Validate a requested model name, defaulting to the active model"""
+    try:
+        return detection_service.models.check_available(model)
+    except UnknownModelError:
+        raise HTTPException(status_code=404, detail=f"Unknown model: {model}")
+    except ModelUnavailableError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+def image_cache_key(contents: bytes, model: str):
+    """Result cache key for uploaded image bytes analysed by a model"""
+    content_hash = hashlib.sha256(contents).hexdigest()
+    return ResultCache.key(content_hash, detection_service.model_id(model), config.IMAGE_CONFIDENCE)
+
+
+def store_annotated(result, annotated_name: str, cache_key=None):
+    """Write an annotated image in the background and remember it in the result cache"""
+    latency = detection_service.image_latency
+    started = time.perf_counter()
+    annotated_image = result.annotate(detection_service.renderer)
+    latency["annotate"].observe(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    ok, buffer = cv2.imencode(os.path.splitext(annotated_name)[1], annotated_image)
+    if not ok:
+        raise ValueError(f"Unable to encode annotated image as {annotated_name}")
+    annotated = buffer.tobytes()
+    latency["encode"].observe(time.perf_counter() - started)
+    detection_service.storage.write(annotated_name, annotated)
+    if cache_key is not None:
+        detection_service.result_cache.put(cache_key, CachedResult(result.as_dict(), annotated_name, annotated))
+
+
+def predict_image_file(input_name: str, annotated_name: str, contents: bytes, model: str = None, cache_key=None):
+    """Run detection on uploaded image bytes; the upload and annotated copy are written in the background"""
+    started = time.perf_counter()
+    image = decode_upload(contents)
+    detection_service.image_latency["decode"].observe(time.perf_counter() - started)
+    if image is None:
+        raise HTTPException(status_code=400, detail="Uploaded file is not a readable image")
+    detection_service.storage.write(input_name, contents)
+    result = detection_service.process_image(image, model_name=model)
+    store_annotated(result, annotated_name, cache_key)
+    return result
+
+
+def cached_prediction(cached) -> PredictionResponse:
+    return PredictionResponse(
+        **cached.payload,
+        timestamp=datetime.now().isoformat(),
+        result_url=f"/results/{cached.artifact_name}",
+        cached=True
+    )
+
+
+async def upload_file_chunks(file: UploadFile):
+    """Read a multipart upload in fixed-size chunks"""
+    while True:
+        chunk = await file.read(config.UPLOAD_CHUNK_BYTES)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def receive_video(chunks, input_name: str, model: str, autostart: bool = False,
+                        stream_id: str = DEFAULT_STREAM_ID) -> VideoUploadResponse:
+    """Stream video chunks to disk with a size limit and running hash, optionally analysing it as it arrives"""
+    if autostart and not STREAM_ID_PATTERN.match(stream_id):
+        raise HTTPException(status_code=400, detail=f"Invalid stream id: {stream_id}")
+
+    storage = detection_service.storage
+    writer = UploadWriter(storage.path(input_name), int(config.UPLOAD_MAX_MB * 1024 * 1024))
+    storage.pin(input_name)
+    started = False
+
+    async def start_stream(upload):
+        await run_in_threadpool(detection_service.streams.start, stream_id, writer.path, model=model, upload=upload)
+
+    try:
+        # Coalesce the server's small body chunks into fewer, larger disk writes
+        buffer = bytearray()
+        async for chunk in chunks:
+            buffer += chunk
+            if len(buffer) < config.UPLOAD_CHUNK_BYTES:
+                continue
+            await run_in_threadpool(writer.write, bytes(buffer))
+            buffer.clear()
+            if autostart and not started and writer.bytes_received >= config.UPLOAD_AUTOSTART_BYTES:
+                await start_stream(writer)
+                started = True
+        if buffer:
+            await run_in_threadpool(writer.write, bytes(buffer))
+        sha256 = writer.finish()
+        if autostart and not started:
+            await start_stream(None)
+            started = True
+    except BaseException as e:
+        writer.abort()
+        storage.unpin(input_name)
+        if started:
+            await run_in_threadpool(detection_service.streams.stop, stream_id)
+        if isinstance(e, UploadTooLargeError):
+            raise HTTPException(status_code=413, detail=str(e))
+        if isinstance(e, StreamLimitError):
+            raise HTTPException(status_code=429, detail=str(e))
+        raise
+    storage.unpin(input_name)
+    storage.register(input_name)
+    detection_service.remember_video_hash(writer.path, sha256)
+
+    # A video already analysed with the default stream settings is answered from the cache
+    cache_key = ResultCache.key(sha256, detection_service.model_id(model), config.FRAME_CONFIDENCE,
+                                analysis_variant())
+    cached = await run_in_threadpool(detection_service.cached_result, cache_key)
+    if cached is not None:
+        if started:
+            await run_in_threadpool(detection_service.streams.stop, stream_id)
+        return VideoUploadResponse(
+            type="video_uploaded",
+            video_path=os.path.join(config.RESULTS_DIR, input_name),
+            timestamp=datetime.now().isoformat(),
+            message="Video was already analysed; returning the cached result.",
+            size=writer.bytes_received,
+            sha256=sha256,
+            annotated_video_url=cached.payload["annotated_video_url"],
+            cached=True
+        )
+
+    response = VideoUploadResponse(
+        type="video_uploaded",
+        video_path=os.path.join(config.RESULTS_DIR, input_name),
+        timestamp=datetime.now().isoformat(),
+        message="Video uploaded successfully. Use start_video_processing to begin real-time analysis.",
+        size=writer.bytes_received,
+        sha256=sha256
+    )
+    if autostart:
+        response.stream_id = stream_id
+        response.message = f"Video uploaded and analysed as stream {stream_id}."
+    return response
+
+
+def file_response(filename: str, attachment: bool) -> FileResponse:
+    """Serve a stored result file, waiting for it if its background write is still pending"""
+    file_path = detection_service.storage.resolve(filename)
+    if file_path is None:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    # Get the MIME type
+    mime_type, _ = mimetypes.guess_type(file_path)
+    if mime_type is None:
+        mime_type = 'application/octet-stream'
+
+    headers = {"Content-Disposition": f"attachment; filename={filename}"} if attachment else None
+    return FileResponse(path=file_path, media_type=mime_type, filename=filename if attachment else None,
+                        headers=headers)
+
 @router.get("/")
 def read_root():
     return {"message": "Welcome to the FastAPI backend!"}
 
+@router.get("/health")
+def health():
+    """Liveness check; answers as soon as the server is up"""
+    return {"status": "ok"}
+
+@router.get("/ready")
+def ready():
+    """Readiness check; 200 once the model is loaded and warmed up, 503 before that"""
+    readiness = detection_service.readiness()
+    return JSONResponse(status_code=200 if readiness["ready"] else 503, content=readiness)
+
 @router.post("/login")
 def login(request: LoginRequest):
     if detection_service.authenticate_user(request.email, request.password):
@@ -27,6 +261,7 @@ def login(request: LoginRequest):
 
 @router.get("/video_feed")
 def video_feed():
+    require_ready()
     return StreamingResponse(
         detection_service.gen_frames(), 
         media_type='multipart/x-mixed-replace; boundary=frame'
@@ -42,16 +277,72 @@ def stop_camera():
     detection_service.stop_camera()
     return {"status": "camera stopped"}
 
+@router.get("/camera_stats")
+def camera_stats():
+    """Dropped frames and capture-to-alarm latency for the live camera"""
+    return detection_service.get_camera_stats()
+
+@router.get("/alarms")
+def alarm_stats():
+    """Alarm sinks, dedupe and rate-limit counters and the most recent alarms with their latency"""
+    return detection_service.alarms.as_dict()
+
+@router.get("/alarms/events")
+async def alarm_events():
+    """Stream fire and smoke alarms from every stream and the camera as they are dispatched"""
+    sink = detection_service.alarms.sink("sse")
+    if sink is None:
+        raise HTTPException(status_code=404, detail="The sse alarm sink is not enabled")
+    return StreamingResponse(
+        sink.events(config.STREAM_KEEPALIVE_SECONDS),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "Access-Control-Allow-Origin": "*",
+        }
+    )
+
+@router.get("/models")
+def list_models():
+    """List registered models and which ones are loaded"""
+    return {"active": detection_service.models.active, "models": detection_service.models.list()}
+
+@router.post("/models/active")
+async def activate_model(request: ModelActivationRequest):
+    """Hot-swap the active model without interrupting running streams"""
+    resolve_model(request.name)
+    try:
+        return await run_in_threadpool(detection_service.activate_model, request.name)
+    except ModelUnavailableError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
 @router.post("/start_video_processing")
 async def start_video_processing(request: VideoProcessingRequest):
     """Start real-time video processing"""
-    detection_service.start_video_processing(request.video_path)
+    require_ready()
+    try:
+        await run_in_threadpool(
+            detection_service.start_video_processing, request.video_path,
+            inference_stride=request.inference_stride,
+            motion_gate=request.motion_gate,
+            model=resolve_model(request.model) if request.model else None,
+            cascade=request.cascade,
+            tile_size=request.tile_size,
+            tile_overlap=request.tile_overlap,
+            roi=request.roi,
+            decode_width=request.decode_width
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except StreamLimitError as e:
+        raise HTTPException(status_code=429, detail=str(e))
     return {"status": "video processing started", "video_path": request.video_path}
 
 @router.post("/stop_video_processing")
 async def stop_video_processing():
     """Stop real-time video processing"""
-    result = detection_service.stop_video_processing()
+    result = await run_in_threadpool(detection_service.stop_video_processing)
     return result
 
 @router.get("/video_processing_stream")
@@ -67,70 +358,225 @@ async def video_processing_stream():
         }
     )
 
+@router.get("/streams")
+def list_streams():
+    """List video streams known to the stream engine"""
+    return {"streams": detection_service.streams.list()}
+
+@router.post("/streams/{stream_id}/start")
+async def start_stream(stream_id: str, request: VideoProcessingRequest):
+    """Start analysing a video as an independent stream"""
+    require_ready()
+    try:
+        await run_in_threadpool(
+            detection_service.streams.start, stream_id, request.video_path,
+            inference_stride=request.inference_stride,
+            motion_gate=request.motion_gate,
+            model=resolve_model(request.model) if request.model else None,
+            cascade=request.cascade,
+            tile_size=request.tile_size,
+            tile_overlap=request.tile_overlap,
+            roi=request.roi,
+            decode_width=request.decode_width
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except StreamLimitError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return {"status": "video processing started", "stream_id": stream_id, "video_path": request.video_path}
+
+@router.post("/streams/{stream_id}/stop")
+async def stop_stream(stream_id: str):
+    """Stop a stream and return its annotated video"""
+    result = await run_in_threadpool(detection_service.streams.stop, stream_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Stream not found")
+    return result
+
+@router.get("/streams/{stream_id}/events")
+async def stream_events(stream_id: str):
+    """Stream processed frames with detections for one stream"""
+    stream = detection_service.streams.get(stream_id)
+    if stream is None:
+        raise HTTPException(status_code=404, detail="Stream not found")
+    return StreamingResponse(
+        stream.gen_events(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "Access-Control-Allow-Origin": "*",
+        }
+    )
+
+@router.get("/streams/{stream_id}/mjpeg")
+async def stream_mjpeg(stream_id: str):
+    """Stream processed frames as raw JPEG parts (multipart MJPEG) for one stream"""
+    stream = detection_service.streams.get(stream_id)
+    if stream is None:
+        raise HTTPException(status_code=404, detail="Stream not found")
+    return StreamingResponse(
+        stream.gen_mjpeg(),
+        media_type="multipart/x-mixed-replace; boundary=frame",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+@router.get("/streams/{stream_id}/detections")
+async def stream_detections(stream_id: str):
+    """Stream compact detection metadata, without frames, for one stream"""
+    stream = detection_service.streams.get(stream_id)
+    if stream is None:
+        raise HTTPException(status_code=404, detail="Stream not found")
+    return StreamingResponse(
+        stream.gen_detection_events(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "Access-Control-Allow-Origin": "*",
+        }
+    )
+
 @router.get("/download/{filename}")
 async def download_file(filename: str):
     """Download annotated result file"""
-    results_dir = "results"
-    file_path = os.path.join(results_dir, filename)
-    
-    if not os.path.exists(file_path):
-        raise HTTPException(status_code=404, detail="File not found")
-    
-    # Get the MIME type
-    mime_type, _ = mimetypes.guess_type(file_path)
-    if mime_type is None:
-        mime_type = 'application/octet-stream'
-    
-    return FileResponse(
-        path=file_path,
-        media_type=mime_type,
-        filename=filename,
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
-    )
+    return await run_in_threadpool(file_response, filename, True)
 
-@router.post("/predict")
-async def predict(file: UploadFile = File(...)):
-    contents = await file.read()
-    file_ext = os.path.splitext(file.filename)[1]
-    results_dir = "results"
+@router.get("/results/{filename}")
+async def result_file(filename: str):
+    """Serve a result file inline, e.g. for displaying an annotated image"""
+    return await run_in_threadpool(file_response, filename, False)
+
+@router.get("/cache")
+def cache_stats():
+    """Hit and miss counters of the prediction result cache"""
+    return detection_service.result_cache.as_dict()
 
-    # Create a timestamp for unique filenames
-    timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
+@router.get("/storage")
+def storage_stats():
+    """Disk usage and background write counters of the result store"""
+    return detection_service.storage.as_dict()
 
-    # Save original uploaded file with timestamp
-    input_path = os.path.join(results_dir, f"input_{timestamp_str}{file_ext}")
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Per-stage latency histograms, FPS, drops, queue depths and model memory in Prometheus text format"""
+    return PlainTextResponse(detection_service.metrics.render(), media_type="text/plain; version=0.0.4")
+
+@router.post("/predict")
+async def predict(file: UploadFile = File(...), model: Optional[str] = None, autostart: bool = False,
+                  stream_id: str = DEFAULT_STREAM_ID):
+    require_ready()
+    model = resolve_model(model)
+    file_ext = os.path.splitext(file.filename)[1]
 
-    # Save original uploaded file
-    with open(input_path, "wb") as f:
-        f.write(contents)
+    # Timestamped, collision-free names for this request's files
+    result_id = new_result_id()
+    input_name = f"input_{result_id}{file_ext}"
 
     # Handle video vs image separately
-    if file_ext in [".mp4", ".avi", ".mov", ".mkv"]:
-        # For videos, return the path for real-time processing
-        return VideoUploadResponse(
-            type="video_uploaded",
-            video_path=input_path,
-            timestamp=datetime.now().isoformat(),
-            message="Video uploaded successfully. Use start_video_processing to begin real-time analysis."
-        )
+    if file_ext in VIDEO_EXTENSIONS:
+        # Videos are copied to disk in chunks rather than read into memory
+        return await receive_video(upload_file_chunks(file), input_name, model, autostart, stream_id)
     else:
-        # Image processing
-        result = detection_service.process_image(input_path, results_dir)
-        
-        # Save annotated image
-        annotated_path = os.path.join(results_dir, f"annotated_{timestamp_str}{file_ext}")
-        results = detection_service.model(input_path, conf=0.4)
-        results[0].save(filename=annotated_path)
+        contents = await file.read()
+
+        # Resubmitted images are answered from the result cache without touching the model
+        cache_key = await run_in_threadpool(image_cache_key, contents, model)
+        cached = await run_in_threadpool(detection_service.cached_result, cache_key)
+        if cached is not None:
+            return cached_prediction(cached)
+
+        # Image processing (single forward pass, annotation rendered from cached boxes)
+        annotated_name = f"annotated_{result_id}{file_ext}"
+        result = await run_inference_job(predict_image_file, input_name, annotated_name, contents, model, cache_key)
 
         return PredictionResponse(
-            type=result["type"],
-            confidence=result["confidence"],
+            **result.as_dict(),
             timestamp=datetime.now().isoformat(),
             # location="uploaded",
-            preprocess_ms=result["preprocess_ms"],
-            inference_ms=result["inference_ms"],
-            postprocess_ms=result["postprocess_ms"],
-            shape=result["shape"],
-            detections=result["detections"],
-            result_url=f"/results/{os.path.basename(annotated_path)}"
+            result_url=f"/results/{annotated_name}"
         )
+
+
+@router.post("/upload_video")
+async def upload_video(request: Request, filename: str, model: Optional[str] = None, autostart: bool = False,
+                       stream_id: str = DEFAULT_STREAM_ID):
+    """Upload a video as the raw request body, streamed to disk as it arrives
+
+    With autostart, analysis begins once the first chunk of the file is on disk,
+    while the rest is still uploading.
+    """
+    if autostart:
+        require_ready()
+    model = resolve_model(model)
+    file_ext = os.path.splitext(filename)[1]
+    if file_ext not in VIDEO_EXTENSIONS:
+        raise HTTPException(status_code=400, detail=f"Unsupported video type: {filename}")
+
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > config.UPLOAD_MAX_MB * 1024 * 1024:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds the limit of {int(config.UPLOAD_MAX_MB)} MB")
+
+    return await receive_video(request.stream(), f"input_{new_result_id()}{file_ext}", model, autostart, stream_id)
+
+
+@router.post("/predict_batch")
+async def predict_batch(files: List[UploadFile] = File(...), model: Optional[str] = None):
+    """Run detection on several images in batched forward passes"""
+    require_ready()
+    model = resolve_model(model)
+    result_id = new_result_id()
+
+    uploads = []
+    for index, file in enumerate(files):
+        file_ext = os.path.splitext(file.filename)[1]
+        if file_ext in VIDEO_EXTENSIONS:
+            raise HTTPException(status_code=400, detail=f"Videos are not supported in batch prediction: {file.filename}")
+
+        contents = await file.read()
+        input_name = f"input_{result_id}_{index}{file_ext}"
+        annotated_name = f"annotated_{result_id}_{index}{file_ext}"
+        uploads.append((input_name, annotated_name, contents))
+
+    def lookup_cache():
+        keys = [image_cache_key(contents, model) for _, _, contents in uploads]
+        return keys, [detection_service.cached_result(key) for key in keys]
+
+    cache_keys, cached = await run_in_threadpool(lookup_cache)
+    # Only images that miss the cache go to the model
+    misses = [i for i, entry in enumerate(cached) if entry is None]
+
+    def run_batch():
+        storage = detection_service.storage
+        images = []
+        for i in misses:
+            input_name, _, contents = uploads[i]
+            image = decode_upload(contents)
+            if image is None:
+                raise HTTPException(status_code=400, detail=f"Uploaded file is not a readable image: {input_name}")
+            images.append(image)
+            storage.write(input_name, contents)
+        results = detection_service.process_images(images, model)
+        for i, result in zip(misses, results):
+            store_annotated(result, uploads[i][1], cache_keys[i])
+        return results
+
+    results = await run_inference_job(run_batch) if misses else []
+    fresh = dict(zip(misses, results))
+
+    predictions = []
+    for i, (_, annotated_name, _) in enumerate(uploads):
+        if cached[i] is not None:
+            predictions.append(cached_prediction(cached[i]))
+            continue
+        predictions.append(PredictionResponse(
+            **fresh[i].as_dict(),
+            timestamp=datetime.now().isoformat(),
+            result_url=f"/results/{annotated_name}"
+        ))
+
+    return BatchPredictionResponse(
+        type="batch",
+        timestamp=datetime.now().isoformat(),
+        results=predictions
+    )
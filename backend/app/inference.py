@@ -0,0 +1,146 @@
+import numpy as np
+from functools import lru_cache
+from typing import List, Dict, Any, Iterator, Sequence, Tuple
+
+
+@lru_cache(maxsize=256)
+def _matching_class_ids(class_names: Tuple[Tuple[int, str], ...], keywords: Tuple[str, ...],
+                        exact: bool) -> np.ndarray:
+    """Class IDs whose name matches any of the keywords, computed once per model and keyword set"""
+    if exact:
+        ids = [i for i, name in class_names if name.lower() in keywords]
+    else:
+        ids = [i for i, name in class_names if any(k in name.lower() for k in keywords)]
+    return np.array(ids, dtype=np.int32)
+
+
+class Detections:
+    """Array-backed detections for one image or frame
+
+    Boxes, confidences and integer class IDs come out of a YOLO result in a
+    single device-to-host transfer and stay as NumPy arrays; class names are only
+    looked up when detections are turned into JSON at the API boundary.
+    """
+
+    __slots__ = ("xyxy", "confidence", "class_id", "names")
+
+    def __init__(self, xyxy: np.ndarray, confidence: np.ndarray, class_id: np.ndarray, names: Dict[int, str]):
+        self.xyxy = xyxy
+        self.confidence = confidence
+        self.class_id = class_id
+        self.names = names
+
+    @classmethod
+    def from_result(cls, result, names: Dict[int, str] = None) -> "Detections":
+        """Pull every box out of an ultralytics result with one .cpu().numpy() call"""
+        data = result.boxes.data.cpu().numpy()
+        # Columns are x1, y1, x2, y2, [track id,] confidence, class
+        return cls(data[:, :4].astype(np.float32), data[:, -2].astype(np.float32), data[:, -1].astype(np.int32),
+                   names if names is not None else result.names)
+
+    @classmethod
+    def empty(cls, names: Dict[int, str] = None) -> "Detections":
+        return cls(np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int32),
+                   names or {})
+
+    def __len__(self) -> int:
+        return len(self.class_id)
+
+    def __getitem__(self, index) -> "Detections":
+        return Detections(self.xyxy[index], self.confidence[index], self.class_id[index], self.names)
+
+    def class_mask(self, *keywords: str, exact: bool = False) -> np.ndarray:
+        """Boolean mask of detections whose lower-cased class name contains (or, if exact, equals) a keyword"""
+        ids = _matching_class_ids(tuple(sorted(self.names.items())), keywords, exact)
+        return np.isin(self.class_id, ids)
+
+    def has(self, *keywords: str, exact: bool = False, min_confidence: float = 0.0) -> bool:
+        mask = self.class_mask(*keywords, exact=exact)
+        if min_confidence > 0.0:
+            mask &= self.confidence >= min_confidence
+        return bool(mask.any())
+
+    def max_confidence(self, *keywords: str, exact: bool = False) -> float:
+        mask = self.class_mask(*keywords, exact=exact)
+        return float(self.confidence[mask].max()) if mask.any() else 0.0
+
+    def boxes(self) -> Iterator[Tuple[Sequence[int], str, float]]:
+        """Yield (x1, y1, x2, y2), class name, confidence per detection for drawing"""
+        for box, class_id, confidence in zip(self.xyxy.astype(np.int32).tolist(), self.class_id.tolist(),
+                                             self.confidence.tolist()):
+            yield box, self.names.get(class_id, str(class_id)), confidence
+
+    def to_list(self, include_bbox: bool = True) -> List[Dict]:
+        """JSON-ready list of {"class", "confidence"[, "bbox"]} dicts"""
+        names = [self.names.get(i, str(i)) for i in self.class_id.tolist()]
+        confidences = self.confidence.tolist()
+        if not include_bbox:
+            return [{"class": n, "confidence": c} for n, c in zip(names, confidences)]
+        return [{"class": n, "confidence": c, "bbox": b} for n, c, b in zip(names, confidences, self.xyxy.tolist())]
+
+    def compact(self) -> List[List]:
+        """[class, confidence, x1, y1, x2, y2] rows for the wire"""
+        names = [self.names.get(i, str(i)) for i in self.class_id.tolist()]
+        confidences = [round(c, 3) for c in self.confidence.tolist()]
+        return [[n, c] + b for n, c, b in zip(names, confidences, self.xyxy.astype(np.int32).tolist())]
+
+
+def summarize_detections(detections: Detections) -> Tuple[str, float]:
+    """Reduce detections to an overall result type and confidence"""
+    fire = detections.has("fire", exact=True)
+    smoke = detections.has("smoke", exact=True)
+
+    if fire and smoke:
+        result_type = "fire_and_smoke"
+        confidence = detections.max_confidence("fire", "smoke", exact=True)
+    elif fire:
+        result_type = "fire"
+        confidence = detections.max_confidence("fire", exact=True)
+    elif smoke:
+        result_type = "smoke"
+        confidence = detections.max_confidence("smoke", exact=True)
+    else:
+        result_type = "clear"
+        confidence = 0.0
+
+    return result_type, confidence
+
+
+class InferenceResult:
+    """Detections, speeds and annotation renderer for a single YOLO forward pass"""
+
+    def __init__(self, result, names: Dict[int, str], queue_ms: float = 0.0, model: str = None):
+        # Keep the raw ultralytics result so the annotated image can be
+        # rendered later from the cached boxes without running the model again
+        self._result = result
+
+        self.detections = Detections.from_result(result, names)
+
+        # Speeds
+        yolo_speeds = result.speed
+        self.preprocess_ms = round(yolo_speeds['preprocess'], 1)
+        self.inference_ms = round(yolo_speeds['inference'], 1)
+        self.postprocess_ms = round(yolo_speeds['postprocess'], 1)
+        self.queue_ms = queue_ms
+        self.model = model
+
+        self.shape = list(result.orig_shape)
+        self.type, self.confidence = summarize_detections(self.detections)
+
+    def annotate(self, renderer) -> np.ndarray:
+        """Draw the detections onto a copy of the source image with renderer"""
+        return renderer.render(self._result.orig_img, self.detections)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the detection summary in the shape used by PredictionResponse"""
+        return {
+            "type": self.type,
+            "confidence": self.confidence,
+            "preprocess_ms": self.preprocess_ms,
+            "inference_ms": self.inference_ms,
+            "postprocess_ms": self.postprocess_ms,
+            "queue_ms": self.queue_ms,
+            "shape": self.shape,
+            "detections": self.detections.to_list(include_bbox=False),
+            "model": self.model
+        }
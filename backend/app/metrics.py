@@ -0,0 +1,146 @@
+import time
+import bisect
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+# Upper bounds in seconds, from sub-millisecond stages up to multi-second stalls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Pipeline stages timed for every stream, camera and image request
+STAGES = ("decode", "queue_wait", "inference", "alarm", "annotate", "encode", "live_encode")
+
+METRIC_PREFIX = "safds_"
+
+# (name, type, help, labels, value) as yielded by collectors
+Sample = Tuple[str, str, str, Dict[str, str], float]
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") for v in labels.values())
+    return "{" + ",".join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative latency histogram with fixed buckets, safe to observe from any thread"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += seconds
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        """Cumulative bucket counts (the last one is +Inf), sum and count"""
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+        cumulative, running = [], 0
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return cumulative, total, running
+
+
+class RateMeter:
+    """Events per second over a sliding window, e.g. processed frames per second"""
+
+    def __init__(self, window_seconds: float = 5.0, max_events: int = 1024):
+        self.window_seconds = window_seconds
+        self._events = deque(maxlen=max_events)
+
+    def mark(self):
+        self._events.append(time.monotonic())
+
+    def rate(self) -> float:
+        cutoff = time.monotonic() - self.window_seconds
+        recent = [t for t in list(self._events) if t >= cutoff]
+        if len(recent) < 2:
+            return 0.0
+        return (len(recent) - 1) / max(recent[-1] - recent[0], 1e-9)
+
+
+class MetricsRegistry:
+    """Histograms recorded as work happens plus gauges gathered from collectors at scrape time,
+    rendered in the Prometheus text exposition format"""
+
+    def __init__(self, prefix: str = METRIC_PREFIX):
+        self.prefix = prefix
+        # name -> (help, {sorted label items: Histogram})
+        self._histograms: Dict[str, Tuple[str, Dict[Tuple, Histogram]]] = {}
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, help: str, **labels: str) -> Histogram:
+        """Return the histogram for name and labels, creating it on first use"""
+        key = tuple(labels.items())
+        with self._lock:
+            _, series = self._histograms.setdefault(name, (help, {}))
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            return histogram
+
+    def stage_latency(self, stream: str) -> Dict[str, Histogram]:
+        """Per-stage latency histograms for one stream, looked up once and kept by the caller"""
+        return {
+            stage: self.histogram("stage_latency_seconds", "Latency of each processing stage per stream",
+                                  stream=stream, stage=stage)
+            for stage in STAGES
+        }
+
+    def register_collector(self, collector: Callable[[], Iterable[Sample]]):
+        """Add a callable that yields (name, type, help, labels, value) samples on every scrape"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            histograms = [(name, help, list(series.items())) for name, (help, series) in self._histograms.items()]
+        for name, help, series in histograms:
+            full_name = self.prefix + name
+            lines.append(f"# HELP {full_name} {help}")
+            lines.append(f"# TYPE {full_name} histogram")
+            for key, histogram in series:
+                labels = dict(key)
+                cumulative, total, count = histogram.snapshot()
+                for bound, bucket_count in zip(histogram.buckets + (float("inf"),), cumulative):
+                    bucket_labels = _format_labels({**labels, "le": _format_value(bound)})
+                    lines.append(f"{full_name}_bucket{bucket_labels} {bucket_count}")
+                lines.append(f"{full_name}_sum{_format_labels(labels)} {_format_value(total)}")
+                lines.append(f"{full_name}_count{_format_labels(labels)} {count}")
+
+        # Samples of one metric may come from several collectors but are written as one group
+        grouped: Dict[str, Tuple[str, str, List]] = {}
+        for collector in list(self._collectors):
+            try:
+                samples = list(collector())
+            except Exception as e:
+                print(f"Metrics collector failed: {e}")
+                continue
+            for name, kind, help, labels, value in samples:
+                grouped.setdefault(name, (kind, help, []))[2].append((labels, value))
+        for name, (kind, help, samples) in grouped.items():
+            full_name = self.prefix + name
+            lines.append(f"# HELP {full_name} {help}")
+            lines.append(f"# TYPE {full_name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{full_name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {name: len(series) for name, (_, series) in self._histograms.items()}
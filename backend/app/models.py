@@ -1,4 +1,9 @@
-from pydantic import BaseModel
+from typing import Annotated, List, Optional, Tuple
+from pydantic import BaseModel, Field
+
+# A coordinate normalised to the frame size, and an ROI polygon of at least three such points
+Normalised = Annotated[float, Field(ge=0.0, le=1.0)]
+RoiPolygon = Annotated[List[Tuple[Normalised, Normalised]], Field(min_length=3)]
 
 
 class LoginRequest(BaseModel):
@@ -8,6 +13,21 @@ class LoginRequest(BaseModel):
 
 class VideoProcessingRequest(BaseModel):
     video_path: str
+    inference_stride: int = None
+    motion_gate: bool = None
+    model: str = None
+    cascade: str = None
+    # Sliced inference: tile size in pixels, tile overlap fraction and ROI
+    # polygons as lists of normalised [x, y] points
+    tile_size: int = None
+    tile_overlap: float = None
+    roi: Optional[List[RoiPolygon]] = None
+    # Downscale frames to this width while decoding
+    decode_width: int = None
+
+
+class ModelActivationRequest(BaseModel):
+    name: str
 
 
 class DetectionResponse(BaseModel):
@@ -21,6 +41,11 @@ class VideoUploadResponse(BaseModel):
     video_path: str = None
     timestamp: str
     message: str = None
+    size: int = None
+    sha256: str = None
+    stream_id: str = None
+    annotated_video_url: str = None
+    cached: bool = False
 
 
 class PredictionResponse(BaseModel):
@@ -31,9 +56,18 @@ class PredictionResponse(BaseModel):
     preprocess_ms: float
     inference_ms: float
     postprocess_ms: float
+    queue_ms: float = 0.0
     shape: list
     detections: list
+    model: str = None
     result_url: str = None
+    cached: bool = False
+
+
+class BatchPredictionResponse(BaseModel):
+    type: str
+    timestamp: str
+    results: list
 
 
 class StatusResponse(BaseModel):
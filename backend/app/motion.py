@@ -0,0 +1,83 @@
+import cv2
+from typing import Any, Dict, Tuple
+from .inference import Detections
+
+
+class MotionGate:
+    """Cheap change detector using frame differencing on a downscaled grayscale image"""
+
+    def __init__(self, size: Tuple[int, int] = (64, 36), pixel_threshold: int = 25,
+                 changed_fraction: float = 0.01):
+        self.size = size
+        self.pixel_threshold = pixel_threshold
+        self.changed_fraction = changed_fraction
+        self._reference = None
+
+    def _thumbnail(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        small = cv2.resize(gray, self.size, interpolation=cv2.INTER_AREA)
+        return cv2.GaussianBlur(small, (3, 3), 0)
+
+    def changed(self, frame) -> bool:
+        """Return True if the frame differs noticeably from the reference frame"""
+        if self._reference is None:
+            return True
+        diff = cv2.absdiff(self._thumbnail(frame), self._reference)
+        _, mask = cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)
+        fraction = cv2.countNonZero(mask) / float(self.size[0] * self.size[1])
+        return fraction >= self.changed_fraction
+
+    def update(self, frame):
+        """Make frame the reference the next frames are compared against"""
+        self._reference = self._thumbnail(frame)
+
+
+class AdaptiveStride:
+    """Decide per frame whether to run inference or reuse the previous detections"""
+
+    def __init__(self, stride: int = 1, motion_gate: bool = False, escalate_confidence: float = 0.25,
+                 max_skip: int = 30):
+        self.stride = max(1, stride)
+        self.gate = MotionGate() if motion_gate else None
+        self.escalate_confidence = escalate_confidence
+        # Upper bound on consecutive skipped frames so a static scene is still re-checked
+        self.max_skip = max(self.stride, max_skip)
+        self.frames_since_inference = None
+
+        self.frames_inferred = 0
+        self.skipped_stride = 0
+        self.skipped_static = 0
+
+    def _escalated(self, previous_detections: Detections) -> bool:
+        """Fire or smoke seen in the last result switches to every-frame inference"""
+        return previous_detections.has("fire", "smoke", min_confidence=self.escalate_confidence)
+
+    def should_infer(self, frame, previous_detections: Detections) -> bool:
+        if self.frames_since_inference is None or self._escalated(previous_detections):
+            return self._infer(frame)
+
+        self.frames_since_inference += 1
+        if self.frames_since_inference < self.stride:
+            self.skipped_stride += 1
+            return False
+        if (self.gate is not None and self.frames_since_inference < self.max_skip
+                and not self.gate.changed(frame)):
+            self.skipped_static += 1
+            return False
+        return self._infer(frame)
+
+    def _infer(self, frame) -> bool:
+        self.frames_since_inference = 0
+        self.frames_inferred += 1
+        if self.gate is not None:
+            self.gate.update(frame)
+        return True
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "stride": self.stride,
+            "motion_gate": self.gate is not None,
+            "frames_inferred": self.frames_inferred,
+            "skipped_stride": self.skipped_stride,
+            "skipped_static": self.skipped_static,
+        }
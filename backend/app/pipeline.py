@@ -0,0 +1,118 @@
+import time
+import queue
+import threading
+from typing import Any, Callable, Dict, Optional
+
+# Marks the end of the stream as it travels through the stages
+END_OF_STREAM = object()
+
+
+def put_until_stopped(q: queue.Queue, item: Any, stop_event: threading.Event, timeout: float = 0.1) -> bool:
+    """Block on a bounded queue (backpressure) but give up once the stop event is set"""
+    while not stop_event.is_set():
+        try:
+            q.put(item, timeout=timeout)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def get_until_stopped(q: queue.Queue, stop_event: threading.Event, timeout: float = 0.1) -> Any:
+    """Block on a queue but return END_OF_STREAM once the stop event is set"""
+    while not stop_event.is_set():
+        try:
+            return q.get(timeout=timeout)
+        except queue.Empty:
+            continue
+    return END_OF_STREAM
+
+
+def offer_latest(q: queue.Queue, item: Any) -> int:
+    """Put an item without blocking, discarding the oldest queued items when full; returns the number dropped"""
+    dropped = 0
+    while True:
+        try:
+            q.put_nowait(item)
+            return dropped
+        except queue.Full:
+            try:
+                q.get_nowait()
+                dropped += 1
+            except queue.Empty:
+                pass
+
+
+class StageStats:
+    """Throughput and occupancy counters for one pipeline stage"""
+
+    def __init__(self, name: str, input_queue: Optional[queue.Queue] = None):
+        self.name = name
+        self.input_queue = input_queue
+        self.processed = 0
+        self.dropped = 0
+        self.busy_seconds = 0.0
+        self.started_at = time.perf_counter()
+
+    def record(self, busy_seconds: float):
+        self.processed += 1
+        self.busy_seconds += busy_seconds
+
+    def as_dict(self) -> Dict[str, Any]:
+        elapsed = max(time.perf_counter() - self.started_at, 1e-9)
+        stats = {
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "busy_ms": round(self.busy_seconds * 1000.0, 1),
+            # Fraction of wall time the stage spent working rather than waiting
+            "utilisation": round(min(self.busy_seconds / elapsed, 1.0), 3),
+        }
+        if self.input_queue is not None:
+            stats["queue_depth"] = self.input_queue.qsize()
+            stats["queue_capacity"] = self.input_queue.maxsize
+        return stats
+
+
+class PipelineStage:
+    """Worker thread that applies fn to items from an input queue and forwards the results"""
+
+    def __init__(self, name: str, fn: Callable[[Any], Any], input_queue: queue.Queue,
+                 output_queue: Optional[queue.Queue], stop_event: threading.Event):
+        self.name = name
+        self.fn = fn
+        self.input_queue = input_queue
+        self.output_queue = output_queue
+        self.stop_event = stop_event
+        self.stats = StageStats(name, input_queue)
+        self.error = None
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def join(self, timeout: Optional[float] = None):
+        self.thread.join(timeout=timeout)
+
+    def _forward(self, item: Any):
+        if self.output_queue is not None:
+            put_until_stopped(self.output_queue, item, self.stop_event)
+
+    def _run(self):
+        try:
+            while True:
+                item = get_until_stopped(self.input_queue, self.stop_event)
+                if item is END_OF_STREAM:
+                    break
+
+                started = time.perf_counter()
+                output = self.fn(item)
+                self.stats.record(time.perf_counter() - started)
+
+                if output is not None:
+                    self._forward(output)
+        except Exception as e:
+            print(f"Pipeline stage {self.name} failed: {e}")
+            self.error = e
+            self.stop_event.set()
+        finally:
+            self._forward(END_OF_STREAM)
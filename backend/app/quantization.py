@@ -0,0 +1,272 @@
+"""
+INT8 post-training quantization of the fire/smoke model.
+
+Calibrates ONNX Runtime static quantization on a folder of representative
+frames, writes an INT8 model that DetectionService loads with
+SAFDS_BACKEND=onnx_int8, and reports accuracy and speed against FP32. Models
+are cached per weights, input size and calibration frames; the service loads
+the most recent one matching its weights and SAFDS_INFERENCE_IMGSZ.
+
+Usage (from the backend directory):
+    python -m app.quantization --weights YOLOv11m_best.pt --calibration results
+        [--pattern "input_*.jpg"] [--imgsz 640] [--eval held_out_dir] [--data dataset.yaml]
+        [--output report.json]
+"""
+
+import os
+import glob
+import json
+import hashlib
+import time
+import argparse
+import cv2
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+from .backends import cached_artifact_path, export_model, file_sha256
+
+
+def letterbox(image, size: int = 640):
+    """Resize with unchanged aspect ratio and pad to a square, matching ultralytics preprocessing"""
+    height, width = image.shape[:2]
+    scale = min(size / height, size / width)
+    new_width, new_height = int(round(width * scale)), int(round(height * scale))
+    resized = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+
+    padded = np.full((size, size, 3), 114, dtype=np.uint8)
+    top = (size - new_height) // 2
+    left = (size - new_width) // 2
+    padded[top:top + new_height, left:left + new_width] = resized
+
+    # BGR HWC uint8 -> RGB NCHW float32 in [0, 1]
+    blob = padded[:, :, ::-1].transpose(2, 0, 1)[None].astype(np.float32) / 255.0
+    return np.ascontiguousarray(blob)
+
+
+def calibration_images(calibration_dir: str, pattern: str = "input_*.jpg", max_images: int = 200) -> List[str]:
+    images = sorted(glob.glob(os.path.join(calibration_dir, pattern)))[:max_images]
+    if not images:
+        raise FileNotFoundError(f"No calibration images matching {pattern} in {calibration_dir}")
+    return images
+
+
+def calibration_key(image_paths: List[str]) -> str:
+    """Short hash of the calibration frames, so INT8 models calibrated on other frames are kept apart"""
+    digest = hashlib.sha256()
+    for path in image_paths:
+        digest.update(f"{os.path.basename(path)}:{file_sha256(path)}\n".encode("utf-8"))
+    return digest.hexdigest()[:8]
+
+
+def make_calibration_reader(image_paths: List[str], input_name: str, imgsz: int = 640):
+    """Build an ONNX Runtime CalibrationDataReader over a list of image files"""
+    from onnxruntime.quantization import CalibrationDataReader
+
+    class ImageFolderReader(CalibrationDataReader):
+        def __init__(self):
+            self._paths = iter(image_paths)
+
+        def get_next(self):
+            for path in self._paths:
+                image = cv2.imread(path)
+                if image is not None:
+                    return {input_name: letterbox(image, imgsz)}
+            return None
+
+        def rewind(self):
+            self._paths = iter(image_paths)
+
+    return ImageFolderReader()
+
+
+def quantize_model(weights_path: str, image_paths: List[str], imgsz: int = 640) -> str:
+    """Quantize the model's ONNX export to INT8 (QDQ) and return the cached INT8 path"""
+    import onnx
+    import onnxruntime as ort
+    from onnxruntime.quantization import CalibrationMethod, QuantFormat, QuantType, quantize_static
+
+    fp32_path = export_model(weights_path, "onnx", imgsz=imgsz)
+    int8_path = cached_artifact_path(weights_path, "onnx_int8", file_sha256(weights_path), imgsz,
+                                     calibration_key(image_paths))
+
+    # Shape inference and graph cleanup give the quantizer a better graph to work with
+    prepared_path = f"{os.path.splitext(int8_path)[0]}.prep.onnx"
+    try:
+        from onnxruntime.quantization.shape_inference import quant_pre_process
+        quant_pre_process(fp32_path, prepared_path)
+    except Exception as e:
+        print(f"Warning: pre-processing skipped: {e}")
+        prepared_path = fp32_path
+
+    input_name = ort.InferenceSession(fp32_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+    print(f"Calibrating on {len(image_paths)} images...")
+    quantize_static(
+        prepared_path,
+        int8_path,
+        make_calibration_reader(image_paths, input_name, imgsz),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+        calibrate_method=CalibrationMethod.MinMax,
+    )
+    if prepared_path != fp32_path and os.path.exists(prepared_path):
+        os.remove(prepared_path)
+
+    # ultralytics reads class names and stride from the model metadata
+    fp32_model = onnx.load(fp32_path)
+    int8_model = onnx.load(int8_path)
+    del int8_model.metadata_props[:]
+    int8_model.metadata_props.extend(fp32_model.metadata_props)
+    onnx.save(int8_model, int8_path)
+
+    print(f"INT8 model saved to: {int8_path}")
+    return int8_path
+
+
+def box_iou(box: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+    """IoU between one xyxy box and an (N, 4) array of xyxy boxes"""
+    x1 = np.maximum(box[0], boxes[:, 0])
+    y1 = np.maximum(box[1], boxes[:, 1])
+    x2 = np.minimum(box[2], boxes[:, 2])
+    y2 = np.minimum(box[3], boxes[:, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return intersection / np.maximum(area + areas - intersection, 1e-9)
+
+
+def average_precision(predictions: List[Dict], references: List[Dict], class_id: int,
+                      iou_threshold: float = 0.5) -> Optional[float]:
+    """All-point interpolated AP for one class; predictions and references are per-image box arrays"""
+    scored = []
+    total_references = 0
+    for prediction, reference in zip(predictions, references):
+        reference_boxes = reference["xyxy"][reference["cls"] == class_id]
+        total_references += len(reference_boxes)
+        matched = np.zeros(len(reference_boxes), dtype=bool)
+
+        mask = prediction["cls"] == class_id
+        order = np.argsort(-prediction["conf"][mask])
+        for box, conf in zip(prediction["xyxy"][mask][order], prediction["conf"][mask][order]):
+            hit = False
+            if len(reference_boxes):
+                ious = box_iou(box, reference_boxes)
+                best = int(np.argmax(ious))
+                if ious[best] >= iou_threshold and not matched[best]:
+                    matched[best] = True
+                    hit = True
+            scored.append((conf, hit))
+
+    if total_references == 0:
+        return None
+    if not scored:
+        return 0.0
+
+    scored.sort(key=lambda item: -item[0])
+    hits = np.array([hit for _, hit in scored], dtype=np.float64)
+    true_positives = np.cumsum(hits)
+    false_positives = np.cumsum(1.0 - hits)
+    recall = true_positives / total_references
+    precision = true_positives / np.maximum(true_positives + false_positives, 1e-9)
+
+    recall = np.concatenate(([0.0], recall, [1.0]))
+    precision = np.concatenate(([1.0], precision, [0.0]))
+    precision = np.flip(np.maximum.accumulate(np.flip(precision)))
+    changes = np.where(recall[1:] != recall[:-1])[0]
+    return float(np.sum((recall[changes + 1] - recall[changes]) * precision[changes + 1]))
+
+
+def predict_boxes(model, image_paths: List[str], conf: float = 0.25, imgsz: int = 640):
+    """Run a model over images, returning per-image box arrays and per-image latency in ms"""
+    boxes, latencies = [], []
+    model(image_paths[0], conf=conf, imgsz=imgsz, verbose=False)  # warm-up
+    for path in image_paths:
+        started = time.perf_counter()
+        result = model(path, conf=conf, imgsz=imgsz, verbose=False)[0]
+        latencies.append((time.perf_counter() - started) * 1000.0)
+        data = result.boxes.data.cpu().numpy()
+        boxes.append({"xyxy": data[:, :4], "conf": data[:, 4], "cls": data[:, 5].astype(int)})
+    return boxes, latencies
+
+
+def evaluate(weights_path: str, int8_path: str, image_paths: List[str], data: Optional[str] = None,
+             imgsz: int = 640) -> Dict[str, Any]:
+    """Compare the INT8 model with the FP32 ONNX model on accuracy and latency"""
+    from ultralytics import YOLO
+
+    fp32_path = export_model(weights_path, "onnx", imgsz=imgsz)
+    fp32_model = YOLO(fp32_path, task="detect")
+    int8_model = YOLO(int8_path, task="detect")
+
+    fp32_boxes, fp32_latencies = predict_boxes(fp32_model, image_paths, imgsz=imgsz)
+    int8_boxes, int8_latencies = predict_boxes(int8_model, image_paths, imgsz=imgsz)
+    fp32_ms = sum(fp32_latencies) / len(fp32_latencies)
+    int8_ms = sum(int8_latencies) / len(int8_latencies)
+
+    report = {
+        "fp32_model": fp32_path,
+        "int8_model": int8_path,
+        "images": len(image_paths),
+        "fp32_latency_ms": round(fp32_ms, 2),
+        "int8_latency_ms": round(int8_ms, 2),
+        "speedup": round(fp32_ms / max(int8_ms, 1e-9), 2),
+        "size_mb": {
+            "fp32": round(os.path.getsize(fp32_path) / 1e6, 1),
+            "int8": round(os.path.getsize(int8_path) / 1e6, 1),
+        },
+    }
+
+    if data:
+        # Labelled validation set: true mAP for both precisions
+        fp32_metrics = fp32_model.val(data=data, imgsz=imgsz, verbose=False).box
+        int8_metrics = int8_model.val(data=data, imgsz=imgsz, verbose=False).box
+        report["accuracy_source"] = data
+        report["fp32_map50"] = round(float(fp32_metrics.map50), 4)
+        report["int8_map50"] = round(float(int8_metrics.map50), 4)
+        report["map50_delta"] = round(report["int8_map50"] - report["fp32_map50"], 4)
+        report["fp32_map50_95"] = round(float(fp32_metrics.map), 4)
+        report["int8_map50_95"] = round(float(int8_metrics.map), 4)
+        report["map50_95_delta"] = round(report["int8_map50_95"] - report["fp32_map50_95"], 4)
+    else:
+        # No labels: score INT8 against the FP32 predictions as pseudo ground truth.
+        # This measures agreement, not accuracy, so no mAP delta is reported
+        per_class = {}
+        for class_id, name in fp32_model.names.items():
+            ap = average_precision(int8_boxes, fp32_boxes, class_id)
+            if ap is not None:
+                per_class[name] = round(ap, 4)
+        report["accuracy_source"] = "fp32 predictions (pseudo labels)"
+        report["agreement_ap50_per_class"] = per_class
+        report["agreement_map50"] = round(sum(per_class.values()) / len(per_class), 4) if per_class else None
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--weights", default="YOLOv11m_best.pt")
+    parser.add_argument("--calibration", default="results", help="Folder of representative frames")
+    parser.add_argument("--pattern", default="input_*.jpg")
+    parser.add_argument("--max-images", type=int, default=200)
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--eval", default=None,
+                        help="Folder of held-out frames for the comparison (defaults to the calibration images)")
+    parser.add_argument("--data", default=None, help="Optional labelled dataset YAML for true mAP")
+    parser.add_argument("--output", default=None, help="Write the comparison report to this JSON file")
+    args = parser.parse_args()
+
+    image_paths = calibration_images(args.calibration, args.pattern, args.max_images)
+    int8_path = quantize_model(args.weights, image_paths, args.imgsz)
+    eval_paths = calibration_images(args.eval, args.pattern, args.max_images) if args.eval else image_paths
+    report = evaluate(args.weights, int8_path, eval_paths, args.data, args.imgsz)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+from .backends import load_model, select_device
+
+
+class UnknownModelError(KeyError):
+    """Raised when a request names a model that is not registered"""
+
+
+class ModelUnavailableError(RuntimeError):
+    """Raised when a registered model's weights are missing or fail to load"""
+
+
+class ModelWeightsMissingError(ModelUnavailableError):
+    """Raised when a registered model's weights do not exist on disk"""
+
+
+class LoadedModel:
+    """A loaded model with its own predictor lock and memory estimate"""
+
+    def __init__(self, name: str, model: Any, artifact: str, size_mb: float, load_ms: float):
+        self.name = name
+        self.model = model
+        self.artifact = artifact
+        self.size_mb = size_mb
+        self.load_ms = load_ms
+        # The ultralytics predictor is not thread-safe, so forward passes on one model are serialised
+        self.lock = threading.Lock()
+
+    @property
+    def names(self) -> Dict[int, str]:
+        return self.model.names
+
+
+def artifact_size_mb(path: str) -> float:
+    """On-disk size of a model file or exported model directory, used as its memory estimate"""
+    if os.path.isdir(path):
+        total = 0
+        for root, _, files in os.walk(path):
+            total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+    else:
+        total = os.path.getsize(path)
+    return total / (1024 * 1024)
+
+
+class ModelRegistry:
+    """Lazily loaded models kept in an LRU under a memory budget, with an atomically swappable active model"""
+
+    def __init__(self, model_paths: Dict[str, str], active: str, backend: str = "pytorch", device: Optional[str] = None,
+                 memory_budget_mb: float = 2048, loader: Callable = load_model):
+        if active not in model_paths:
+            raise UnknownModelError(active)
+        self.model_paths = dict(model_paths)
+        self.backend = backend
+        self.device = device
+        self.memory_budget_mb = memory_budget_mb
+        self.loader = loader
+
+        self._active = active
+        self._loaded: "OrderedDict[str, LoadedModel]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks = {name: threading.Lock() for name in model_paths}
+
+        for name, path in self.model_paths.items():
+            if not os.path.exists(path):
+                print(f"Warning: weights for model {name} not found at {path}; it cannot be used until they exist")
+
+    @property
+    def active(self) -> str:
+        return self._active
+
+    def resolve(self, name: Optional[str] = None) -> str:
+        """Return the registered model name to use, defaulting to the active model"""
+        name = name or self._active
+        if name not in self.model_paths:
+            raise UnknownModelError(name)
+        return name
+
+    def available(self, name: str) -> bool:
+        """Whether a registered model is loaded or its weights exist on disk"""
+        return name in self._loaded or os.path.exists(self.model_paths[name])
+
+    def check_available(self, name: Optional[str] = None) -> str:
+        """Resolve a model name, raising ModelUnavailableError if its weights are missing"""
+        name = self.resolve(name)
+        if not self.available(name):
+            raise ModelWeightsMissingError(f"Weights for model {name} not found at {self.model_paths[name]}")
+        return name
+
+    def get(self, name: Optional[str] = None) -> LoadedModel:
+        """Return a loaded model, loading it on first use and evicting least recently used models"""
+        name = self.resolve(name)
+        with self._lock:
+            loaded = self._loaded.get(name)
+            if loaded is not None:
+                self._loaded.move_to_end(name)
+                return loaded
+
+        # Load outside the registry lock so other models stay usable meanwhile
+        with self._load_locks[name]:
+            with self._lock:
+                loaded = self._loaded.get(name)
+            if loaded is None:
+                loaded = self._load(name)
+                with self._lock:
+                    self._loaded[name] = loaded
+                    self._evict(keep=name)
+        return loaded
+
+    def _load(self, name: str) -> LoadedModel:
+        if self.device is None:
+            self.device = select_device()
+        print(f"Loading model {name} from {self.model_paths[name]} ({self.backend} backend, {self.device})")
+        self.check_available(name)
+        started = time.perf_counter()
+        try:
+            model, artifact = self.loader(self.model_paths[name], self.backend, self.device)
+        except Exception as e:
+            raise ModelUnavailableError(f"Unable to load model {name}: {e}") from e
+        load_ms = (time.perf_counter() - started) * 1000.0
+        return LoadedModel(name, model, artifact, artifact_size_mb(artifact), load_ms)
+
+    def _evict(self, keep: str):
+        """Drop least recently used models until the budget is met; the active and just-loaded models stay"""
+        while sum(m.size_mb for m in self._loaded.values()) > self.memory_budget_mb:
+            victim = next((n for n in self._loaded if n not in (self._active, keep)), None)
+            if victim is None:
+                break
+            # In-flight work keeps its own reference, so it finishes on the evicted model
+            self._loaded.pop(victim)
+            print(f"Evicted model {victim} to stay under {self.memory_budget_mb} MB")
+
+    def activate(self, name: str) -> LoadedModel:
+        """Load a model and then atomically make it the active one"""
+        loaded = self.get(name)
+        with self._lock:
+            self._active = loaded.name
+            self._loaded.move_to_end(loaded.name)
+        print(f"Active model is now {loaded.name}")
+        return loaded
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            loaded = dict(self._loaded)
+        models = []
+        for name, path in self.model_paths.items():
+            info = {"name": name, "path": path, "active": name == self._active, "loaded": name in loaded,
+                    "available": name in loaded or os.path.exists(path)}
+            if name in loaded:
+                info["artifact"] = loaded[name].artifact
+                info["size_mb"] = round(loaded[name].size_mb, 1)
+                info["load_ms"] = round(loaded[name].load_ms, 1)
+            models.append(info)
+        return models
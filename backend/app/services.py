@@ -1,44 +1,99 @@
 import cv2
-import torch
+import sys
 import time
 import os
 import threading
-import base64
-import json
-import pygame
-from datetime import datetime
-from collections import deque
-from ultralytics import YOLO
-from typing import List, Dict, Any, Optional
+import numpy as np
+from functools import partial
+from collections import OrderedDict, deque
+from typing import List, Dict, Any, Iterator, Optional
+from .inference import InferenceResult, Detections
+from .registry import ModelRegistry, ModelWeightsMissingError
+from .backends import load_model
+from .batching import MicroBatcher
+from .streams import StreamRegistry, DEFAULT_STREAM_ID
+from .camera import LatestFrameCapture, LiveStats
+from .cascade import build_cascade
+from .tiling import Tiler
+from .annotate import AnnotationRenderer
+from .metrics import MetricsRegistry, RateMeter, Sample
+from .storage import ResultStore
+from .alarms import AlarmDispatcher, build_alarm_sinks
+from .cache import CachedResult, ResultCache
+from . import config
 
 
 class DetectionService:
-    def __init__(self, model_path: str = "YOLOv11m_best.pt"):
-        self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
-        print(f"Using device: {self.device}")
-        self.model = YOLO(model_path)
-        self.model.to(self.device)
-        print(f"Model loaded on device: {self.model.device}")
+    def __init__(self, model_paths: Dict[str, str] = None, active_model: str = config.ACTIVE_MODEL,
+                 backend: str = config.INFERENCE_BACKEND):
+        self.backend = backend
+        # Models are loaded lazily; warm_up loads the active one in the background
+        # so the server can bind and answer health checks straight away
+        self.models = ModelRegistry(
+            model_paths or config.MODELS,
+            active=active_model,
+            backend=backend,
+            memory_budget_mb=config.MODEL_MEMORY_BUDGET_MB,
+            # Exports are made at the size the detector is called with
+            loader=partial(load_model, imgsz=config.INFERENCE_IMGSZ)
+        )
+        self.ready = threading.Event()
+        self.warm_up_error = None
+        self.warm_up_attempts = 0
+        # Set once warm-up has given up; the service then stays unready
+        self.warm_up_failed = False
+        self.warm_up_thread = None
+        self.startup_timings = {}
+        
+        # Image predictions and video frames are micro-batched per model, so
+        # concurrent requests and streams share batched forward passes
+        self._batchers = {}
+        self._batchers_lock = threading.Lock()
+
+        # Uploads and results are written off the request path and kept under a disk quota
+        self.storage = ResultStore(
+            config.RESULTS_DIR,
+            max_bytes=int(config.RESULTS_MAX_MB * 1024 * 1024),
+            max_age_seconds=config.RESULTS_MAX_AGE_HOURS * 3600,
+            workers=config.RESULTS_WRITERS
+        )
+        # Per-stage latency histograms and scrape-time gauges, exposed on /metrics
+        self.metrics = MetricsRegistry()
+        self.metrics.register_collector(self._collect_metrics)
+        self.image_latency = self.metrics.stage_latency("image")
+        self.camera_latency = self.metrics.stage_latency("camera")
+        self.camera_rate = RateMeter()
+
+        # Repeated submissions of the same file are answered from here without inference
+        self.result_cache = ResultCache(max_bytes=int(config.RESULT_CACHE_MAX_MB * 1024 * 1024))
+        # One renderer, and so one label cache, for images, video streams and the camera
+        self.renderer = AnnotationRenderer()
+        # Content hashes of uploaded videos, so streams started on them later can be cached
+        self.video_hashes = OrderedDict()
+        self.streams = StreamRegistry(
+            self, max_streams=config.STREAM_MAX_ACTIVE, results_dir=config.RESULTS_DIR,
+            max_finished=config.STREAM_MAX_FINISHED
+        )
         
         # Global variables for real-time processing
         self.camera_active = False
-        self.latest_detections = []
-        self.latest_frame = None
-        self.processing_lock = threading.Lock()
-        self.stop_processing = False
-        self.video_writer = None
-        self.annotated_video_path = None
+        self.camera_capture = None
+        self.camera_stats = LiveStats()
+        self.camera_cascade = None
         
         # Fire detection alarm variables
-        self.fire_detection_frames = deque(maxlen=5)
         self.camera_fire_frames = deque(maxlen=5)
-        self.smoke_detection_frames = deque(maxlen=5)
         self.camera_smoke_frames = deque(maxlen=5)
-        self.fire_alarm_sound_path = "sounds/fire_alert_sound.mp3"
-        self.smoke_alarm_sound_path = "sounds/smoke_alert_sound.mp3"
-        pygame.mixer.init()
-        self.alarm_playing = False
-        self.alarm_lock = threading.Lock()
+        # Alarms from every stream go through one non-blocking dispatcher, rate
+        # limited per stream so one stream's alarm never silences another's
+        self.alarms = AlarmDispatcher(
+            build_alarm_sinks(
+                config.ALARM_SINKS, config.ALARM_FIRE_SOUND, config.ALARM_SMOKE_SOUND,
+                config.ALARM_WEBHOOK_URL, config.ALARM_WEBHOOK_TIMEOUT, config.ALARM_WEBHOOK_WORKERS
+            ),
+            cooldown_seconds=config.ALARM_COOLDOWN_SECONDS,
+            metrics=self.metrics
+        )
         
         # Predefined account for authentication
         self.PREDEFINED_ACCOUNT = {
@@ -46,319 +101,324 @@ class DetectionService:
             "password": "admin123"
         }
 
-    def play_alarm(self, alarm_type: str = "fire"):
-        """Play alarm sound in a separate thread"""
-        with self.alarm_lock:
-            if self.alarm_playing:
-                return  # Alarm is already playing
-            self.alarm_playing = True
-        
-        def play_sound():
+    @property
+    def device(self) -> Optional[str]:
+        return self.models.device
+
+    def start_warm_up(self) -> threading.Thread:
+        """Load the active model and run a warm-up inference in a background thread"""
+        self.warm_up_thread = threading.Thread(target=self.warm_up, name="warm-up", daemon=True)
+        self.warm_up_thread.start()
+        return self.warm_up_thread
+
+    def warm_up(self):
+        """Load the active model and run one inference so the first request does not pay for lazy setup
+
+        Failures are retried with exponential backoff, except missing weights,
+        which no retry can fix; after the last attempt warm_up_failed is set and
+        the service stays unready.
+        """
+        delay = config.WARM_UP_RETRY_SECONDS
+        for attempt in range(1, config.WARM_UP_ATTEMPTS + 1):
+            self.warm_up_attempts = attempt
             try:
-                if alarm_type == "fire":
-                    sound_path = self.fire_alarm_sound_path
-                    message = "🚨 FIRE ALARM ACTIVATED! 🚨"
-                else:  # smoke
-                    sound_path = self.smoke_alarm_sound_path
-                    message = "🚨 SMOKE ALARM ACTIVATED! 🚨"
-                    
-                if os.path.exists(sound_path):
-                    pygame.mixer.music.load(sound_path)
-                    pygame.mixer.music.play()
-                    print(message)
-                    
-                    # Wait for sound to finish
-                    while pygame.mixer.music.get_busy():
-                        time.sleep(0.1)
-                else:
-                    print(f"Warning: Alarm sound file not found at {sound_path}")
+                self._warm_up_once()
+                self.warm_up_error = None
+                return
+            except ModelWeightsMissingError as e:
+                self.warm_up_error = str(e)
+                print(f"Error warming up detection service: {e}")
+                break
             except Exception as e:
-                print(f"Error playing alarm sound: {e}")
-            finally:
-                with self.alarm_lock:
-                    self.alarm_playing = False
-        
-        # Play sound in separate thread to avoid blocking
-        sound_thread = threading.Thread(target=play_sound)
-        sound_thread.daemon = True
-        sound_thread.start()
-
-    def check_detection_and_alarm(self, detections: List[Dict], fire_tracker: deque, smoke_tracker: deque) -> Optional[str]:
-        """Check for fire and smoke detection and trigger appropriate alarms"""
-        fire_detected = any("fire" in detection["class"].lower() for detection in detections)
-        smoke_detected = any("smoke" in detection["class"].lower() for detection in detections)
+                self.warm_up_error = str(e)
+                print(f"Error warming up detection service (attempt {attempt}/{config.WARM_UP_ATTEMPTS}): {e}")
+                if attempt < config.WARM_UP_ATTEMPTS:
+                    time.sleep(delay)
+                    delay *= 2
+        self.warm_up_failed = True
+
+    def _warm_up_once(self):
+        started = time.perf_counter()
+        loaded = self.models.activate(self.models.active)
+        loaded_at = time.perf_counter()
+        print(f"Model loaded: {loaded.artifact} ({self.backend} backend) on {self.device}")
+
+        dummy_frame = np.zeros((640, 640, 3), dtype=np.uint8)
+        self._infer(loaded.name, [dummy_frame], conf=config.IMAGE_CONFIDENCE)
+        finished = time.perf_counter()
+
+        self.startup_timings = {
+            "model_load_ms": round((loaded_at - started) * 1000.0, 1),
+            "warm_up_inference_ms": round((finished - loaded_at) * 1000.0, 1),
+            "total_ms": round((finished - started) * 1000.0, 1),
+        }
+        self.ready.set()
+        print(f"Detection service ready in {self.startup_timings['total_ms']} ms")
+
+    def readiness(self) -> Dict[str, Any]:
+        """Report whether the model is loaded and warmed up"""
+        if self.ready.is_set():
+            status = "ready"
+        elif self.warm_up_failed:
+            status = "error"
+        else:
+            status = "warming_up"
+        return {
+            "status": status,
+            "ready": self.ready.is_set(),
+            "model": self.models.active,
+            "backend": self.backend,
+            "device": self.device,
+            "error": self.warm_up_error,
+            "attempts": self.warm_up_attempts,
+            "timings": self.startup_timings,
+        }
+
+    def check_detection_and_alarm(self, detections: Detections, fire_tracker: deque, smoke_tracker: deque,
+                                  stream_id: str, frame_timestamp: Optional[float] = None) -> Optional[str]:
+        """Check for fire and smoke detection and trigger appropriate alarms for one stream"""
+        fire_detected = detections.has("fire")
+        smoke_detected = detections.has("smoke")
         
         fire_tracker.append(fire_detected)
         smoke_tracker.append(smoke_detected)
         
         # Check if fire detected in all of the last 5 frames
         if len(fire_tracker) == 5 and all(fire_tracker):
-            self.play_alarm("fire")
+            self.alarms.trigger(stream_id, "fire", frame_timestamp)
             return "fire"
         
         # Check if both fire and smoke detected in all of the last 5 frames (fire takes priority)
         if (len(fire_tracker) == 5 and len(smoke_tracker) == 5 and 
             all(fire_tracker) and all(smoke_tracker)):
-            self.play_alarm("fire")  # Fire alarm takes priority
+            self.alarms.trigger(stream_id, "fire", frame_timestamp)  # Fire alarm takes priority
             return "fire_and_smoke"
         
         # Check if only smoke detected in all of the last 5 frames
         if (len(smoke_tracker) == 5 and all(smoke_tracker) and 
             not (len(fire_tracker) == 5 and all(fire_tracker))):
-            self.play_alarm("smoke")
+            self.alarms.trigger(stream_id, "smoke", frame_timestamp)
             return "smoke"
         
         return None
 
-    def process_video_frames(self, video_path: str, results_dir: str = "results"):
-        """Process video frames in real-time and update global detection results"""
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
-            print(f"Error: Unable to open video file: {video_path}")
+    async def gen_processed_frames(self):
+        """Generate processed frames with detections for the default video stream"""
+        stream = self.streams.get(DEFAULT_STREAM_ID)
+        if stream is None:
             return
-        
-        video_fps = cap.get(cv2.CAP_PROP_FPS)
-        frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        frame_delay = int(1000 / video_fps) if video_fps > 0 else 33  # Default to 30fps
-        
-        # Create annotated video file path with timestamp
-        timestamp_str = datetime.now().strftime("%Y%m%d_%H%M%S")
-        file_ext = os.path.splitext(video_path)[1]
-        self.annotated_video_path = os.path.join(results_dir, f"annotated_{timestamp_str}{file_ext}")
-        
-        # Initialize video writer
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        self.video_writer = cv2.VideoWriter(self.annotated_video_path, fourcc, video_fps, (frame_width, frame_height))
-        
-        print(f"Processing video: {video_path}, FPS: {video_fps}")
-        print(f"Saving annotated video to: {self.annotated_video_path}")
-        
-        while not self.stop_processing:
-            ret, frame = cap.read()
-            if not ret:
-                break
-                
-            # Update latest frame
-            with self.processing_lock:
-                self.latest_frame = frame.copy()
-            
-            # Run YOLO detection on frame
-            results = self.model(frame, conf=0.3)
-            
-            # Extract detections
-            frame_detections = []
-            for box in results[0].boxes:
-                frame_detections.append({
-                    "class": self.model.names[int(box.cls)],
-                    "confidence": float(box.conf),
-                    "bbox": box.xyxy[0].tolist() if hasattr(box, 'xyxy') else []
-                })
-            
-            # Update global detections
-            with self.processing_lock:
-                self.latest_detections = frame_detections
-            
-            # Check for fire and smoke detection and trigger alarm if needed
-            self.check_detection_and_alarm(frame_detections, self.fire_detection_frames, self.smoke_detection_frames)
-            
-            # Create annotated frame for saving
-            annotated_frame = frame.copy()
-            for detection in frame_detections:
-                if "bbox" in detection and len(detection["bbox"]) == 4:
-                    x1, y1, x2, y2 = map(int, detection["bbox"])
-                    class_name = detection["class"]
-                    confidence = detection["confidence"]
-                    
-                    # Choose color based on class
-                    if "fire" in class_name.lower():
-                        color = (0, 0, 255)  # Red for fire
-                    elif "smoke" in class_name.lower():
-                        color = (0, 165, 255)  # Orange for smoke
-                    else:
-                        color = (255, 255, 255)  # White for others
-                    
-                    # Draw bounding box
-                    cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), color, 2)
-                    
-                    # Draw label
-                    label = f"{class_name} {confidence:.2f}"
-                    (label_width, label_height), baseline = cv2.getTextSize(
-                        label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 2
-                    )
-                    
-                    cv2.rectangle(annotated_frame,
-                                  (x1, y1 - label_height - baseline),
-                                  (x1 + label_width, y1),
-                                  color, thickness=-1)
-                    cv2.putText(annotated_frame, label,
-                                (x1, y1 - baseline),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.5,
-                                (255, 255, 255), 2)
-            
-            # Write annotated frame to video file
-            if self.video_writer is not None:
-                self.video_writer.write(annotated_frame)
-            
-            # Simulate frame processing time
-            time.sleep(frame_delay / 1000.0)
-        
-        # Release resources
-        cap.release()
-        if self.video_writer is not None:
-            self.video_writer.release()
-            self.video_writer = None
-            print(f"Annotated video saved to: {self.annotated_video_path}")
-        print("Video processing stopped")
-
-    def gen_processed_frames(self):
-        """Generate processed video frames with detections"""
-        while not self.stop_processing:
-            with self.processing_lock:
-                if self.latest_frame is not None:
-                    frame_copy = self.latest_frame.copy()
-                    detections_copy = self.latest_detections.copy()
-                else:
-                    time.sleep(0.1)
-                    continue
-            
-            # Draw detections on frame
-            annotated_frame = frame_copy.copy()
-            
-            for detection in detections_copy:
-                if "bbox" in detection and len(detection["bbox"]) == 4:
-                    x1, y1, x2, y2 = map(int, detection["bbox"])
-                    class_name = detection["class"]
-                    confidence = detection["confidence"]
-                    
-                    # Choose color based on class
-                    if "fire" in class_name.lower():
-                        color = (0, 0, 255)  # Red for fire
-                    elif "smoke" in class_name.lower():
-                        color = (0, 165, 255)  # Orange for smoke
-                    else:
-                        color = (255, 255, 255)  # White for others
-                    
-                    # Draw bounding box
-                    cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), color, 2)
-                    
-                    # Draw label
-                    label = f"{class_name} {confidence:.2f}"
-                    (label_width, label_height), baseline = cv2.getTextSize(
-                        label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 2
-                    )
-                    
-                    cv2.rectangle(annotated_frame,
-                                  (x1, y1 - label_height - baseline),
-                                  (x1 + label_width, y1),
-                                  color, thickness=-1)
-                    cv2.putText(annotated_frame, label,
-                                (x1, y1 - baseline),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.5,
-                                (255, 255, 255), 2)
-            
-            # Encode frame as JPEG
-            ret, buffer = cv2.imencode('.jpg', annotated_frame)
-            if ret:
-                frame_bytes = buffer.tobytes()
-                
-                # Create frame data with detection info
-                frame_data = {
-                    "frame": base64.b64encode(frame_bytes).decode('utf-8'),
-                    "detections": detections_copy,
-                    "timestamp": time.time()
-                }
-                
-                # Stream frame data as JSON
-                yield f"data: {json.dumps(frame_data)}\n\n"
-            
-            time.sleep(0.033)  # ~30 FPS
+        async for event in stream.gen_events():
+            yield event
 
     def gen_frames(self):
-        """Generate camera frames with YOLO detection"""
-        cap = cv2.VideoCapture(0)
-        if not cap.isOpened():
-            raise RuntimeError("Could not start camera.")
+        """Generate camera frames with YOLO detection, always analysing the newest captured frame"""
+        capture = LatestFrameCapture(config.CAMERA_SOURCE)
+        capture.start()
+        self.camera_capture = capture
+        self.camera_stats = LiveStats()
+        self.camera_cascade = build_cascade(config.CASCADE_MODE, self, config.CASCADE_MODEL)
         try:
-            while self.camera_active:
-                success, frame = cap.read()
-                if not success:
-                    break
-
-                # Run YOLO model on frame
-                results = self.model(frame, conf=0.4)
-                
-                # Extract detections for fire alarm checking
-                frame_detections = []
-                for box in results[0].boxes:
-                    frame_detections.append({
-                        "class": self.model.names[int(box.cls)],
-                        "confidence": float(box.conf),
-                        "bbox": box.xyxy[0].tolist() if hasattr(box, 'xyxy') else []
-                    })
-                
+            while self.camera_active and capture.running:
+                latest = capture.read_latest(timeout=1.0)
+                if latest is None:
+                    continue
+                frame, captured_at = latest
+                latency = self.camera_latency
+                latency["queue_wait"].observe(max(time.time() - captured_at, 0.0))
+
+                # Frames rejected by the cheap cascade stages skip the main model
+                if self.camera_cascade is not None and not self.camera_cascade.screen(frame):
+                    frame_detections = Detections.empty()
+                else:
+                    # Run YOLO model on frame (the active model, so hot-swaps apply immediately)
+                    started = time.perf_counter()
+                    loaded = self.models.get()
+                    with loaded.lock:
+                        results = loaded.model(frame, conf=config.IMAGE_CONFIDENCE, imgsz=config.INFERENCE_IMGSZ)
+
+                    # Extract detections for fire alarm checking
+                    frame_detections = Detections.from_result(results[0], loaded.names)
+                    latency["inference"].observe(time.perf_counter() - started)
+
                 # Check for fire and smoke detection and trigger alarm if needed
-                self.check_detection_and_alarm(frame_detections, self.camera_fire_frames, self.camera_smoke_frames)
+                started = time.perf_counter()
+                self.check_detection_and_alarm(
+                    frame_detections, self.camera_fire_frames, self.camera_smoke_frames, "camera", captured_at
+                )
+                latency["alarm"].observe(time.perf_counter() - started)
+                self.camera_stats.record(captured_at)
+                self.camera_rate.mark()
 
-                # Draw YOLO detections
-                annotated_frame = results[0].plot()
+                # Draw detections onto the captured frame, which is not reused
+                started = time.perf_counter()
+                annotated_frame = self.renderer.render(frame, frame_detections, in_place=True)
+                latency["annotate"].observe(time.perf_counter() - started)
 
                 # Encode as JPEG
+                started = time.perf_counter()
                 ret, buffer = cv2.imencode('.jpg', annotated_frame)
                 frame_bytes = buffer.tobytes()
+                latency["live_encode"].observe(time.perf_counter() - started)
 
                 # Stream frame
                 yield (b'--frame\r\n'
                        b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
         finally:
-            cap.release()
+            capture.stop()
+
+    def get_camera_stats(self) -> Dict[str, Any]:
+        """Return dropped-frame counts and capture-to-alarm latency for the live camera"""
+        stats = self.camera_stats.as_dict(self.camera_capture)
+        stats["camera_active"] = self.camera_active
+        stats["cascade"] = self.camera_cascade.as_dict() if self.camera_cascade is not None else None
+        return stats
+
+    def _collect_metrics(self) -> Iterator[Sample]:
+        """Gauges and counters read on each /metrics scrape"""
+        camera = {"stream": "camera"}
+        capture = self.camera_capture
+        yield "stream_active", "gauge", "Whether the stream is running", camera, int(self.camera_active)
+        yield "stream_fps", "gauge", "Frames analysed per second over the last few seconds", camera, \
+            round(self.camera_rate.rate(), 2)
+        yield "stream_frames_processed_total", "counter", "Frames analysed", camera, \
+            self.camera_stats.frames_processed
+        yield "stream_frames_dropped_total", "counter", "Frames dropped before reaching a consumer", \
+            {**camera, "reason": "capture"}, capture.frames_dropped if capture else 0
+
+        yield from self.streams.metric_samples()
+        yield from self.alarms.metric_samples()
+
+        for model in self.models.list():
+            if model["loaded"]:
+                yield "model_memory_mb", "gauge", "Estimated memory of each loaded model", \
+                    {"model": model["name"]}, model["size_mb"]
+        yield "model_memory_budget_mb", "gauge", "Memory budget for loaded models", {}, \
+            self.models.memory_budget_mb
+        # Only reported once a model has imported torch; scraping never imports it
+        torch = sys.modules.get("torch")
+        if torch is not None and torch.cuda.is_available():
+            for index in range(torch.cuda.device_count()):
+                yield "gpu_memory_allocated_bytes", "gauge", "Memory allocated by tensors on each GPU", \
+                    {"device": str(index)}, torch.cuda.memory_allocated(index)
+
+        cache = self.result_cache.as_dict()
+        yield "result_cache_hits_total", "counter", "Predictions answered from the result cache", {}, cache["hits"]
+        yield "result_cache_misses_total", "counter", "Predictions that missed the result cache", {}, cache["misses"]
+        storage = self.storage.as_dict()
+        yield "storage_bytes", "gauge", "Bytes of uploads and results on disk", {}, storage["bytes"]
 
     def authenticate_user(self, email: str, password: str) -> bool:
         """Authenticate user against predefined account"""
         return (email == self.PREDEFINED_ACCOUNT["email"] and 
                 password == self.PREDEFINED_ACCOUNT["password"])
 
-    def process_image(self, image_path: str, results_dir: str = "results") -> Dict[str, Any]:
-        """Process a single image and return detection results"""
-        results = self.model(image_path, conf=0.4)
-        
-        detections = []
-        for box in results[0].boxes:
-            detections.append({
-                "class": self.model.names[int(box.cls)],
-                "confidence": float(box.conf)
-            })
-
-        # Speeds
-        yolo_speeds = results[0].speed
-        preprocess_time = round(yolo_speeds['preprocess'], 1)
-        inference_time = round(yolo_speeds['inference'], 1)
-        postprocess_time = round(yolo_speeds['postprocess'], 1)
-
-        detected_classes = [d["class"].lower() for d in detections]
-
-        if "fire" in detected_classes and "smoke" in detected_classes:
-            result_type = "fire_and_smoke"
-            confidence = max([d["confidence"] for d in detections if d["class"].lower() in ["fire", "smoke"]])
-        elif "fire" in detected_classes:
-            result_type = "fire"
-            confidence = max([d["confidence"] for d in detections if d["class"].lower() == "fire"])
-        elif "smoke" in detected_classes:
-            result_type = "smoke"
-            confidence = max([d["confidence"] for d in detections if d["class"].lower() == "smoke"])
+    def _infer(self, model_name: str, sources: List[Any], conf: float) -> List[Any]:
+        """Run one batched YOLO forward pass on a registered model"""
+        loaded = self.models.get(model_name)
+        with loaded.lock:
+            return loaded.model(sources, conf=conf, imgsz=config.INFERENCE_IMGSZ)
+
+    def _batcher(self, kind: str, model_name: Optional[str] = None) -> MicroBatcher:
+        """Return the micro-batcher for image or frame requests to a model, creating it on first use"""
+        model_name = self.models.resolve(model_name)
+        key = (kind, model_name)
+        with self._batchers_lock:
+            batcher = self._batchers.get(key)
+            if batcher is None:
+                if kind == "image":
+                    batcher = MicroBatcher(
+                        lambda sources: self._infer(model_name, sources, conf=config.IMAGE_CONFIDENCE),
+                        max_batch_size=config.BATCH_MAX_SIZE,
+                        max_wait_ms=config.BATCH_MAX_WAIT_MS
+                    )
+                else:
+                    batcher = MicroBatcher(
+                        lambda frames: self._infer(model_name, frames, conf=config.FRAME_CONFIDENCE),
+                        max_batch_size=config.STREAM_BATCH_MAX_SIZE,
+                        max_wait_ms=config.STREAM_BATCH_MAX_WAIT_MS
+                    )
+                self._batchers[key] = batcher
+        return batcher
+
+    def detect_frame(self, frame, model_name: Optional[str] = None, tiler: Optional[Tiler] = None) -> Detections:
+        """Detect fire and smoke in a video frame through the scheduler shared by all streams"""
+        if tiler is not None:
+            return self.detect_frame_tiled(frame, tiler, model_name)
+        result, _ = self._batcher("frame", model_name).infer(frame)
+        return Detections.from_result(result)
+
+    def detect_frame_tiled(self, frame, tiler: Tiler, model_name: Optional[str] = None) -> Detections:
+        """Detect on overlapping tiles of a high-resolution frame in one batched forward pass"""
+        model_name = self.models.resolve(model_name)
+        # A frame's tiles already form a full batch, so they skip the micro-batcher
+        return tiler.detect(frame, lambda tiles: self._infer(model_name, tiles, conf=config.FRAME_CONFIDENCE))
+
+    def process_image(self, image_path: str, model_name: Optional[str] = None) -> InferenceResult:
+        """Process a single image, given as a path or a decoded BGR array, and return its inference result"""
+        model_name = self.models.resolve(model_name)
+        result, queue_ms = self._batcher("image", model_name).infer(image_path)
+        return self._record_image(InferenceResult(result, result.names, queue_ms, model_name))
+
+    def process_images(self, image_paths: List[str], model_name: Optional[str] = None) -> List[InferenceResult]:
+        """Process several images, letting the batcher group them into batched forward passes"""
+        model_name = self.models.resolve(model_name)
+        batcher = self._batcher("image", model_name)
+        futures = [batcher.submit(path) for path in image_paths]
+        inference_results = []
+        for future in futures:
+            result, queue_ms = future.result()
+            inference_results.append(self._record_image(InferenceResult(result, result.names, queue_ms, model_name)))
+        return inference_results
+
+    def _record_image(self, result: InferenceResult) -> InferenceResult:
+        self.image_latency["queue_wait"].observe(result.queue_ms / 1000.0)
+        self.image_latency["inference"].observe(
+            (result.preprocess_ms + result.inference_ms + result.postprocess_ms) / 1000.0
+        )
+        return result
+
+    def model_id(self, model_name: Optional[str] = None) -> str:
+        """Identify a model by name, backend and weights, so swapping weights under a name misses the cache"""
+        model_name = self.models.resolve(model_name)
+        return f"{model_name}:{self.backend}:{self.models.model_paths[model_name]}"
+
+    def cached_result(self, key) -> Optional[CachedResult]:
+        """Look up a cached prediction, restoring its annotated file if storage evicted it"""
+        entry = self.result_cache.get(key)
+        if entry is None:
+            return None
+        if self.storage.resolve(entry.artifact_name) is None:
+            if entry.artifact is None:
+                self.result_cache.invalidate(key)
+                return None
+            self.storage.write(entry.artifact_name, entry.artifact)
+        return entry
+
+    def remember_video_hash(self, video_path: str, content_hash: str):
+        """Record an uploaded video's content hash, forgetting the oldest beyond VIDEO_HASHES_MAX"""
+        path = os.path.abspath(video_path)
+        self.video_hashes[path] = content_hash
+        self.video_hashes.move_to_end(path)
+        while len(self.video_hashes) > config.VIDEO_HASHES_MAX:
+            self.video_hashes.popitem(last=False)
+
+    def cache_video_result(self, stream):
+        """Cache a stream that analysed its whole video, keyed by the video's content hash"""
+        if stream.upload is not None:
+            content_hash = stream.upload.sha256
         else:
-            result_type = "clear"
-            confidence = 0.0
+            content_hash = self.video_hashes.get(os.path.abspath(stream.video_path))
+        if content_hash is None or not stream.annotated_video_path:
+            return
+        name = os.path.basename(stream.annotated_video_path)
+        key = ResultCache.key(content_hash, self.model_id(stream.model_name), config.FRAME_CONFIDENCE, stream.variant)
+        payload = {"annotated_video_url": f"/results/{name}", "frames_processed": stream.frames_processed}
+        self.result_cache.put(key, CachedResult(payload, name))
 
-        return {
-            "type": result_type,
-            "confidence": confidence,
-            "preprocess_ms": preprocess_time,
-            "inference_ms": inference_time,
-            "postprocess_ms": postprocess_time,
-            "shape": list(results[0].orig_shape),
-            "detections": detections
-        }
+    def activate_model(self, model_name: str) -> Dict[str, Any]:
+        """Hot-swap the active model; in-flight batches finish on the model they started with"""
+        loaded = self.models.activate(model_name)
+        return {"status": "model activated", "model": loaded.name, "artifact": loaded.artifact}
 
     def start_camera(self):
         """Start camera processing"""
@@ -372,39 +432,13 @@ class DetectionService:
         self.camera_fire_frames.clear()
         self.camera_smoke_frames.clear()
 
-    def start_video_processing(self, video_path: str):
-        """Start video processing in background thread"""
-        # Stop any existing processing
-        self.stop_processing = True
-        time.sleep(0.1)
-        
-        # Reset global variables
-        self.latest_detections = []
-        self.latest_frame = None
-        self.stop_processing = False
-        self.fire_detection_frames.clear()
-        self.smoke_detection_frames.clear()
-        
-        # Start processing in background thread
-        processing_thread = threading.Thread(
-            target=self.process_video_frames, 
-            args=(video_path,)
-        )
-        processing_thread.daemon = True
-        processing_thread.start()
+    def start_video_processing(self, video_path: str, **options):
+        """Start video processing on the default stream, replacing any previous video"""
+        self.streams.start(DEFAULT_STREAM_ID, video_path, **options)
 
     def stop_video_processing(self) -> Dict[str, Any]:
-        """Stop video processing and return results"""
-        self.stop_processing = True
-        self.fire_detection_frames.clear()
-        self.smoke_detection_frames.clear()
-        
-        # Wait a moment for processing to complete
-        time.sleep(0.5)
-        
-        result = {"status": "video processing stopped"}
-        if self.annotated_video_path and os.path.exists(self.annotated_video_path):
-            result["annotated_video_url"] = f"/results/{os.path.basename(self.annotated_video_path)}"
-            result["annotated_video_path"] = self.annotated_video_path
-        
+        """Stop video processing on the default stream and return results"""
+        result = self.streams.stop(DEFAULT_STREAM_ID)
+        if result is None:
+            return {"status": "video processing stopped"}
         return result
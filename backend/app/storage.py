@@ -0,0 +1,202 @@
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+
+def new_result_id() -> str:
+    """Timestamped, collision-free ID for the files belonging to one request"""
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+
+class ResultStore:
+    """Uploads and annotated results on disk, written in the background and kept under a size/age quota
+
+    Files are tracked in least-recently-used order; reads through resolve() count
+    as use. When the quota is exceeded, files older than max_age_seconds go first,
+    then the least recently used, skipping pinned files and pending writes.
+    """
+
+    def __init__(self, root: str = "results", max_bytes: int = 2 * 1024 ** 3, max_age_seconds: float = 0,
+                 workers: int = 2):
+        self.root = os.path.abspath(root)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        os.makedirs(self.root, exist_ok=True)
+
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="result-writer")
+        self._lock = threading.Lock()
+        # filename -> (size in bytes, creation time), least recently used first
+        self._files: "OrderedDict[str, tuple]" = OrderedDict()
+        self._total_bytes = 0
+        self._pending: Dict[str, Future] = {}
+        self._pinned: Dict[str, int] = {}
+        self.writes = 0
+        self.write_errors = 0
+        self.evicted = 0
+        self._scan()
+        self.enforce_quota()
+
+    def _scan(self):
+        """Index files already on disk, oldest access first"""
+        entries = []
+        for entry in os.scandir(self.root):
+            if entry.is_file() and not entry.name.startswith("."):
+                stat = entry.stat()
+                entries.append((max(stat.st_atime, stat.st_mtime), entry.name, stat.st_size, stat.st_mtime))
+        for _, name, size, created in sorted(entries):
+            self._files[name] = (size, created)
+            self._total_bytes += size
+
+    def _name(self, path_or_name: str) -> Optional[str]:
+        """File name inside the store, or None for paths outside it or traversal attempts"""
+        if os.path.dirname(path_or_name):
+            if os.path.dirname(os.path.abspath(path_or_name)) != self.root:
+                return None
+            path_or_name = os.path.basename(path_or_name)
+        if path_or_name in ("", ".", "..") or path_or_name.startswith("."):
+            return None
+        return path_or_name
+
+    def path(self, filename: str) -> str:
+        name = self._name(filename)
+        if name is None:
+            raise ValueError(f"Invalid result file name: {filename}")
+        return os.path.join(self.root, name)
+
+    def write(self, filename: str, data: bytes) -> Future:
+        """Queue data to be written to filename on the writer pool and return its future"""
+        name = self._name(filename)
+        if name is None:
+            raise ValueError(f"Invalid result file name: {filename}")
+        future = self._executor.submit(self._write, name, data)
+        with self._lock:
+            self._pending[name] = future
+        future.add_done_callback(lambda _: self._write_done(name, future))
+        return future
+
+    def _write(self, name: str, data: bytes) -> str:
+        path = os.path.join(self.root, name)
+        # Write then rename, so readers never see a partial file
+        temp_path = os.path.join(self.root, f".{name}.tmp")
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        # Tracked before the future resolves, so whoever waits on it sees the file counted
+        self.register(name)
+        return path
+
+    def _write_done(self, name: str, future: Future):
+        with self._lock:
+            if self._pending.get(name) is future:
+                del self._pending[name]
+        if future.exception() is not None:
+            self.write_errors += 1
+            print(f"Error writing result file {name}: {future.exception()}")
+            return
+        self.writes += 1
+
+    def register(self, path_or_name: str):
+        """Start tracking a file written directly into the store, e.g. by a video writer"""
+        name = self._name(path_or_name)
+        if name is None:
+            return
+        try:
+            size = os.path.getsize(os.path.join(self.root, name))
+        except OSError:
+            return
+        with self._lock:
+            previous = self._files.pop(name, None)
+            if previous is not None:
+                self._total_bytes -= previous[0]
+            self._files[name] = (size, time.time())
+            self._total_bytes += size
+        self.enforce_quota()
+
+    def pin(self, path_or_name: str):
+        """Protect a file from eviction while it is in use, e.g. as a stream's input or output"""
+        name = self._name(path_or_name)
+        if name is not None:
+            with self._lock:
+                self._pinned[name] = self._pinned.get(name, 0) + 1
+
+    def unpin(self, path_or_name: str):
+        name = self._name(path_or_name)
+        if name is None:
+            return
+        with self._lock:
+            count = self._pinned.get(name, 0) - 1
+            if count > 0:
+                self._pinned[name] = count
+            else:
+                self._pinned.pop(name, None)
+
+    def resolve(self, filename: str, timeout: float = 30.0) -> Optional[str]:
+        """Path of a stored file for reading, waiting for a pending write; None if it does not exist"""
+        name = self._name(filename)
+        if name is None:
+            return None
+        with self._lock:
+            pending = self._pending.get(name)
+        if pending is not None:
+            try:
+                pending.result(timeout=timeout)
+            except Exception:
+                return None
+
+        path = os.path.join(self.root, name)
+        if not os.path.isfile(path):
+            return None
+        with self._lock:
+            if name in self._files:
+                self._files.move_to_end(name)
+        return path
+
+    def enforce_quota(self):
+        """Evict expired files, then least recently used ones, until the store is under its size limit"""
+        victims = []
+        with self._lock:
+            now = time.time()
+            for name, (size, created) in list(self._files.items()):
+                expired = self.max_age_seconds and now - created > self.max_age_seconds
+                if self._total_bytes <= self.max_bytes and not expired:
+                    if not self.max_age_seconds:
+                        break
+                    continue
+                if name in self._pinned or name in self._pending:
+                    continue
+                del self._files[name]
+                self._total_bytes -= size
+                victims.append(name)
+
+        for name in victims:
+            try:
+                os.remove(os.path.join(self.root, name))
+                self.evicted += 1
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Error evicting result file {name}: {e}")
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "root": self.root,
+                "files": len(self._files),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "max_age_seconds": self.max_age_seconds,
+                "pending_writes": len(self._pending),
+                "pinned": len(self._pinned),
+                "writes": self.writes,
+                "write_errors": self.write_errors,
+                "evicted": self.evicted,
+            }
+
+    def shutdown(self):
+        """Finish queued writes"""
+        self._executor.shutdown(wait=True)
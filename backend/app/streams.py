@@ -0,0 +1,559 @@
+import cv2
+import os
+import json
+import re
+import time
+import queue
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import List, Dict, Any, Iterator, Optional
+from .pipeline import (
+    END_OF_STREAM, PipelineStage, StageStats, offer_latest, put_until_stopped
+)
+from .motion import AdaptiveStride
+from .cascade import build_cascade
+from .tiling import build_tiler
+from .inference import Detections
+from .metrics import RateMeter, Sample
+from .storage import new_result_id
+from .uploads import UploadWriter
+from .videoio import open_reader, open_writer, resolve_video_backend
+from .broadcast import FrameBroadcaster, FrameSlot, EncodedFrame, CLOSED, detections_event
+from . import config
+
+DEFAULT_STREAM_ID = "default"
+STREAM_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class StreamLimitError(Exception):
+    """Raised when starting a stream would exceed the configured number of active streams"""
+
+
+def analysis_variant(inference_stride: Optional[int] = None, motion_gate: Optional[bool] = None,
+                     cascade: Optional[str] = None, tile_size: Optional[int] = None,
+                     tile_overlap: Optional[float] = None, roi: Optional[List] = None,
+                     decode_width: Optional[int] = None) -> str:
+    """Stream settings that change a video's detections, as part of its result cache key"""
+    settings = {
+        "stride": inference_stride if inference_stride is not None else config.STREAM_INFERENCE_STRIDE,
+        "motion_gate": motion_gate if motion_gate is not None else config.STREAM_MOTION_GATE,
+        "cascade": cascade if cascade is not None else config.CASCADE_MODE,
+        "tile_size": tile_size if tile_size is not None else config.TILE_SIZE,
+        "tile_overlap": tile_overlap if tile_overlap is not None else config.TILE_OVERLAP,
+        "roi": roi,
+        "decode_width": decode_width if decode_width is not None else config.STREAM_DECODE_WIDTH,
+    }
+    return "video:" + json.dumps(settings, sort_keys=True, separators=(",", ":"))
+
+
+class VideoStream:
+    """Reader thread, detection state, alarm trackers and writer for one analysed video"""
+
+    def __init__(self, stream_id: str, video_path: str, service, results_dir: str = "results",
+                 inference_stride: Optional[int] = None, motion_gate: Optional[bool] = None,
+                 model: Optional[str] = None, cascade: Optional[str] = None,
+                 tile_size: Optional[int] = None, tile_overlap: Optional[float] = None,
+                 roi: Optional[List] = None, decode_width: Optional[int] = None,
+                 upload: Optional[UploadWriter] = None):
+        self.stream_id = stream_id
+        self.video_path = video_path
+        self.service = service
+        self.results_dir = results_dir
+        # Set when the video is still being uploaded; decoding follows the file as it grows
+        self.upload = upload
+        self._capture_bytes = 0
+        self.video_backend = resolve_video_backend(config.VIDEO_BACKEND)
+        # Frames are downscaled to this width while decoding; 0 keeps the source resolution
+        self.decode_width = decode_width if decode_width is not None else config.STREAM_DECODE_WIDTH
+        # Finished analyses are cached under the video's content hash and these settings
+        self.variant = analysis_variant(inference_stride, motion_gate, cascade, tile_size, tile_overlap, roi,
+                                        decode_width)
+        # None follows the service's active model, so hot-swaps apply to running streams
+        self.model_name = model
+
+        self.status = "starting"
+        self.frames_processed = 0
+        # Per-stage latency histograms shared with the service's /metrics endpoint
+        self.latency = service.metrics.stage_latency(stream_id)
+        self.rate = RateMeter()
+        # Playback publishes (frame, detections, timestamp) here; viewers wake on each new sequence number
+        self.latest = FrameSlot()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+        self.video_writer = None
+        self.annotated_video_path = None
+
+        # Pipeline stages, created when the stream starts
+        self.frame_delay = 0.033
+        self.playback_queue = None
+        self.decode_stats = None
+        self.stages = []
+
+        # Frames skipped by the stride or motion gate reuse the last detections
+        self.stride = AdaptiveStride(
+            stride=inference_stride if inference_stride is not None else config.STREAM_INFERENCE_STRIDE,
+            motion_gate=motion_gate if motion_gate is not None else config.STREAM_MOTION_GATE,
+            escalate_confidence=config.STREAM_ESCALATE_CONFIDENCE
+        )
+        self.last_detections = Detections.empty()
+
+        # Optional cheap screening before frames reach the main model
+        self.cascade = build_cascade(
+            cascade if cascade is not None else config.CASCADE_MODE,
+            service, config.CASCADE_MODEL
+        )
+
+        # Optional sliced inference so small, distant fires survive on high-resolution video
+        self.tiler = build_tiler(
+            tile_size if tile_size is not None else config.TILE_SIZE,
+            tile_overlap if tile_overlap is not None else config.TILE_OVERLAP,
+            roi
+        )
+
+        # Encodes each published frame once for all live viewers
+        self.broadcaster = FrameBroadcaster(
+            self.latest, self._encode_frame,
+            queue_size=config.BROADCAST_CLIENT_QUEUE, name=f"broadcast-{stream_id}"
+        )
+        # Detection-only channel so metadata clients never pay for JPEG encoding
+        self.detections_broadcaster = FrameBroadcaster(
+            self.latest, self._encode_detections,
+            queue_size=config.BROADCAST_CLIENT_QUEUE, name=f"detections-{stream_id}"
+        )
+
+        # Fire detection alarm trackers for this stream
+        self.fire_frames = deque(maxlen=5)
+        self.smoke_frames = deque(maxlen=5)
+
+    @property
+    def active(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self):
+        """Start reading and analysing the video in a background thread"""
+        self.thread = threading.Thread(target=self._run, name=f"stream-{self.stream_id}")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self, timeout: float = 5.0) -> Dict[str, Any]:
+        """Stop the reader thread and return the location of the annotated video"""
+        self.stop_event.set()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout=timeout)
+        self._close_viewers()
+        self.fire_frames.clear()
+        self.smoke_frames.clear()
+
+        result = {"status": "video processing stopped", "stream_id": self.stream_id}
+        if self.annotated_video_path and os.path.exists(self.annotated_video_path):
+            result["annotated_video_url"] = f"/results/{os.path.basename(self.annotated_video_path)}"
+            result["annotated_video_path"] = self.annotated_video_path
+        return result
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "stream_id": self.stream_id,
+            "status": self.status,
+            "video_path": self.video_path,
+            "model": self.model_name or self.service.models.active,
+            "frames_processed": self.frames_processed,
+            "annotated_video_path": self.annotated_video_path,
+            "inference": self.stride.as_dict(),
+            "cascade": self.cascade.as_dict() if self.cascade is not None else None,
+            "tiling": self.tiler.as_dict() if self.tiler is not None else None,
+            "upload": self.upload.as_dict() if self.upload is not None else None,
+            "decode_width": self.decode_width or None,
+            "video_backend": self.video_backend,
+            "pipeline": self.pipeline_stats(),
+            "broadcast": self.broadcaster.as_dict(),
+            "detections_broadcast": self.detections_broadcaster.as_dict(),
+        }
+
+    def metric_samples(self) -> Iterator[Sample]:
+        """Gauges and counters for this stream, read on each /metrics scrape"""
+        labels = {"stream": self.stream_id}
+        yield "stream_active", "gauge", "Whether the stream is running", labels, int(self.active)
+        yield "stream_fps", "gauge", "Frames analysed per second over the last few seconds", labels, \
+            round(self.rate.rate(), 2)
+        yield "stream_frames_processed_total", "counter", "Frames analysed", labels, self.frames_processed
+
+        stages = list(self.stages)
+        if stages:
+            yield "stream_frames_dropped_total", "counter", "Frames dropped before reaching a consumer", \
+                {**labels, "reason": "playback"}, stages[3].stats.dropped
+        yield "stream_frames_dropped_total", "counter", "Frames dropped before reaching a consumer", \
+            {**labels, "reason": "viewers"}, self.broadcaster.frames_dropped
+        for stage in stages:
+            yield "stream_queue_depth", "gauge", "Items waiting in each pipeline queue", \
+                {**labels, "queue": stage.name}, stage.input_queue.qsize()
+        if self.video_writer is not None:
+            yield "stream_queue_depth", "gauge", "Items waiting in each pipeline queue", \
+                {**labels, "queue": "encode"}, self.video_writer.queue_depth
+
+    def _annotated_path(self) -> str:
+        result_id = new_result_id()
+        # H.264 in MP4 plays in browsers whatever the source container was
+        if self.stream_id == DEFAULT_STREAM_ID:
+            filename = f"annotated_{result_id}.mp4"
+        else:
+            filename = f"annotated_{self.stream_id}_{result_id}.mp4"
+        return os.path.join(self.results_dir, filename)
+
+    def _run(self):
+        """Decode frames and feed the inference, annotation, writer and playback stages"""
+        try:
+            reader = self._open_reader()
+        except Exception as e:
+            print(f"Error: Unable to open video file: {self.video_path} ({e})")
+            self.status = "error"
+            self._close_viewers()
+            return
+
+        video_info = reader.info
+        video_fps = video_info.fps
+        self.frame_delay = 1.0 / video_fps
+
+        # Create annotated video file path with timestamp
+        self.annotated_video_path = self._annotated_path()
+        # Neither the source nor the video being written may be evicted while the stream runs
+        storage = self.service.storage
+        storage.pin(self.video_path)
+        storage.pin(self.annotated_video_path)
+
+        # H.264 writer encoding on its own thread
+        try:
+            self.video_writer = open_writer(
+                self.annotated_video_path, video_info, self.video_backend, config.VIDEO_ENCODER,
+                queue_size=config.VIDEO_WRITER_QUEUE, latency=self.latency["encode"]
+            )
+        except Exception as e:
+            print(f"[{self.stream_id}] Error: Unable to open video writer for {self.annotated_video_path} ({e})")
+            reader.release()
+            storage.unpin(self.video_path)
+            storage.unpin(self.annotated_video_path)
+            self.status = "error"
+            self._close_viewers()
+            return
+
+        print(f"[{self.stream_id}] Processing video: {self.video_path}, FPS: {video_fps}")
+        print(f"[{self.stream_id}] Saving annotated video to: {self.annotated_video_path}")
+
+        # Bounded queues between stages give backpressure: a slow writer
+        # eventually blocks the decoder instead of buffering the whole video
+        decoded_queue = queue.Queue(maxsize=config.PIPELINE_QUEUE_SIZE)
+        inferred_queue = queue.Queue(maxsize=config.PIPELINE_QUEUE_SIZE)
+        annotated_queue = queue.Queue(maxsize=config.PIPELINE_QUEUE_SIZE)
+        # Playback is lossy so pacing the live view never slows analysis
+        self.playback_queue = queue.Queue(maxsize=config.PIPELINE_QUEUE_SIZE)
+
+        self.decode_stats = StageStats("decode")
+        self.stages = [
+            PipelineStage("infer", self._infer_stage, decoded_queue, inferred_queue, self.stop_event),
+            PipelineStage("annotate", self._annotate_stage, inferred_queue, annotated_queue, self.stop_event),
+            PipelineStage("write", self._write_stage, annotated_queue, None, self.stop_event),
+            PipelineStage("playback", self._playback_stage, self.playback_queue, None, self.stop_event),
+        ]
+        for stage in self.stages:
+            stage.start()
+        self.status = "running"
+
+        frames_decoded = 0
+        try:
+            while not self.stop_event.is_set():
+                started = time.perf_counter()
+                frame = reader.read()
+                if frame is None:
+                    # Caught up with an upload in progress: wait for more bytes and resume
+                    if self._wait_for_upload():
+                        reader.release()
+                        reader = open_reader(self.video_path, self.video_backend, self.decode_width)
+                        reader.seek(frames_decoded)
+                        continue
+                    break
+                frames_decoded += 1
+                decode_seconds = time.perf_counter() - started
+                self.decode_stats.record(decode_seconds)
+                self.latency["decode"].observe(decode_seconds)
+
+                # Wall-clock time, so alarm latency can be measured from the frame across threads
+                if not put_until_stopped(decoded_queue, (frame, time.time()), self.stop_event):
+                    break
+        except Exception as e:
+            print(f"[{self.stream_id}] Error decoding video: {e}")
+            self.status = "error"
+        finally:
+            reader.release()
+            put_until_stopped(decoded_queue, END_OF_STREAM, self.stop_event)
+
+            # Drain the analysis stages before closing the writer
+            infer_stage, annotate_stage, write_stage, playback_stage = self.stages
+            infer_stage.join()
+            annotate_stage.join()
+            offer_latest(self.playback_queue, END_OF_STREAM)
+            write_stage.join()
+            playback_stage.join()
+
+            if self.video_writer is not None:
+                self.video_writer.release()
+                if self.video_writer.error is not None:
+                    self.status = "error"
+                self.video_writer = None
+                print(f"[{self.stream_id}] Annotated video saved to: {self.annotated_video_path}")
+            storage.unpin(self.video_path)
+            storage.unpin(self.annotated_video_path)
+            storage.register(self.annotated_video_path)
+            if any(stage.error is not None for stage in self.stages):
+                self.status = "error"
+            if self.upload is not None and self.upload.failed:
+                self.status = "error"
+            if self.status != "error":
+                self.status = "stopped" if self.stop_event.is_set() else "finished"
+            if self.status == "finished":
+                self.service.cache_video_result(self)
+            # Viewers of a video that ended on its own get end-of-stream too, not keep-alives forever
+            self._close_viewers()
+            print(f"[{self.stream_id}] Video processing stopped")
+
+    def _open_reader(self):
+        """Open the video, waiting for a still-arriving upload until its header can be parsed"""
+        while True:
+            upload_done = self.upload is None or self.upload.done
+            if self.upload is not None:
+                self._capture_bytes = self.upload.bytes_received
+            try:
+                return open_reader(self.video_path, self.video_backend, self.decode_width)
+            except Exception:
+                if upload_done or self.stop_event.is_set():
+                    raise
+            # MP4s without faststart keep their index at the end, so they only open once complete
+            self.upload.wait_for_bytes(self._capture_bytes + config.UPLOAD_RESUME_BYTES, timeout=1.0)
+
+    def _wait_for_upload(self) -> bool:
+        """After the decoder runs out of data, wait for more of the upload; False once there is no more"""
+        if self.upload is None:
+            return False
+        while not self.stop_event.is_set():
+            done = self.upload.done
+            received = self.upload.bytes_received
+            if done and self.upload.failed:
+                return False
+            # Reopen once a useful amount has arrived, or for the final tail of the upload
+            if received > self._capture_bytes and (done or received >= self._capture_bytes + config.UPLOAD_RESUME_BYTES):
+                self._capture_bytes = received
+                return True
+            if done:
+                return False
+            self.upload.wait_for_bytes(self._capture_bytes + config.UPLOAD_RESUME_BYTES, timeout=1.0)
+        return False
+
+    def _infer_stage(self, item):
+        """Run detection through the shared scheduler and update the alarm trackers"""
+        frame, decoded_at = item
+        self.latency["queue_wait"].observe(max(time.time() - decoded_at, 0.0))
+        started = time.perf_counter()
+        if self.stride.should_infer(frame, self.last_detections):
+            if self.cascade is None or self.cascade.screen(frame):
+                self.last_detections = self.service.detect_frame(frame, self.model_name, self.tiler)
+            else:
+                self.last_detections = Detections.empty()
+            self.latency["inference"].observe(time.perf_counter() - started)
+        frame_detections = self.last_detections
+        self.frames_processed += 1
+        self.rate.mark()
+
+        # Check for fire and smoke detection and trigger alarm if needed
+        started = time.perf_counter()
+        self.service.check_detection_and_alarm(
+            frame_detections, self.fire_frames, self.smoke_frames, self.stream_id, decoded_at
+        )
+        self.latency["alarm"].observe(time.perf_counter() - started)
+        return frame, frame_detections
+
+    def _annotate_stage(self, item):
+        """Draw detections once; the annotated frame feeds both the video writer and live viewers"""
+        frame, frame_detections = item
+        # The decoded frame is not used after this stage, so boxes are drawn straight onto it
+        started = time.perf_counter()
+        annotated_frame = self.service.renderer.render(frame, frame_detections, in_place=True)
+        self.latency["annotate"].observe(time.perf_counter() - started)
+        dropped = offer_latest(self.playback_queue, (annotated_frame, frame_detections))
+        self.stages[3].stats.dropped += dropped
+        return annotated_frame
+
+    def _write_stage(self, annotated_frame):
+        """Write annotated frame to video file"""
+        if self.video_writer is not None:
+            self.video_writer.write(annotated_frame)
+
+    def _playback_stage(self, item):
+        """Publish the frame for live viewers at the video's own frame rate"""
+        frame, frame_detections = item
+        self.latest.publish((frame, frame_detections, time.time()))
+        self.stop_event.wait(self.frame_delay)
+
+    def pipeline_stats(self) -> Dict[str, Any]:
+        if self.decode_stats is None:
+            return {}
+        stats = {"decode": self.decode_stats.as_dict()}
+        for stage in self.stages:
+            stats[stage.name] = stage.stats.as_dict()
+        return stats
+
+    def _encode_frame(self, published, seq: int):
+        """JPEG-encode one already annotated frame for the live viewers"""
+        annotated_frame, frame_detections, timestamp = published
+
+        # Encode frame as JPEG
+        started = time.perf_counter()
+        ret, buffer = cv2.imencode('.jpg', annotated_frame)
+        self.latency["live_encode"].observe(time.perf_counter() - started)
+        if ret:
+            frame_bytes = buffer.tobytes()
+
+            # Each transport serialises this once; every subscriber receives the same bytes
+            return EncodedFrame(self.stream_id, frame_bytes, frame_detections, timestamp, seq)
+        return None
+
+    def _encode_detections(self, published, seq: int) -> str:
+        _, frame_detections, timestamp = published
+        return detections_event(self.stream_id, frame_detections, timestamp, seq)
+
+    async def _subscribe(self, broadcaster: FrameBroadcaster):
+        """Yield each new payload from a broadcaster until the stream closes, or None as a keep-alive tick"""
+        subscription = broadcaster.subscribe()
+        try:
+            while True:
+                payload = await subscription.aget(timeout=config.STREAM_KEEPALIVE_SECONDS)
+                if payload is CLOSED:
+                    break
+                yield payload
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    async def gen_events(self):
+        """Generate processed video frames with detections as base64-in-JSON server-sent events"""
+        async for encoded in self._subscribe(self.broadcaster):
+            yield ": keep-alive\n\n" if encoded is None else encoded.sse_event()
+
+    async def gen_mjpeg(self):
+        """Generate processed video frames as a binary multipart MJPEG stream"""
+        async for encoded in self._subscribe(self.broadcaster):
+            if encoded is not None:
+                yield encoded.mjpeg_part()
+
+    async def gen_detection_events(self):
+        """Generate compact detection metadata as server-sent events, without frames"""
+        async for event in self._subscribe(self.detections_broadcaster):
+            yield ": keep-alive\n\n" if event is None else event
+
+    def _close_viewers(self):
+        """End every live viewer connection for this stream"""
+        self.broadcaster.close()
+        self.detections_broadcaster.close()
+
+
+class StreamRegistry:
+    """Registry of video streams analysed concurrently by a DetectionService"""
+
+    def __init__(self, service, max_streams: int = 32, results_dir: str = "results", max_finished: int = 32):
+        self.service = service
+        self.max_streams = max_streams
+        # Ended streams kept so their status and result can still be read
+        self.max_finished = max_finished
+        self.results_dir = results_dir
+        self._streams: Dict[str, VideoStream] = {}
+        self._id_locks: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def get(self, stream_id: str) -> Optional[VideoStream]:
+        with self._lock:
+            return self._streams.get(stream_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            streams = list(self._streams.values())
+        return [stream.info() for stream in streams]
+
+    def metric_samples(self) -> Iterator[Sample]:
+        with self._lock:
+            streams = list(self._streams.values())
+        yield "streams_active", "gauge", "Video streams currently running", {}, sum(s.active for s in streams)
+        for stream in streams:
+            yield from stream.metric_samples()
+
+    def active_count(self) -> int:
+        with self._lock:
+            return sum(1 for stream in self._streams.values() if stream.active)
+
+    def start(self, stream_id: str, video_path: str, **options) -> VideoStream:
+        """Start analysing video_path as stream_id, replacing any previous stream with that ID"""
+        if not STREAM_ID_PATTERN.match(stream_id):
+            raise ValueError(f"Invalid stream id: {stream_id}")
+
+        # Concurrent starts of one ID run one after the other, so each replaces
+        # the stream the previous one started instead of orphaning it
+        with self._id_lock(stream_id):
+            # Built first, so bad options (tile size, cascade stage) are rejected while
+            # the running stream is still untouched
+            stream = VideoStream(stream_id, video_path, self.service, self.results_dir, **options)
+            with self._lock:
+                self._check_limit(stream_id)
+
+            previous = self.get(stream_id)
+            if previous is not None:
+                previous.stop()
+
+            with self._lock:
+                self._check_limit(stream_id)
+                # Re-inserted at the end, so the dict stays in start order for pruning
+                self._streams.pop(stream_id, None)
+                self._streams[stream_id] = stream
+                pruned = self._prune()
+            stream.start()
+        for ended in pruned:
+            ended._close_viewers()
+        return stream
+
+    def _check_limit(self, stream_id: str):
+        """Raise StreamLimitError when the other active streams fill the limit; called with the lock held"""
+        active = sum(1 for s in self._streams.values() if s.active and s.stream_id != stream_id)
+        if active >= self.max_streams:
+            raise StreamLimitError(f"Maximum of {self.max_streams} active streams reached")
+
+    @contextmanager
+    def _id_lock(self, stream_id: str):
+        """Hold the start lock of one stream ID, dropping it once no caller needs it"""
+        with self._lock:
+            entry = self._id_locks.setdefault(stream_id, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._id_locks[stream_id]
+
+    def _prune(self) -> List[VideoStream]:
+        """Forget the oldest ended streams beyond max_finished and return them; called with the lock held"""
+        ended = [s for s in self._streams.values() if s.thread is not None and not s.active]
+        pruned = ended[:max(len(ended) - self.max_finished, 0)]
+        for stream in pruned:
+            del self._streams[stream.stream_id]
+        return pruned
+
+    def stop(self, stream_id: str) -> Optional[Dict[str, Any]]:
+        """Stop a stream and return its result, or None if it does not exist"""
+        stream = self.get(stream_id)
+        if stream is None:
+            return None
+        return stream.stop()
+
+    def stop_all(self):
+        with self._lock:
+            streams = list(self._streams.values())
+        for stream in streams:
+            stream.stop()
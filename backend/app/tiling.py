@@ -0,0 +1,185 @@
+import time
+import cv2
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from .inference import Detections
+
+
+def tile_grid(width: int, height: int, tile_size: int, overlap: float) -> List[Tuple[int, int, int, int]]:
+    """Overlapping xyxy tiles covering the frame; the last row and column are aligned to the frame edge"""
+    step = max(1, int(tile_size * (1.0 - overlap)))
+
+    def starts(length: int) -> List[int]:
+        if length <= tile_size:
+            return [0]
+        positions = list(range(0, length - tile_size, step))
+        positions.append(length - tile_size)
+        return positions
+
+    return [
+        (x, y, min(x + tile_size, width), min(y + tile_size, height))
+        for y in starts(height) for x in starts(width)
+    ]
+
+
+def roi_mask(shape: Tuple[int, int], polygons: Sequence[Sequence[Sequence[float]]]) -> np.ndarray:
+    """Rasterise region-of-interest polygons given in normalised [x, y] coordinates"""
+    height, width = shape
+    mask = np.zeros((height, width), dtype=np.uint8)
+    scale = np.array([width, height], dtype=np.float64)
+    for polygon in polygons:
+        points = np.round(np.asarray(polygon, dtype=np.float64) * scale).astype(np.int32)
+        cv2.fillPoly(mask, [points], 255)
+    return mask
+
+
+def merge_boxes(boxes: np.ndarray, scores: np.ndarray, classes: np.ndarray, threshold: float = 0.5) -> np.ndarray:
+    """Class-aware NMS over boxes from all tiles, returning the indices to keep
+
+    Overlap is measured as intersection over the smaller box, so a box cut off at
+    a tile border is merged into the complete box from the neighbouring tile even
+    though their IoU is low.
+    """
+    order = np.argsort(-scores)
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    keep = []
+    while len(order):
+        best, rest = order[0], order[1:]
+        keep.append(best)
+        x1 = np.maximum(boxes[best, 0], boxes[rest, 0])
+        y1 = np.maximum(boxes[best, 1], boxes[rest, 1])
+        x2 = np.minimum(boxes[best, 2], boxes[rest, 2])
+        y2 = np.minimum(boxes[best, 3], boxes[rest, 3])
+        intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+        overlap = intersection / np.maximum(np.minimum(areas[best], areas[rest]), 1e-9)
+        duplicate = (overlap >= threshold) & (classes[rest] == classes[best])
+        order = rest[~duplicate]
+    return np.array(keep, dtype=np.int64)
+
+
+class TilingStats:
+    """Throughput of sliced inference, for sizing hardware"""
+
+    def __init__(self):
+        self.frames = 0
+        self.tiles = 0
+        self.tiles_skipped = 0
+        self.megapixels = 0.0
+        self.total_ms = 0.0
+
+    def record(self, tiles: int, skipped: int, megapixels: float, elapsed_ms: float):
+        self.frames += 1
+        self.tiles += tiles
+        self.tiles_skipped += skipped
+        self.megapixels += megapixels
+        self.total_ms += elapsed_ms
+
+    def as_dict(self) -> Dict[str, Any]:
+        seconds = self.total_ms / 1000.0
+        return {
+            "frames": self.frames,
+            "tiles": self.tiles,
+            "tiles_skipped": self.tiles_skipped,
+            "tiles_per_frame": round(self.tiles / self.frames, 2) if self.frames else None,
+            "avg_frame_ms": round(self.total_ms / self.frames, 2) if self.frames else None,
+            "frames_per_second": round(self.frames / seconds, 2) if seconds else None,
+            "tiles_per_second": round(self.tiles / seconds, 2) if seconds else None,
+            "megapixels_per_second": round(self.megapixels / seconds, 2) if seconds else None,
+        }
+
+
+class Tiler:
+    """Slice high-resolution frames into overlapping tiles and merge the per-tile detections"""
+
+    def __init__(self, tile_size: int = 640, overlap: float = 0.2, roi: Optional[List] = None,
+                 full_frame: bool = True, merge_threshold: float = 0.5):
+        if tile_size < 32:
+            raise ValueError("Tile size must be at least 32 pixels")
+        if not 0.0 <= overlap < 1.0:
+            raise ValueError("Tile overlap must be in [0, 1)")
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.roi = roi
+        # A downscaled whole-frame pass keeps large fires that span several tiles
+        self.full_frame = full_frame
+        self.merge_threshold = merge_threshold
+        self.stats = TilingStats()
+        self._layout_shape = None
+        self._layout = None
+
+    def _tiles_for(self, shape: Tuple[int, int]):
+        """Tiles overlapping the ROI, cached per frame size, plus the number skipped"""
+        if self._layout_shape != shape:
+            height, width = shape
+            tiles = tile_grid(width, height, self.tile_size, self.overlap)
+            mask = roi_mask(shape, self.roi) if self.roi else None
+            if mask is not None:
+                kept = [t for t in tiles if mask[t[1]:t[3], t[0]:t[2]].any()]
+            else:
+                kept = tiles
+            self._layout = (kept, len(tiles) - len(kept), mask)
+            self._layout_shape = shape
+        return self._layout
+
+    def detect(self, frame, infer_fn) -> Detections:
+        """Run infer_fn once on every tile as a single batch and return merged frame detections"""
+        started = time.perf_counter()
+        tiles, skipped, mask = self._tiles_for(frame.shape[:2])
+
+        # Crops are views into the frame, so slicing costs no copies
+        sources = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in tiles]
+        offsets = [(x1, y1) for x1, y1, _, _ in tiles]
+        if self.full_frame and len(tiles) > 1:
+            sources.append(frame)
+            offsets.append((0, 0))
+
+        results = infer_fn(sources) if sources else []
+
+        boxes, scores, classes, names = [], [], [], {}
+        for result, (dx, dy) in zip(results, offsets):
+            data = result.boxes.data.cpu().numpy()
+            if not len(data):
+                continue
+            data[:, [0, 2]] += dx
+            data[:, [1, 3]] += dy
+            boxes.append(data[:, :4])
+            scores.append(data[:, -2])
+            classes.append(data[:, -1].astype(int))
+            names = result.names
+
+        detections = Detections.empty(names)
+        if boxes:
+            boxes = np.concatenate(boxes)
+            scores = np.concatenate(scores)
+            classes = np.concatenate(classes)
+
+            if mask is not None:
+                centre_x = ((boxes[:, 0] + boxes[:, 2]) / 2).astype(int).clip(0, mask.shape[1] - 1)
+                centre_y = ((boxes[:, 1] + boxes[:, 3]) / 2).astype(int).clip(0, mask.shape[0] - 1)
+                inside = mask[centre_y, centre_x] > 0
+                boxes, scores, classes = boxes[inside], scores[inside], classes[inside]
+
+            keep = np.asarray(merge_boxes(boxes, scores, classes, self.merge_threshold), dtype=np.int64)
+            detections = Detections(boxes[keep].astype(np.float32), scores[keep].astype(np.float32),
+                                    classes[keep].astype(np.int32), names)
+
+        height, width = frame.shape[:2]
+        self.stats.record(len(tiles), skipped, width * height / 1e6, (time.perf_counter() - started) * 1000.0)
+        return detections
+
+    def as_dict(self) -> Dict[str, Any]:
+        info = {
+            "tile_size": self.tile_size,
+            "overlap": self.overlap,
+            "roi": self.roi,
+            "full_frame": self.full_frame,
+        }
+        info.update(self.stats.as_dict())
+        return info
+
+
+def build_tiler(tile_size: Optional[int], overlap: Optional[float] = None, roi: Optional[List] = None) -> Optional[Tiler]:
+    """Build a tiler, or None when tile_size is 0 or unset and whole frames go to the model"""
+    if not tile_size:
+        return None
+    return Tiler(tile_size, overlap if overlap is not None else 0.2, roi)
@@ -0,0 +1,75 @@
+import os
+import hashlib
+import threading
+from typing import Any, Dict, Optional
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload grows past the configured size limit"""
+
+
+class UploadWriter:
+    """Writes an upload to disk chunk by chunk, hashing it as it goes
+
+    Readers such as a video stream can follow the file while it grows: they wait
+    for more bytes with wait_for_bytes() and stop once done is set.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.bytes_received = 0
+        self.done = False
+        self.failed = False
+        self._digest = hashlib.sha256()
+        self._condition = threading.Condition()
+        self._file = open(path, "wb")
+
+    def write(self, chunk: bytes):
+        if self.bytes_received + len(chunk) > self.max_bytes:
+            raise UploadTooLargeError(f"Upload exceeds the limit of {self.max_bytes // (1024 * 1024)} MB")
+        self._file.write(chunk)
+        # Flush so readers following the file see every chunk straight away
+        self._file.flush()
+        self._digest.update(chunk)
+        with self._condition:
+            self.bytes_received += len(chunk)
+            self._condition.notify_all()
+
+    def finish(self) -> str:
+        """Close the file and return the SHA-256 of its contents"""
+        self._file.close()
+        with self._condition:
+            self.done = True
+            self._condition.notify_all()
+        return self.sha256
+
+    def abort(self):
+        """Close and delete a failed or rejected upload"""
+        self._file.close()
+        with self._condition:
+            self.done = True
+            self.failed = True
+            self._condition.notify_all()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def wait_for_bytes(self, count: int, timeout: Optional[float] = None) -> bool:
+        """Block until count bytes have arrived or the upload ends; True if they arrived"""
+        with self._condition:
+            self._condition.wait_for(lambda: self.bytes_received >= count or self.done, timeout=timeout)
+            return self.bytes_received >= count
+
+    @property
+    def sha256(self) -> str:
+        return self._digest.hexdigest()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "bytes_received": self.bytes_received,
+            "done": self.done,
+            "failed": self.failed,
+        }
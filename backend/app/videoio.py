@@ -0,0 +1,355 @@
+import time
+import queue
+import shutil
+import threading
+import subprocess
+import cv2
+import numpy as np
+from typing import Optional, Tuple
+
+# Decode/encode implementations a stream can use. opencv needs nothing extra;
+# ffmpeg needs the ffmpeg binary on PATH and pyav needs the av package
+SUPPORTED_VIDEO_BACKENDS = ("opencv", "ffmpeg", "pyav")
+
+
+def resolve_video_backend(backend: str = "auto") -> str:
+    """Map auto to the first backend that can encode H.264 here: pyav, then ffmpeg, then opencv"""
+    if backend != "auto":
+        return backend
+    try:
+        import av  # noqa: F401
+        return "pyav"
+    except ImportError:
+        pass
+    if shutil.which("ffmpeg") is not None:
+        return "ffmpeg"
+    return "opencv"
+
+
+class VideoInfo:
+    """Frame rate and output frame size of an opened video"""
+
+    def __init__(self, fps: float, width: int, height: int, frame_count: int = 0):
+        self.fps = fps if fps and fps > 0 else 30.0
+        self.width = width
+        self.height = height
+        self.frame_count = frame_count
+
+
+def scaled_size(width: int, height: int, max_width: Optional[int]) -> Tuple[int, int]:
+    """Frame size after downscaling to at most max_width, keeping the aspect ratio and even dimensions"""
+    if not max_width or width <= max_width:
+        return width, height
+    scaled_height = int(round(height * max_width / width))
+    return max_width - max_width % 2, max(2, scaled_height - scaled_height % 2)
+
+
+def probe(path: str) -> VideoInfo:
+    """Read frame rate, size and frame count from the container"""
+    cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened():
+            raise IOError(f"Unable to open video file: {path}")
+        return VideoInfo(cap.get(cv2.CAP_PROP_FPS), int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                         int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)), int(cap.get(cv2.CAP_PROP_FRAME_COUNT)))
+    finally:
+        cap.release()
+
+
+class OpenCVReader:
+    """cv2.VideoCapture with hardware decoding where OpenCV supports it; frames are resized after decode"""
+
+    def __init__(self, path: str, max_width: Optional[int] = None):
+        self.path = path
+        params = []
+        if hasattr(cv2, "CAP_PROP_HW_ACCELERATION"):
+            params = [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+        self.cap = cv2.VideoCapture(path, cv2.CAP_ANY, params)
+        if not self.cap.isOpened():
+            raise IOError(f"Unable to open video file: {path}")
+        width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.source_size = (width, height)
+        self.info = VideoInfo(self.cap.get(cv2.CAP_PROP_FPS), *scaled_size(width, height, max_width),
+                              frame_count=int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT)))
+
+    def read(self) -> Optional[np.ndarray]:
+        ok, frame = self.cap.read()
+        if not ok:
+            return None
+        if (self.info.width, self.info.height) != self.source_size:
+            frame = cv2.resize(frame, (self.info.width, self.info.height), interpolation=cv2.INTER_LINEAR)
+        return frame
+
+    def seek(self, frame_index: int):
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+
+    def release(self):
+        self.cap.release()
+
+
+class FFmpegReader:
+    """ffmpeg subprocess decoding (hardware-accelerated where available) and scaling to raw BGR frames on a pipe"""
+
+    def __init__(self, path: str, max_width: Optional[int] = None, start_frame: int = 0):
+        if shutil.which("ffmpeg") is None:
+            raise RuntimeError("The ffmpeg video backend needs the ffmpeg binary on PATH")
+        self.path = path
+        self.max_width = max_width
+        source = probe(path)
+        self.info = VideoInfo(source.fps, *scaled_size(source.width, source.height, max_width),
+                              frame_count=source.frame_count)
+        self._frame_bytes = self.info.width * self.info.height * 3
+        self._process = None
+        self._start(start_frame)
+
+    def _start(self, start_frame: int):
+        command = ["ffmpeg", "-loglevel", "error", "-hwaccel", "auto", "-threads", "0"]
+        if start_frame:
+            command += ["-ss", f"{start_frame / self.info.fps:.3f}"]
+        command += [
+            "-i", self.path,
+            "-vf", f"scale={self.info.width}:{self.info.height}",
+            "-f", "rawvideo", "-pix_fmt", "bgr24", "-",
+        ]
+        self._process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                         bufsize=self._frame_bytes)
+
+    def read(self) -> Optional[np.ndarray]:
+        data = self._process.stdout.read(self._frame_bytes)
+        if len(data) < self._frame_bytes:
+            return None
+        return np.frombuffer(data, dtype=np.uint8).reshape(self.info.height, self.info.width, 3)
+
+    def seek(self, frame_index: int):
+        self.release()
+        self._start(frame_index)
+
+    def release(self):
+        if self._process is not None:
+            self._process.kill()
+            self._process.wait()
+            self._process = None
+
+
+class PyAVReader:
+    """PyAV decoding with codec threading; libswscale downscales and converts to BGR in the same step"""
+
+    # Display-matrix rotation (counter-clockwise degrees) to the cv2.rotate code that undoes it
+    _ROTATIONS = {-90: cv2.ROTATE_90_CLOCKWISE, 270: cv2.ROTATE_90_CLOCKWISE,
+                  90: cv2.ROTATE_90_COUNTERCLOCKWISE, -270: cv2.ROTATE_90_COUNTERCLOCKWISE,
+                  180: cv2.ROTATE_180, -180: cv2.ROTATE_180}
+
+    def __init__(self, path: str, max_width: Optional[int] = None):
+        import av
+
+        self.path = path
+        self._eof_errors = (StopIteration, av.error.EOFError, av.error.InvalidDataError)
+        self.container = av.open(path)
+        self.stream = self.container.streams.video[0]
+        # Frame- and slice-level threading inside the decoder
+        self.stream.thread_type = "AUTO"
+        self._frames = self.container.decode(self.stream)
+        self._skip = 0
+
+        # Phone videos are stored sideways with a rotation flag; OpenCV and ffmpeg apply it, so do the same
+        self._pending = self._next_frame()
+        rotation = int(getattr(self._pending, "rotation", 0) or 0) if self._pending is not None else 0
+        self._rotate = self._ROTATIONS.get(rotation)
+        context = self.stream.codec_context
+        width, height = context.width, context.height
+        if self._rotate in (cv2.ROTATE_90_CLOCKWISE, cv2.ROTATE_90_COUNTERCLOCKWISE):
+            width, height = height, width
+
+        fps = float(self.stream.average_rate) if self.stream.average_rate else 0.0
+        self.info = VideoInfo(fps, *scaled_size(width, height, max_width), frame_count=self.stream.frames)
+        # Size to scale to before rotating
+        self._decode_size = (self.info.width, self.info.height)
+        if self._rotate in (cv2.ROTATE_90_CLOCKWISE, cv2.ROTATE_90_COUNTERCLOCKWISE):
+            self._decode_size = (self.info.height, self.info.width)
+
+    def _next_frame(self):
+        try:
+            return next(self._frames)
+        except self._eof_errors:
+            return None
+
+    def read(self) -> Optional[np.ndarray]:
+        while True:
+            frame, self._pending = (self._pending, None) if self._pending is not None else (self._next_frame(), None)
+            if frame is None:
+                return None
+            if self._skip:
+                self._skip -= 1
+                continue
+            width, height = self._decode_size
+            image = frame.to_ndarray(width=width, height=height, format="bgr24")
+            return cv2.rotate(image, self._rotate) if self._rotate is not None else image
+
+    def seek(self, frame_index: int):
+        # Restart from the beginning and discard frames; exact for any codec and only used to resume
+        self.container.seek(0, stream=self.stream)
+        self._frames = self.container.decode(self.stream)
+        self._pending = None
+        self._skip = frame_index
+
+    def release(self):
+        self.container.close()
+
+
+def open_reader(path: str, backend: str = "opencv", max_width: Optional[int] = None):
+    """Open a video for decoding with the given backend, optionally downscaled to max_width at decode time"""
+    if backend == "opencv":
+        return OpenCVReader(path, max_width)
+    if backend == "ffmpeg":
+        return FFmpegReader(path, max_width)
+    if backend == "pyav":
+        return PyAVReader(path, max_width)
+    raise ValueError(f"Unsupported video backend: {backend}")
+
+
+class OpenCVSink:
+    """cv2.VideoWriter, using H.264 (avc1) when OpenCV's FFmpeg build has an encoder for it"""
+
+    def __init__(self, path: str, info: VideoInfo, encoder: str = "libx264"):
+        size = (info.width, info.height)
+        self.writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"avc1"), info.fps, size)
+        self.codec = "h264"
+        if not self.writer.isOpened():
+            # OpenCV wheels ship without an H.264 encoder; the output will not play in browsers
+            print("Warning: no H.264 encoder in OpenCV, writing mp4v; use the ffmpeg or pyav video backend")
+            self.writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), info.fps, size)
+            self.codec = "mp4v"
+
+    def write(self, frame: np.ndarray):
+        self.writer.write(frame)
+
+    def close(self):
+        self.writer.release()
+
+
+class FFmpegSink:
+    """Pipe raw BGR frames into an ffmpeg subprocess that encodes browser-playable H.264"""
+
+    def __init__(self, path: str, info: VideoInfo, encoder: str = "libx264"):
+        if shutil.which("ffmpeg") is None:
+            raise RuntimeError("The ffmpeg video backend needs the ffmpeg binary on PATH")
+        self.codec = encoder
+        command = [
+            "ffmpeg", "-loglevel", "error", "-y",
+            "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{info.width}x{info.height}", "-r", f"{info.fps:.3f}",
+            "-i", "-",
+            "-c:v", encoder, "-pix_fmt", "yuv420p",
+        ]
+        if encoder == "libx264":
+            command += ["-preset", "veryfast"]
+        # The index goes at the front so browsers can start playing before the download finishes
+        command += ["-movflags", "+faststart", path]
+        self._process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+    def write(self, frame: np.ndarray):
+        self._process.stdin.write(np.ascontiguousarray(frame).data)
+
+    def close(self):
+        self._process.stdin.close()
+        self._process.wait()
+
+
+class PyAVSink:
+    """Encode H.264 in-process with PyAV"""
+
+    def __init__(self, path: str, info: VideoInfo, encoder: str = "libx264"):
+        import av
+        from fractions import Fraction
+
+        self.codec = encoder
+        self.container = av.open(path, mode="w", options={"movflags": "+faststart"})
+        self.stream = self.container.add_stream(encoder, rate=Fraction(info.fps).limit_denominator(1001))
+        self.stream.width = info.width
+        self.stream.height = info.height
+        self.stream.pix_fmt = "yuv420p"
+        if encoder == "libx264":
+            self.stream.options = {"preset": "veryfast"}
+        self._frame_type = av.VideoFrame
+
+    def write(self, frame: np.ndarray):
+        video_frame = self._frame_type.from_ndarray(frame, format="bgr24")
+        for packet in self.stream.encode(video_frame):
+            self.container.mux(packet)
+
+    def close(self):
+        for packet in self.stream.encode():
+            self.container.mux(packet)
+        self.container.close()
+
+
+# Marks the end of the frames queued for a BackgroundWriter
+_CLOSE = object()
+
+
+class BackgroundWriter:
+    """Encode frames on a dedicated thread; write() only blocks when the bounded queue is full"""
+
+    def __init__(self, sink, queue_size: int = 32, latency=None):
+        self.sink = sink
+        # Optional histogram observing the encode time of every frame
+        self.latency = latency
+        self.frames_written = 0
+        self.error = None
+        self._queue = queue.Queue(maxsize=max(1, queue_size))
+        self._thread = threading.Thread(target=self._run, name="video-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def codec(self) -> str:
+        return self.sink.codec
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def write(self, frame: np.ndarray):
+        if self.error is None:
+            self._queue.put(frame)
+
+    def _run(self):
+        while True:
+            frame = self._queue.get()
+            if frame is _CLOSE:
+                break
+            if self.error is not None:
+                continue
+            try:
+                started = time.perf_counter()
+                self.sink.write(frame)
+                if self.latency is not None:
+                    self.latency.observe(time.perf_counter() - started)
+                self.frames_written += 1
+            except Exception as e:
+                # Keep draining so producers never block on a dead writer
+                self.error = e
+                print(f"Error encoding video: {e}")
+        try:
+            self.sink.close()
+        except Exception as e:
+            self.error = self.error or e
+            print(f"Error closing video: {e}")
+
+    def release(self):
+        """Encode every queued frame, finalise the file and wait for the writer thread"""
+        self._queue.put(_CLOSE)
+        self._thread.join()
+
+
+def open_writer(path: str, info: VideoInfo, backend: str = "opencv", encoder: str = "libx264",
+                queue_size: int = 32, latency=None) -> BackgroundWriter:
+    """Open a background H.264 writer for frames of info's size"""
+    if backend == "opencv":
+        sink = OpenCVSink(path, info, encoder)
+    elif backend == "ffmpeg":
+        sink = FFmpegSink(path, info, encoder)
+    elif backend == "pyav":
+        sink = PyAVSink(path, info, encoder)
+    else:
+        raise ValueError(f"Unsupported video backend: {backend}")
+    return BackgroundWriter(sink, queue_size, latency)
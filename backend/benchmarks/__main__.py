@@ -0,0 +1,34 @@
+"""
+Run the service suite: startup time and the in-process end-to-end service
+benchmark, each in a fresh interpreter, writing reports to benchmarks/reports.
+The model- and backend-specific benchmarks are run individually.
+
+Usage (from the backend directory):
+    python -m benchmarks [--only startup,service]
+"""
+
+import sys
+import argparse
+import subprocess
+
+from benchmarks.common import BACKEND_DIR
+
+SUITE = ("startup", "service")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", default=",".join(SUITE))
+    args = parser.parse_args()
+
+    failed = []
+    for name in args.only.split(","):
+        print(f"Running bench_{name}")
+        if subprocess.run([sys.executable, "-m", f"benchmarks.bench_{name}"], cwd=BACKEND_DIR).returncode != 0:
+            failed.append(name)
+    if failed:
+        raise SystemExit(f"Failed benchmarks: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Alarm dispatch against a local webhook stub: latency from the triggering
+frame's timestamp to receipt by the webhook and by a fast in-process sink
+running beside it, how long trigger() blocks the calling stream, dispatch order when fire and smoke are queued together, and
+how many triggers dedupe and rate limiting drop while a stream keeps
+reporting the same alarm every frame.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_alarms [--streams 8] [--delay-ms 20] [--output report.json]
+"""
+
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.common import summarize_ms, write_report
+from app.alarms import AlarmDispatcher, WebhookSink
+from app.metrics import MetricsRegistry
+
+
+class WebhookStub:
+    """Local HTTP server that records each alarm with its receipt time, optionally responding slowly"""
+
+    def __init__(self, delay_seconds: float = 0.0):
+        self.received = []
+        self.delay_seconds = delay_seconds
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                alarm = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                stub.received.append((time.time(), alarm))
+                time.sleep(stub.delay_seconds)
+                self.send_response(204)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/alarms"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def wait_for(self, count: int, timeout: float = 30.0):
+        deadline = time.monotonic() + timeout
+        while len(self.received) < count and time.monotonic() < deadline:
+            time.sleep(0.005)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class RecordingSink:
+    """In-process sink that only records when each alarm reached it"""
+
+    name = "recording"
+
+    def __init__(self):
+        self.received = []
+
+    def open(self):
+        pass
+
+    def send(self, alarm):
+        self.received.append(time.time())
+
+    def close(self):
+        pass
+
+
+def bench_latency(stream_count: int, delay_seconds: float):
+    """One fire alarm per stream, all raised at once; the slow webhook must not delay the fast sink"""
+    stub = WebhookStub(delay_seconds)
+    fast = RecordingSink()
+    dispatcher = AlarmDispatcher([WebhookSink(stub.url), fast], cooldown_seconds=60.0, metrics=MetricsRegistry())
+    frame_timestamp = time.time()
+    trigger_ms = []
+    for i in range(stream_count):
+        started = time.perf_counter()
+        dispatcher.trigger(f"stream{i}", "fire", frame_timestamp)
+        trigger_ms.append((time.perf_counter() - started) * 1000.0)
+    stub.wait_for(stream_count)
+    dispatcher.shutdown()
+    stub.close()
+    return {
+        "alarms": stream_count,
+        "trigger_ms": summarize_ms(trigger_ms),
+        "frame_to_webhook_ms": summarize_ms([(received - frame_timestamp) * 1000.0 for received, _ in stub.received]),
+        "frame_to_fast_sink_ms": summarize_ms([(received - frame_timestamp) * 1000.0 for received in fast.received]),
+    }
+
+
+def bench_priority(stream_count: int, delay_seconds: float):
+    """Smoke alarms queued before fire alarms behind a slow single-worker webhook; fire should still go out first"""
+    stub = WebhookStub(delay_seconds)
+    dispatcher = AlarmDispatcher([WebhookSink(stub.url, workers=1)], cooldown_seconds=60.0)
+    # Hold the worker on one alarm so the rest queue up together
+    dispatcher.trigger("warmup", "smoke")
+    stub.wait_for(1)
+    for i in range(stream_count):
+        dispatcher.trigger(f"stream{i}", "smoke")
+    for i in range(stream_count):
+        dispatcher.trigger(f"stream{i}", "fire")
+    stub.wait_for(2 * stream_count + 1)
+    dispatcher.shutdown()
+    stub.close()
+    order = [alarm["type"] for _, alarm in stub.received[1:]]
+    return {
+        "dispatched": len(order),
+        "fire_before_smoke": order == sorted(order, key=lambda alarm_type: alarm_type != "fire"),
+    }
+
+
+def bench_dedupe(frames: int, fps: float, cooldown_seconds: float):
+    """A stream that reports fire on every frame, and a second that reports smoke"""
+    stub = WebhookStub()
+    dispatcher = AlarmDispatcher([WebhookSink(stub.url)], cooldown_seconds=cooldown_seconds)
+    for _ in range(frames):
+        dispatcher.trigger("fire_stream", "fire", time.time())
+        dispatcher.trigger("smoke_stream", "smoke", time.time())
+        time.sleep(1.0 / fps)
+    dispatcher.shutdown()
+    stub.close()
+    stats = dispatcher.as_dict()
+    return {
+        "frames": frames,
+        "seconds": round(frames / fps, 2),
+        "cooldown_seconds": cooldown_seconds,
+        "triggered": stats["triggered"],
+        "deduplicated": stats["deduplicated"],
+        "rate_limited": stats["rate_limited"],
+        "delivered_per_stream": {
+            stream_id: sum(1 for _, alarm in stub.received if alarm["stream_id"] == stream_id)
+            for stream_id in ("fire_stream", "smoke_stream")
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--streams", type=int, default=8)
+    parser.add_argument("--delay-ms", type=float, default=20.0, help="Webhook response delay")
+    parser.add_argument("--frames", type=int, default=90)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--cooldown", type=float, default=1.0)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    delay_seconds = args.delay_ms / 1000.0
+    results = {
+        "latency": bench_latency(args.streams, delay_seconds),
+        "priority": bench_priority(args.streams, delay_seconds),
+        "dedupe": bench_dedupe(args.frames, args.fps, args.cooldown),
+    }
+    write_report("alarms", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Compare PyTorch, ONNX Runtime and OpenVINO inference latency and throughput
+on the sample images in backend/results.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_backends [--backends pytorch onnx openvino]
+        [--weights YOLOv11m_best.pt] [--batch 8] [--repeats 3] [--output report.json]
+"""
+
+import argparse
+import time
+
+from benchmarks.common import sample_images, summarize_ms, write_report
+from app.backends import SUPPORTED_BACKENDS, load_model
+
+
+def bench_backend(weights: str, backend: str, images, batch_size: int, repeats: int):
+    started = time.perf_counter()
+    model, artifact = load_model(weights, backend, "cpu")
+    load_ms = (time.perf_counter() - started) * 1000.0
+
+    # Warm-up so lazy initialisation is not counted as inference time
+    model(images[0], conf=0.4, verbose=False)
+
+    latencies = []
+    for _ in range(repeats):
+        for image in images:
+            started = time.perf_counter()
+            model(image, conf=0.4, verbose=False)
+            latencies.append((time.perf_counter() - started) * 1000.0)
+
+    batched_images = 0
+    started = time.perf_counter()
+    for _ in range(repeats):
+        for offset in range(0, len(images), batch_size):
+            batch = images[offset:offset + batch_size]
+            model(batch, conf=0.4, verbose=False)
+            batched_images += len(batch)
+    batched_seconds = time.perf_counter() - started
+
+    return {
+        "artifact": artifact,
+        "load_ms": round(load_ms, 1),
+        "latency_ms": summarize_ms(latencies),
+        "single_image_per_second": round(1000.0 / (sum(latencies) / len(latencies)), 2),
+        "batched_images_per_second": round(batched_images / batched_seconds, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backends", nargs="+", default=list(SUPPORTED_BACKENDS), choices=SUPPORTED_BACKENDS)
+    parser.add_argument("--weights", default="YOLOv11m_best.pt")
+    parser.add_argument("--batch", type=int, default=8)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    images = sample_images()
+    if not images:
+        raise SystemExit("No sample images found in backend/results")
+
+    results = {"images": len(images), "batch_size": args.batch, "backends": {}}
+    for backend in args.backends:
+        print(f"Benchmarking {backend} backend...")
+        try:
+            results["backends"][backend] = bench_backend(args.weights, backend, images, args.batch, args.repeats)
+        except Exception as e:
+            # Missing optional runtimes should not abort the comparison
+            results["backends"][backend] = {"error": str(e)}
+    write_report("backends", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
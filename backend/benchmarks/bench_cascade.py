@@ -0,0 +1,133 @@
+"""
+Measure the cascade's pass rates, per-stage latency and recall against the
+full model on the sample clips, and the resulting CPU per frame.
+
+The sample clips all show fire, so every frame should be escalated there and
+the cascade can only save work on footage without fire. --negatives takes a
+directory of images or videos without fire or smoke; the pass rate on those
+frames is the share of quiet footage that still reaches the full model, and
+the CPU per frame is reported separately for both sets.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_cascade [--mode color] [--weights YOLOv11m_best.pt]
+        [--screen-model YOLOv5m_best.pt] [--negatives DIR] [--max-frames 300] [--output report.json]
+"""
+
+import os
+import glob
+import argparse
+import time
+import cv2
+
+from benchmarks.common import sample_videos, write_report
+from app.backends import load_model
+from app.cascade import build_cascade
+from app.registry import ModelRegistry
+
+
+class _Service:
+    """Just enough of DetectionService for the model cascade stage"""
+
+    def __init__(self, registry):
+        self.models = registry
+
+
+def iter_frames(paths, max_frames: int):
+    """Frames of the given videos and still images, up to max_frames in total"""
+    frames = 0
+    for path in paths:
+        if frames >= max_frames:
+            return
+        image = cv2.imread(path) if not path.lower().endswith((".mp4", ".avi", ".mov", ".mkv")) else None
+        if image is not None:
+            frames += 1
+            yield image
+            continue
+        cap = cv2.VideoCapture(path)
+        while frames < max_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames += 1
+            yield frame
+        cap.release()
+
+
+def screen_negatives(cascade, paths, max_frames: int, full_ms: float):
+    """Pass rate and CPU per frame of the cascade on frames without fire or smoke"""
+    counters_before = [counter.total_ms for counter in cascade.counters]
+    frames = escalated = 0
+    for frame in iter_frames(paths, max_frames):
+        frames += 1
+        escalated += int(cascade.screen(frame))
+    if not frames:
+        return {"skipped": "no negative frames"}
+    screen_ms = sum(c.total_ms - before for c, before in zip(cascade.counters, counters_before)) / frames
+    pass_rate = escalated / frames
+    cascade_ms = screen_ms + pass_rate * full_ms
+    return {
+        "frames": frames,
+        "pass_rate": round(pass_rate, 4),
+        "screen_ms_per_frame": round(screen_ms, 3),
+        "cascade_ms_per_frame": round(cascade_ms, 2),
+        "cpu_reduction": round(full_ms / max(cascade_ms, 1e-9), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mode", default="color")
+    parser.add_argument("--weights", default="YOLOv11m_best.pt")
+    parser.add_argument("--screen-model", default="YOLOv5m_best.pt")
+    parser.add_argument("--negatives", default=None, help="Directory of images or videos without fire or smoke")
+    parser.add_argument("--max-frames", type=int, default=300)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    registry = ModelRegistry({"screen": args.screen_model}, active="screen", loader=load_model)
+    cascade = build_cascade(args.mode, _Service(registry), "screen")
+    model, _ = load_model(args.weights, "pytorch", "cpu")
+
+    reference_positive = 0
+    recalled = 0
+    model_ms = []
+    frames = 0
+    for frame in iter_frames(sample_videos(), args.max_frames):
+        frames += 1
+
+        escalated = cascade.screen(frame)
+
+        # The full model on every frame is the reference the cascade is judged against
+        started = time.perf_counter()
+        results = model(frame, conf=0.3, verbose=False)
+        model_ms.append((time.perf_counter() - started) * 1000.0)
+        if len(results[0].boxes) > 0:
+            reference_positive += 1
+            recalled += int(escalated)
+
+    if not frames:
+        raise SystemExit("No sample videos found in backend/results")
+
+    stats = cascade.as_dict()
+    # Later stages only run on frames earlier stages passed, so average over all frames
+    screen_ms = sum(counter.total_ms for counter in cascade.counters) / frames
+    full_ms = sum(model_ms) / len(model_ms)
+    cascade_ms = screen_ms + stats["escalation_rate"] * full_ms
+    results = {
+        "mode": args.mode,
+        "frames": frames,
+        "cascade": stats,
+        "reference_positive_frames": reference_positive,
+        "recall": round(recalled / reference_positive, 4) if reference_positive else None,
+        "full_model_ms_per_frame": round(full_ms, 2),
+        "cascade_ms_per_frame": round(cascade_ms, 2),
+        "cpu_reduction": round(full_ms / max(cascade_ms, 1e-9), 2),
+    }
+    if args.negatives:
+        negatives = sorted(glob.glob(os.path.join(args.negatives, "*")))
+        results["negatives"] = screen_negatives(cascade, negatives, args.max_frames, full_ms)
+    write_report("cascade", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Microbenchmark of detection extraction on crowded frames: the per-box loop
+(one .cls/.conf/.xyxy device transfer per box, a dict per detection) against
+Detections.from_result (one .data transfer per frame, arrays throughout),
+plus the downstream alarm check and wire serialisation on each.
+
+Frames are synthetic ultralytics results with N random boxes, so no model or
+video is needed. Use --device cuda to include the device-to-host copies.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_detections [--boxes 10,100,300] [--repeat 200]
+        [--device cpu] [--output report.json]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import torch
+from ultralytics.engine.results import Boxes
+
+from benchmarks.common import summarize_ms, write_report
+from app.inference import Detections
+
+NAMES = {0: "fire", 1: "smoke", 2: "other"}
+
+
+class SyntheticResult:
+    """The parts of an ultralytics Results object the extraction code touches"""
+
+    def __init__(self, boxes: Boxes):
+        self.boxes = boxes
+        self.names = NAMES
+
+
+def crowded_result(count: int, device: str, rng: np.random.Generator) -> SyntheticResult:
+    xy = rng.uniform(0, 1800, size=(count, 2))
+    wh = rng.uniform(10, 200, size=(count, 2))
+    data = np.column_stack([xy, xy + wh, rng.uniform(0.3, 1.0, count), rng.integers(0, len(NAMES), count)])
+    return SyntheticResult(Boxes(torch.tensor(data, dtype=torch.float32, device=device), (1080, 1920)))
+
+
+def legacy_extract(result):
+    """The per-box loop the stream and camera paths used before Detections"""
+    detections = []
+    for box in result.boxes:
+        detections.append({
+            "class": result.names[int(box.cls)],
+            "confidence": float(box.conf),
+            "bbox": box.xyxy[0].tolist() if hasattr(box, 'xyxy') else []
+        })
+    return detections
+
+
+def legacy_downstream(detections):
+    fire = any("fire" in d["class"].lower() for d in detections)
+    rows = [[d["class"], round(d["confidence"], 3)] + [int(v) for v in d["bbox"]] for d in detections]
+    return fire, rows
+
+
+def vectorized_downstream(detections: Detections):
+    return detections.has("fire"), detections.compact()
+
+
+def time_ms(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000.0)
+    return summarize_ms(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--boxes", default="10,100,300", help="Comma-separated detections per frame")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    runs = {}
+    for count in [int(n) for n in args.boxes.split(",")]:
+        result = crowded_result(count, args.device, rng)
+        legacy = legacy_extract(result)
+        vectorized = Detections.from_result(result)
+        runs[str(count)] = {
+            "legacy_extract_ms": time_ms(lambda: legacy_extract(result), args.repeat),
+            "vectorized_extract_ms": time_ms(lambda: Detections.from_result(result), args.repeat),
+            "legacy_downstream_ms": time_ms(lambda: legacy_downstream(legacy), args.repeat),
+            "vectorized_downstream_ms": time_ms(lambda: vectorized_downstream(vectorized), args.repeat),
+        }
+
+    write_report("detections", {"device": args.device, "repeat": args.repeat, "boxes": runs}, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+End-to-end benchmark of the detection service, driving the FastAPI app
+in-process through the ASGI test client with the sample input_*.jpg and
+input_*.mp4 files in backend/results:
+
+  images   /predict latency p50/p95/p99 and throughput at several client
+           concurrencies
+  video    analysis FPS of one stream over each sample video
+  streams  aggregate and per-stream FPS with several concurrent streams
+  sse      server CPU per frame with 0..N subscribers on /streams/{id}/events
+
+Uploads and annotated results go to a temporary directory and the result
+cache is disabled unless --cache is given, so repeated images are really
+inferred. Startup time is measured separately by bench_startup.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_service [--sections images,video,streams,sse]
+        [--concurrency 1,4,8] [--repeat 5] [--streams 1,2,4] [--subscribers 0,1,4,16]
+        [--cache] [--output report.json]
+"""
+
+import os
+import time
+import argparse
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import sample_images, sample_videos, summarize_ms, write_report
+
+SECTIONS = ("images", "video", "streams", "sse")
+FINISHED_STATUSES = ("finished", "stopped", "error")
+
+
+def wait_until_ready(client, timeout: float = 300.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = client.get("/ready")
+        if response.status_code == 200:
+            return response.json()
+        if response.json().get("status") == "error":
+            raise RuntimeError(f"Model warm-up failed: {response.json().get('error')}")
+        time.sleep(0.2)
+    raise TimeoutError("Detection service did not become ready")
+
+
+def bench_images(client, concurrency_levels, repeat: int):
+    images = [(os.path.basename(path), open(path, "rb").read()) for path in sample_images()]
+    if not images:
+        return {"skipped": "no sample images"}
+    jobs = images * repeat
+
+    def predict(job):
+        name, contents = job
+        started = time.perf_counter()
+        response = client.post("/predict", files={"file": (name, contents, "image/jpeg")})
+        response.raise_for_status()
+        return (time.perf_counter() - started) * 1000.0, response.json().get("queue_ms", 0.0)
+
+    runs = {}
+    for concurrency in concurrency_levels:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(predict, jobs))
+        elapsed = time.perf_counter() - started
+        runs[str(concurrency)] = {
+            "latency_ms": summarize_ms([latency for latency, _ in samples]),
+            "server_queue_ms": summarize_ms([queue_ms for _, queue_ms in samples]),
+            "images_per_second": round(len(samples) / elapsed, 2),
+        }
+    return {"images": len(images), "requests_per_level": len(jobs), "concurrency": runs}
+
+
+def start_streams(client, stream_ids, video_path: str):
+    for stream_id in stream_ids:
+        response = client.post(f"/streams/{stream_id}/start", json={"video_path": video_path})
+        response.raise_for_status()
+
+
+def wait_for_streams(client, stream_ids, timeout: float = 600.0):
+    """Poll /streams until every stream has ended and return their infos"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        infos = {s["stream_id"]: s for s in client.get("/streams").json()["streams"] if s["stream_id"] in stream_ids}
+        if all(infos[i]["status"] in FINISHED_STATUSES for i in stream_ids):
+            return [infos[i] for i in stream_ids]
+        time.sleep(0.05)
+    for stream_id in stream_ids:
+        client.post(f"/streams/{stream_id}/stop")
+    raise TimeoutError(f"Streams {stream_ids} did not finish within {timeout} s")
+
+
+def run_streams(client, stream_ids, video_path: str):
+    """Analyse one video on several streams at once; returns (wall seconds, stream infos)"""
+    started = time.perf_counter()
+    start_streams(client, stream_ids, video_path)
+    infos = wait_for_streams(client, stream_ids)
+    return time.perf_counter() - started, infos
+
+
+def bench_video(client):
+    runs = []
+    for path in sample_videos():
+        elapsed, (info,) = run_streams(client, ["bench"], path)
+        runs.append({
+            "video": os.path.basename(path),
+            "status": info["status"],
+            "frames": info["frames_processed"],
+            "seconds": round(elapsed, 2),
+            "fps": round(info["frames_processed"] / elapsed, 1),
+            "pipeline": info["pipeline"],
+        })
+    return {"videos": runs} if runs else {"skipped": "no sample videos"}
+
+
+def bench_streams(client, stream_counts):
+    videos = sample_videos()
+    if not videos:
+        return {"skipped": "no sample videos"}
+    runs, single_fps = {}, None
+    for count in stream_counts:
+        stream_ids = [f"bench{i}" for i in range(count)]
+        elapsed, infos = run_streams(client, stream_ids, videos[0])
+        frames = sum(info["frames_processed"] for info in infos)
+        aggregate_fps = frames / elapsed
+        if single_fps is None:
+            single_fps = aggregate_fps / count
+        runs[str(count)] = {
+            "seconds": round(elapsed, 2),
+            "aggregate_fps": round(aggregate_fps, 1),
+            "per_stream_fps": round(aggregate_fps / count, 1),
+            # 1.0 means adding streams costs no per-stream throughput
+            "scaling_efficiency": round(aggregate_fps / (count * single_fps), 3) if single_fps else None,
+        }
+    return {"video": os.path.basename(videos[0]), "streams": runs}
+
+
+def bench_sse(client, subscriber_counts):
+    videos = sample_videos()
+    if not videos:
+        return {"skipped": "no sample videos"}
+    runs, baseline = {}, None
+    for count in subscriber_counts:
+        received = []
+
+        def subscribe():
+            body = client.get("/streams/fanout/events").text
+            received.append(body.count("data: "))
+
+        # CPU time covers the in-process clients too, so compare against the no-subscriber run
+        cpu_started = time.process_time()
+        start_streams(client, ["fanout"], videos[0])
+        # The test client returns a streaming body once the stream closes, so each viewer gets a thread
+        viewers = [threading.Thread(target=subscribe, daemon=True) for _ in range(count)]
+        for viewer in viewers:
+            viewer.start()
+        info, = wait_for_streams(client, ["fanout"])
+        # Viewers are disconnected when the video ends
+        for viewer in viewers:
+            viewer.join(timeout=30.0)
+        cpu_ms_per_frame = (time.process_time() - cpu_started) * 1000.0 / max(info["frames_processed"], 1)
+        if count == 0:
+            baseline = cpu_ms_per_frame
+        runs[str(count)] = {
+            "frames": info["frames_processed"],
+            "frames_encoded": info["broadcast"]["frames_encoded"],
+            "events_per_subscriber": round(sum(received) / count, 1) if count else 0,
+            "cpu_ms_per_frame": round(cpu_ms_per_frame, 3),
+            "cpu_ms_per_frame_per_subscriber":
+                round((cpu_ms_per_frame - baseline) / count, 3) if count and baseline is not None else None,
+        }
+    return {"video": os.path.basename(videos[0]), "subscribers": runs}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sections", default=",".join(SECTIONS))
+    parser.add_argument("--concurrency", default="1,4,8", help="Concurrent /predict clients")
+    parser.add_argument("--repeat", type=int, default=5, help="Passes over the sample images per concurrency level")
+    parser.add_argument("--streams", default="1,2,4", help="Concurrent stream counts")
+    parser.add_argument("--subscribers", default="0,1,4,16", help="SSE subscriber counts")
+    parser.add_argument("--cache", action="store_true", help="Keep the result cache enabled")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    # Configuration is read when the app is imported
+    with tempfile.TemporaryDirectory(prefix="safds-bench-") as results_dir:
+        os.environ["SAFDS_RESULTS_DIR"] = results_dir
+        if not args.cache:
+            os.environ["SAFDS_RESULT_CACHE_MAX_MB"] = "0"
+
+        import main as app_main
+        from fastapi.testclient import TestClient
+
+        sections = args.sections.split(",")
+        results = {"cache": args.cache}
+        with TestClient(app_main.app) as client:
+            results["ready"] = wait_until_ready(client)
+            if "images" in sections:
+                results["images"] = bench_images(client, [int(n) for n in args.concurrency.split(",")], args.repeat)
+            if "video" in sections:
+                results["video"] = bench_video(client)
+            if "streams" in sections:
+                results["streams"] = bench_streams(client, [int(n) for n in args.streams.split(",")])
+            if "sse" in sections:
+                results["sse"] = bench_sse(client, [int(n) for n in args.subscribers.split(",")])
+
+    write_report("service", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
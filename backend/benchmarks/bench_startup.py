@@ -0,0 +1,66 @@
+"""
+Measure server startup: how long until the app can accept connections and
+answer /health, and how long the background model warm-up takes until
+/ready reports ready.
+
+Each measurement runs in a fresh interpreter so import caches do not hide
+the cost of heavy imports.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_startup [--runs 3] [--output report.json]
+"""
+
+import sys
+import json
+import argparse
+import subprocess
+
+from benchmarks.common import BACKEND_DIR, summarize_ms, write_report
+
+# Time to import the app and serve /health, then (optionally) the full warm-up
+_PROBE = """
+import json, time
+started = time.perf_counter()
+import main
+from fastapi.testclient import TestClient
+client = TestClient(main.app)
+health = client.get("/health").status_code
+app_ready_ms = (time.perf_counter() - started) * 1000.0
+report = {"app_ready_ms": app_ready_ms, "health_status": health}
+if WARM_UP:
+    main.detection_service.warm_up()
+    report["model_ready_ms"] = (time.perf_counter() - started) * 1000.0
+    report["warm_up"] = main.detection_service.startup_timings
+    report["ready_status"] = client.get("/ready").status_code
+print("BENCH " + json.dumps(report))
+"""
+
+
+def run_probe(warm_up: bool) -> dict:
+    script = f"WARM_UP = {warm_up}\n{_PROBE}"
+    output = subprocess.run([sys.executable, "-c", script], cwd=BACKEND_DIR, capture_output=True, text=True,
+                            check=True).stdout
+    line = next(line for line in output.splitlines() if line.startswith("BENCH "))
+    return json.loads(line[len("BENCH "):])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--skip-warm-up", action="store_true", help="Only measure time to /health")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    probes = [run_probe(not args.skip_warm_up) for _ in range(args.runs)]
+    results = {
+        "runs": args.runs,
+        "app_ready_ms": summarize_ms([p["app_ready_ms"] for p in probes]),
+    }
+    if not args.skip_warm_up:
+        results["model_ready_ms"] = summarize_ms([p["model_ready_ms"] for p in probes])
+        results["warm_up"] = probes[-1]["warm_up"]
+    write_report("startup", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
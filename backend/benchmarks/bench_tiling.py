@@ -0,0 +1,66 @@
+"""
+Compare whole-frame and sliced inference on the sample clips: latency,
+throughput and how many detections each finds. Frames can be upscaled to
+simulate high-resolution CCTV.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_tiling [--weights YOLOv11m_best.pt] [--tile-size 640]
+        [--overlap 0.2] [--width 3840] [--max-frames 100] [--output report.json]
+"""
+
+import argparse
+import time
+import cv2
+
+from benchmarks.common import sample_videos, summarize_ms, write_report
+from app.backends import load_model, select_device
+from app.tiling import Tiler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--weights", default="YOLOv11m_best.pt")
+    parser.add_argument("--tile-size", type=int, default=640)
+    parser.add_argument("--overlap", type=float, default=0.2)
+    parser.add_argument("--width", type=int, default=3840, help="Resize frames to this width (0 keeps the source size)")
+    parser.add_argument("--max-frames", type=int, default=100)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    model, _ = load_model(args.weights, "pytorch", select_device())
+    tiler = Tiler(args.tile_size, args.overlap)
+    infer = lambda sources: model(sources, conf=0.3, verbose=False)
+
+    whole_ms, tiled_ms = [], []
+    whole_detections = tiled_detections = 0
+    frames = 0
+    for video_path in sample_videos():
+        cap = cv2.VideoCapture(video_path)
+        while frames < args.max_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if args.width:
+                height = int(frame.shape[0] * args.width / frame.shape[1])
+                frame = cv2.resize(frame, (args.width, height), interpolation=cv2.INTER_CUBIC)
+            frames += 1
+
+            started = time.perf_counter()
+            whole_detections += len(infer(frame)[0].boxes)
+            whole_ms.append((time.perf_counter() - started) * 1000.0)
+
+            started = time.perf_counter()
+            tiled_detections += len(tiler.detect(frame, infer))
+            tiled_ms.append((time.perf_counter() - started) * 1000.0)
+        cap.release()
+
+    write_report("tiling", {
+        "frames": frames,
+        "frame_width": args.width or None,
+        "whole_frame": {"latency_ms": summarize_ms(whole_ms), "detections": whole_detections},
+        "tiled": {"latency_ms": summarize_ms(tiled_ms), "detections": tiled_detections, **tiler.as_dict()},
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
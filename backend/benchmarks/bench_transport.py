@@ -0,0 +1,93 @@
+"""
+Compare the base64-in-JSON SSE frame transport with raw MJPEG plus a
+detections-only SSE channel: bytes per second and server CPU per frame.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_transport [--frames 150] [--output report.json]
+"""
+
+import argparse
+import time
+import cv2
+import numpy as np
+
+from benchmarks.common import sample_videos, write_report
+from app.broadcast import EncodedFrame, detections_event
+from app.inference import Detections
+
+# A representative set of boxes so the JSON payloads carry realistic metadata
+SAMPLE_DETECTIONS = Detections(
+    np.array([[120.4, 88.1, 342.9, 301.7], [40.0, 10.5, 500.2, 280.3], [380.2, 60.9, 610.0, 250.1]], dtype=np.float32),
+    np.array([0.87, 0.64, 0.41], dtype=np.float32),
+    np.array([0, 1, 1], dtype=np.int32),
+    {0: "fire", 1: "smoke"}
+)
+
+
+def load_frames(max_frames: int):
+    frames = []
+    for video_path in sample_videos():
+        cap = cv2.VideoCapture(video_path)
+        while len(frames) < max_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+        if len(frames) >= max_frames:
+            break
+    return frames
+
+
+def measure(jpegs, serialise, fps: float):
+    total_bytes = 0
+    cpu_started = time.process_time()
+    for index, jpeg in enumerate(jpegs):
+        total_bytes += serialise(index, jpeg)
+    cpu_seconds = time.process_time() - cpu_started
+    return {
+        "bytes_per_frame": round(total_bytes / len(jpegs)),
+        "bytes_per_second": round(total_bytes / len(jpegs) * fps),
+        "cpu_ms_per_frame": round(cpu_seconds * 1000.0 / len(jpegs), 3),
+    }
+
+
+def legacy_sse(index, jpeg):
+    return len(EncodedFrame("bench", jpeg, SAMPLE_DETECTIONS, time.time()).sse_event().encode("utf-8"))
+
+
+def binary_mjpeg(index, jpeg):
+    part = EncodedFrame("bench", jpeg, SAMPLE_DETECTIONS, time.time()).mjpeg_part()
+    metadata = detections_event("bench", SAMPLE_DETECTIONS, time.time()).encode("utf-8")
+    return len(part) + len(metadata)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--frames", type=int, default=150)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    frames = load_frames(args.frames)
+    if not frames:
+        raise SystemExit("No sample videos found in backend/results")
+
+    # JPEG encoding is shared by both transports, so it is done once up front
+    jpegs = [cv2.imencode('.jpg', frame)[1].tobytes() for frame in frames]
+
+    legacy = measure(jpegs, legacy_sse, args.fps)
+    binary = measure(jpegs, binary_mjpeg, args.fps)
+    results = {
+        "frames": len(jpegs),
+        "fps": args.fps,
+        "sse_base64_json": legacy,
+        "mjpeg_plus_detections_sse": binary,
+        "bandwidth_ratio": round(legacy["bytes_per_second"] / max(binary["bytes_per_second"], 1), 3),
+        "cpu_ratio": round(legacy["cpu_ms_per_frame"] / max(binary["cpu_ms_per_frame"], 1e-6), 2),
+    }
+    write_report("transport", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
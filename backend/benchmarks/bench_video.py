@@ -0,0 +1,91 @@
+"""
+Measure decode and encode throughput of each video backend on the sample
+clips in results/input_*.mp4: decode at source resolution, decode downscaled
+to the model input width, and H.264 encode through the background writer.
+
+Backends whose dependencies are missing are reported as skipped.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_video [--backends opencv,ffmpeg,pyav] [--width 640]
+        [--encoder libx264] [--output report.json]
+"""
+
+import os
+import time
+import argparse
+import tempfile
+
+from benchmarks.common import sample_videos, write_report
+from app.videoio import SUPPORTED_VIDEO_BACKENDS, open_reader, open_writer
+
+
+def decode_fps(path: str, backend: str, max_width=None):
+    """Decode every frame; returns (frames, fps, frame size)"""
+    reader = open_reader(path, backend, max_width)
+    frames = []
+    started = time.perf_counter()
+    try:
+        while True:
+            frame = reader.read()
+            if frame is None:
+                break
+            frames.append(frame)
+    finally:
+        reader.release()
+    elapsed = time.perf_counter() - started
+    return frames, len(frames) / elapsed if elapsed else 0.0, reader.info
+
+
+def encode_fps(frames, info, backend: str, encoder: str):
+    """Encode frames through the background writer; returns (fps, codec, output size in bytes)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "encoded.mp4")
+        started = time.perf_counter()
+        writer = open_writer(path, info, backend, encoder)
+        for frame in frames:
+            writer.write(frame)
+        writer.release()
+        elapsed = time.perf_counter() - started
+        if writer.error is not None:
+            raise writer.error
+        return len(frames) / elapsed if elapsed else 0.0, writer.codec, os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default=",".join(SUPPORTED_VIDEO_BACKENDS))
+    parser.add_argument("--width", type=int, default=640, help="Downscaled decode width")
+    parser.add_argument("--encoder", default="libx264")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    results = {}
+    for backend in args.backends.split(","):
+        runs = []
+        try:
+            for path in sample_videos():
+                frames, full_fps, info = decode_fps(path, backend)
+                _, scaled_fps, scaled_info = decode_fps(path, backend, args.width)
+                write_fps, codec, size = encode_fps(frames, info, backend, args.encoder)
+                runs.append({
+                    "video": os.path.basename(path),
+                    "frames": len(frames),
+                    "source_size": [info.width, info.height],
+                    "decode_fps": round(full_fps, 1),
+                    "decode_scaled_fps": round(scaled_fps, 1),
+                    "scaled_size": [scaled_info.width, scaled_info.height],
+                    "encode_fps": round(write_fps, 1),
+                    "codec": codec,
+                    "encoded_mb": round(size / 1e6, 2),
+                    "source_mb": round(os.path.getsize(path) / 1e6, 2),
+                })
+        except Exception as e:
+            results[backend] = {"skipped": str(e)}
+            continue
+        results[backend] = {"videos": runs}
+
+    write_report("video_io", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
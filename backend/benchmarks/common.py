@@ -0,0 +1,67 @@
+import os
+import sys
+import glob
+import json
+import platform
+from datetime import datetime
+from typing import Any, Dict, List
+
+# Benchmarks are run from the backend directory: python -m benchmarks.<name>
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "results")
+REPORTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "reports")
+
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def sample_images() -> List[str]:
+    """Sample input images shipped in backend/results"""
+    return sorted(glob.glob(os.path.join(RESULTS_DIR, "input_*.jpg")))
+
+
+def sample_videos() -> List[str]:
+    """Sample input videos shipped in backend/results"""
+    return sorted(glob.glob(os.path.join(RESULTS_DIR, "input_*.mp4")))
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def summarize_ms(values: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds"""
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values), 2),
+        "p50": round(percentile(values, 50), 2),
+        "p95": round(percentile(values, 95), 2),
+        "p99": round(percentile(values, 99), 2),
+        "max": round(max(values), 2),
+    }
+
+
+def write_report(name: str, results: Dict[str, Any], output: str = None) -> str:
+    """Write a JSON report with environment details so runs can be diffed between versions"""
+    report = {
+        "benchmark": name,
+        "created_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    if output is None:
+        os.makedirs(REPORTS_DIR, exist_ok=True)
+        output = os.path.join(REPORTS_DIR, f"{name}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    print(f"Report written to: {output}")
+    return output
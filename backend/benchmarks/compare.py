@@ -0,0 +1,59 @@
+"""
+Diff two benchmark reports written by write_report, e.g. the same benchmark
+before and after a change: prints every numeric result side by side with its
+relative change.
+
+Usage (from the backend directory):
+    python -m benchmarks.compare old.json new.json [--threshold 5]
+"""
+
+import json
+import argparse
+from typing import Any, Dict
+
+
+def flatten(value: Any, prefix: str = "") -> Dict[str, float]:
+    """Numeric leaves of a nested report keyed by their dotted path"""
+    if isinstance(value, dict):
+        flat = {}
+        for key, item in value.items():
+            flat.update(flatten(item, f"{prefix}.{key}" if prefix else str(key)))
+        return flat
+    if isinstance(value, list):
+        flat = {}
+        for index, item in enumerate(value):
+            flat.update(flatten(item, f"{prefix}[{index}]"))
+        return flat
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {prefix: float(value)}
+    return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.0, help="Only show changes of at least this many percent")
+    args = parser.parse_args()
+
+    with open(args.old) as f:
+        old_report = json.load(f)
+    with open(args.new) as f:
+        new_report = json.load(f)
+    if old_report.get("benchmark") != new_report.get("benchmark"):
+        print(f"Warning: comparing {old_report.get('benchmark')} with {new_report.get('benchmark')}")
+
+    old, new = flatten(old_report["results"]), flatten(new_report["results"])
+    width = max((len(key) for key in old.keys() | new.keys()), default=0)
+    for key in sorted(old.keys() | new.keys()):
+        before, after = old.get(key), new.get(key)
+        if before is None or after is None:
+            print(f"{key:<{width}}  {before if before is not None else '-':>12}  {after if after is not None else '-':>12}")
+            continue
+        change = (after - before) / abs(before) * 100.0 if before else (0.0 if after == before else float("inf"))
+        if abs(change) >= args.threshold:
+            print(f"{key:<{width}}  {before:>12g}  {after:>12g}  {change:+8.1f}%")
+
+
+if __name__ == "__main__":
+    main()
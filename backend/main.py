@@ -1,18 +1,21 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from app.detection import router as detection_router
-import os
+from app.detection import router as detection_router, detection_service
 
-# Create FastAPI app
-app = FastAPI()
 
-# Create results directory if it doesn't exist
-RESULTS_DIR = "results"
-os.makedirs(RESULTS_DIR, exist_ok=True)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the model in the background so health and login answer immediately
+    detection_service.start_warm_up()
+    yield
+    # Let queued result writes reach the disk and queued alarms reach their sinks
+    detection_service.storage.shutdown()
+    detection_service.alarms.shutdown()
+
 
-# Mount static folder so files can be accessed in browser
-app.mount("/results", StaticFiles(directory=RESULTS_DIR), name="results")
+# Create FastAPI app
+app = FastAPI(lifespan=lifespan)
 
 # Allow CORS for local frontend development
 app.add_middleware(
@@ -0,0 +1,177 @@
+"""
+Stand-ins shared by the tests in test_functions
+
+The stubs are plain classes and functions so a test file can import them and
+still run on its own; the fixtures below wrap them for pytest.
+"""
+
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.broadcast import CLOSED  # noqa: E402
+from app import config  # noqa: E402
+from app.services import DetectionService  # noqa: E402
+from app.storage import ResultStore  # noqa: E402
+
+
+class FakeBoxes:
+    """Mimics result.boxes.data, which detections are read from with .cpu().numpy()"""
+
+    def __init__(self, data: np.ndarray):
+        self.data = self
+        self._array = data
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self._array.copy()
+
+
+class FakeResult:
+    """An ultralytics-like result holding rows of x1, y1, x2, y2, confidence, class"""
+
+    def __init__(self, rows=(), names: dict = None):
+        self.boxes = FakeBoxes(np.array(rows, dtype=np.float32).reshape(-1, 6))
+        self.names = names if names is not None else {0: "fire", 1: "smoke"}
+
+
+class RecordingModel:
+    """Stands in for the model: records each batch it is called with and answers every source
+
+    predict() builds the answer for one source; the default echoes it back as
+    "result:<source>". Subclasses override it to return ultralytics-like results.
+    """
+
+    def __init__(self, delay_seconds: float = 0.0):
+        self.batches = []
+        self.delay_seconds = delay_seconds
+
+    def __call__(self, sources, **kwargs):
+        self.batches.append(list(sources))
+        time.sleep(self.delay_seconds)
+        return [self.predict(source) for source in sources]
+
+    def predict(self, source):
+        return f"result:{source}"
+
+
+class FakeDetector(RecordingModel):
+    """Finds one confident fire box in every frame"""
+
+    names = {0: "fire", 1: "smoke"}
+
+    def predict(self, source):
+        return FakeResult([[10, 20, 100, 120, 0.9, 0]], self.names)
+
+
+class FakeLoader:
+    """Stands in for load_model: builds a model with model_factory and returns the weights file as its artifact"""
+
+    def __init__(self, delay_seconds: float = 0.0, fail: bool = False, model_factory=object):
+        self.loads = []
+        self.delay_seconds = delay_seconds
+        self.fail = fail
+        self.model_factory = model_factory
+
+    def __call__(self, path, backend, device):
+        self.loads.append(os.path.basename(path))
+        time.sleep(self.delay_seconds)
+        if self.fail:
+            raise RuntimeError("corrupt weights")
+        return self.model_factory(), path
+
+
+def write_weights(root: str, sizes_mb: dict) -> dict:
+    """Write a placeholder weights file of the given size for each model name"""
+    paths = {}
+    for name, size_mb in sizes_mb.items():
+        paths[name] = os.path.join(root, f"{name}.pt")
+        with open(paths[name], "wb") as f:
+            f.write(b"\0" * int(size_mb * 1024 * 1024))
+    return paths
+
+
+def write_video(path: str, frames: int, size=(160, 120), fps: float = 30.0) -> str:
+    """Write a short mp4 whose frames are filled with a different grey level each"""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+    for i in range(frames):
+        writer.write(np.full((size[1], size[0], 3), i * 7 % 256, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+def wait_until(condition, timeout: float = 5.0) -> bool:
+    """Poll condition until it holds or the timeout passes, and return its last value"""
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+def drain(subscription, timeout: float = 1.0):
+    """Collect a viewer's payloads until its subscription closes or stays idle for the timeout"""
+    payloads = []
+    while True:
+        payload = subscription.get(timeout=timeout)
+        if payload is CLOSED or payload is None:
+            return payloads
+        payloads.append(payload)
+
+
+@pytest.fixture
+def model():
+    return RecordingModel()
+
+
+@pytest.fixture
+def loader():
+    return FakeLoader()
+
+
+@pytest.fixture
+def make_weights(tmp_path):
+    """write_weights() into the test's temporary directory"""
+    return lambda sizes_mb: write_weights(str(tmp_path), sizes_mb)
+
+
+@pytest.fixture
+def make_store(tmp_path):
+    """ResultStore factory rooted in the test's temporary directory; stores are shut down afterwards"""
+    stores = []
+
+    def make(**options):
+        stores.append(ResultStore(str(tmp_path), **options))
+        return stores[-1]
+
+    yield make
+    for store in stores:
+        store.shutdown()
+
+
+@pytest.fixture
+def make_video(tmp_path):
+    """write_video() into the test's temporary directory"""
+    return lambda name, frames, **options: write_video(str(tmp_path / name), frames, **options)
+
+
+@pytest.fixture
+def detection_service(tmp_path, monkeypatch, make_weights):
+    """A real DetectionService whose only model is a FakeDetector, writing results under tmp_path"""
+    monkeypatch.setattr(config, "RESULTS_DIR", str(tmp_path / "results"))
+    # The audio sink would try to play the alarm sounds
+    monkeypatch.setattr(config, "ALARM_SINKS", "sse")
+    service = DetectionService(make_weights({"fake": 0.1}), active_model="fake")
+    service.models.loader = FakeLoader(model_factory=FakeDetector)
+    service.ready.set()
+    yield service
+    service.streams.stop_all()
+    service.alarms.shutdown()
+    service.storage.shutdown()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Tests for the alarm dispatcher: dedupe, rate limiting, priority and isolation between sinks
+"""
+
+import sys
+import asyncio
+import threading
+
+import pytest
+
+from conftest import wait_until
+from app.alarms import AlarmDispatcher, SSEAlarmSink
+
+
+class RecordingSink:
+    """Records each alarm it receives; optionally waits on a gate or fails first"""
+
+    def __init__(self, name: str, gate: threading.Event = None, fail: bool = False):
+        self.name = name
+        self.gate = gate
+        self.fail = fail
+        self.received = []
+        self.closed = False
+
+    def open(self):
+        pass
+
+    def send(self, alarm):
+        if self.gate is not None:
+            self.gate.wait(timeout=5)
+        if self.fail:
+            raise RuntimeError("sink unavailable")
+        self.received.append((alarm.stream_id, alarm.alarm_type))
+
+    def close(self):
+        self.closed = True
+
+
+def test_cooldown_rate_limits_repeated_alarms():
+    sink = RecordingSink("recording")
+    dispatcher = AlarmDispatcher([sink], cooldown_seconds=60.0)
+    assert dispatcher.trigger("cam1", "fire") is True
+    assert wait_until(lambda: sink.received)
+    assert dispatcher.trigger("cam1", "fire") is False
+    # Another stream or another alarm type is not held back
+    assert dispatcher.trigger("cam2", "fire") is True
+    assert dispatcher.trigger("cam1", "smoke") is True
+    dispatcher.shutdown()
+    assert sorted(sink.received) == [("cam1", "fire"), ("cam1", "smoke"), ("cam2", "fire")]
+    assert dispatcher.rate_limited == 1 and dispatcher.dispatched == 3
+    assert sink.closed
+    print("✓ A repeated alarm within the cooldown is dropped, other streams and types still go out")
+
+
+def test_alarm_still_queued_is_deduplicated():
+    gate = threading.Event()
+    sink = RecordingSink("slow", gate=gate)
+    dispatcher = AlarmDispatcher([sink], cooldown_seconds=0.0)
+    dispatcher.trigger("busy", "smoke")
+    assert wait_until(lambda: dispatcher.pending == 0)
+    for _ in range(5):
+        dispatcher.trigger("cam1", "fire")
+    gate.set()
+    dispatcher.shutdown()
+    assert sink.received.count(("cam1", "fire")) == 1
+    assert dispatcher.deduplicated == 4
+    print("✓ Triggers for an alarm that is still queued are deduplicated")
+
+
+def test_fire_is_dispatched_before_smoke():
+    gate = threading.Event()
+    sink = RecordingSink("single", gate=gate)
+    dispatcher = AlarmDispatcher([sink], cooldown_seconds=60.0)
+    # Hold the only worker so the rest queue up together
+    dispatcher.trigger("warmup", "smoke")
+    assert wait_until(lambda: dispatcher.pending == 0)
+    for stream_id in ("a", "b", "c"):
+        dispatcher.trigger(stream_id, "smoke")
+    for stream_id in ("a", "b", "c"):
+        dispatcher.trigger(stream_id, "fire")
+    gate.set()
+    dispatcher.shutdown()
+    order = [alarm_type for _, alarm_type in sink.received[1:]]
+    assert order == ["fire"] * 3 + ["smoke"] * 3
+    print("✓ Queued fire alarms are delivered before smoke alarms raised earlier")
+
+
+def test_slow_or_failing_sink_does_not_hold_back_the_others():
+    gate = threading.Event()
+    slow = RecordingSink("slow", gate=gate)
+    failing = RecordingSink("failing", fail=True)
+    fast = RecordingSink("fast")
+    dispatcher = AlarmDispatcher([slow, failing, fast], cooldown_seconds=60.0)
+    for i in range(4):
+        dispatcher.trigger(f"cam{i}", "fire")
+    assert wait_until(lambda: len(fast.received) == 4, timeout=2.0)
+    assert slow.received == []
+    gate.set()
+    dispatcher.shutdown()
+    stats = dispatcher.as_dict()
+    assert stats["delivered"] == {"slow": 4, "failing": 0, "fast": 4}
+    assert stats["sink_errors"] == {"slow": 0, "failing": 4, "fast": 0}
+    assert all("fast" in alarm["delivered_ms"] for alarm in stats["recent"])
+    print("✓ A blocked sink and a failing sink do not delay delivery to a fast sink")
+
+
+def test_sse_sink_streams_alarms_to_connected_clients():
+    sink = SSEAlarmSink()
+    dispatcher = AlarmDispatcher([sink], cooldown_seconds=60.0)
+
+    async def receive():
+        events = sink.events(keepalive_seconds=0.05)
+        keep_alive = await events.__anext__()
+        threading.Timer(0.02, dispatcher.trigger, args=("cam1", "fire")).start()
+        alarm = await events.__anext__()
+        while alarm.startswith(":"):
+            alarm = await events.__anext__()
+        await events.aclose()
+        return keep_alive, alarm
+
+    keep_alive, alarm = asyncio.run(receive())
+    dispatcher.shutdown()
+    assert keep_alive == ": keep-alive\n\n"
+    assert alarm.startswith("event: alarm\ndata: ") and '"stream_id": "cam1"' in alarm
+    # Closing the generator unsubscribes the client
+    assert sink._subscribers == []
+    print("✓ SSE clients get keep-alives while idle and each alarm as an event")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
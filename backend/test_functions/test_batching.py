@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Tests for the micro-batcher that merges concurrent image predictions
+"""
+
+import sys
+import time
+import threading
+
+import pytest
+
+from conftest import RecordingModel
+from app.batching import MicroBatcher
+
+
+def submit_concurrently(batcher, sources):
+    futures = [None] * len(sources)
+    start = threading.Barrier(len(sources))
+
+    def submit(i):
+        start.wait()
+        futures[i] = batcher.submit(sources[i])
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(len(sources))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return [future.result(timeout=5) for future in futures]
+
+
+def test_single_request_returns_its_own_result(model):
+    batcher = MicroBatcher(model, max_batch_size=8, max_wait_ms=1)
+    result, queue_ms = batcher.infer("a")
+    assert result == "result:a"
+    assert queue_ms >= 0
+    assert model.batches == [["a"]]
+    print("✓ A single request is answered on its own")
+
+
+def test_concurrent_requests_share_a_batch(model):
+    batcher = MicroBatcher(model, max_batch_size=8, max_wait_ms=200)
+    sources = [str(i) for i in range(6)]
+    results = submit_concurrently(batcher, sources)
+    # Every caller gets the result for its own source, whatever batch it landed in
+    assert [result for result, _ in results] == [f"result:{source}" for source in sources]
+    assert len(model.batches) < len(sources)
+    assert sorted(source for batch in model.batches for source in batch) == sorted(sources)
+    print(f"✓ 6 concurrent requests ran in {len(model.batches)} batch(es)")
+
+
+def test_batches_never_exceed_the_maximum_size():
+    # The first call holds the worker so the rest queue up behind it
+    model = RecordingModel(delay_seconds=0.1)
+    batcher = MicroBatcher(model, max_batch_size=3, max_wait_ms=50)
+    first = batcher.submit("first")
+    time.sleep(0.02)
+    futures = [batcher.submit(str(i)) for i in range(7)]
+    first.result(timeout=5)
+    assert [future.result(timeout=5)[0] for future in futures] == [f"result:{i}" for i in range(7)]
+    assert max(len(batch) for batch in model.batches) == 3
+    print(f"✓ Batch sizes stay within the limit: {[len(batch) for batch in model.batches]}")
+
+
+def test_model_errors_reach_every_caller_and_the_worker_survives():
+    def failing(sources):
+        if "bad" in sources:
+            raise RuntimeError("inference failed")
+        return [f"result:{source}" for source in sources]
+
+    batcher = MicroBatcher(failing, max_batch_size=4, max_wait_ms=1)
+    try:
+        batcher.infer("bad")
+    except RuntimeError as e:
+        assert str(e) == "inference failed"
+    else:
+        raise AssertionError("the model error was swallowed")
+    assert batcher.infer("good")[0] == "result:good"
+    print("✓ A failing batch raises in its callers and later requests still run")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Tests for the frame broadcaster that fans one encoded frame out to every viewer
+"""
+
+import sys
+import time
+import asyncio
+
+import pytest
+
+from conftest import drain
+from app.broadcast import CLOSED, FrameBroadcaster, FrameSlot
+
+
+class CountingEncoder:
+    """Encodes a frame as a string and counts how often it was called"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, value, seq):
+        self.calls += 1
+        return f"{value}#{seq}"
+
+
+def test_each_frame_is_encoded_once_for_all_subscribers():
+    slot = FrameSlot()
+    encoder = CountingEncoder()
+    broadcaster = FrameBroadcaster(slot, encoder, queue_size=8)
+    subscribers = [broadcaster.subscribe() for _ in range(3)]
+    for frame in ("a", "b", "c"):
+        slot.publish(frame)
+        time.sleep(0.05)
+    broadcaster.close()
+    for subscription in subscribers:
+        assert drain(subscription) == ["a#1", "b#2", "c#3"]
+    assert encoder.calls == 3
+    print("✓ 3 frames encoded once each and delivered to 3 subscribers")
+
+
+def test_slow_subscriber_drops_its_oldest_frames_only():
+    slot = FrameSlot()
+    broadcaster = FrameBroadcaster(slot, CountingEncoder(), queue_size=2)
+    slow = broadcaster.subscribe()
+    fast = broadcaster.subscribe()
+    received = []
+    for frame in range(6):
+        slot.publish(frame)
+        time.sleep(0.03)
+        received.append(fast.get(timeout=1.0))
+    # The slow viewer only keeps the newest frames; the fast one saw everything
+    assert drain(slow, timeout=0.1) == ["4#5", "5#6"]
+    broadcaster.close()
+    assert received == [f"{frame}#{frame + 1}" for frame in range(6)]
+    assert slow.dropped == 4 and fast.dropped == 0
+    assert broadcaster.frames_dropped == 4
+    print("✓ A slow subscriber loses its own oldest frames without holding back the others")
+
+
+def test_dropped_total_survives_unsubscribe():
+    slot = FrameSlot()
+    broadcaster = FrameBroadcaster(slot, CountingEncoder(), queue_size=1)
+    subscription = broadcaster.subscribe()
+    broadcaster.subscribe()
+    for frame in range(3):
+        slot.publish(frame)
+        time.sleep(0.03)
+    broadcaster.unsubscribe(subscription)
+    # The counter is exported as a Prometheus counter and must never go down
+    assert broadcaster.as_dict()["frames_dropped"] == 4
+    broadcaster.close()
+    print("✓ frames_dropped keeps counting after a viewer leaves")
+
+
+def test_late_joiner_gets_the_latest_frame():
+    slot = FrameSlot()
+    broadcaster = FrameBroadcaster(slot, CountingEncoder(), queue_size=4)
+    first = broadcaster.subscribe()
+    slot.publish("a")
+    assert first.get(timeout=1.0) == "a#1"
+    late = broadcaster.subscribe()
+    assert late.get(timeout=1.0) == "a#1"
+    broadcaster.close()
+    assert broadcaster.subscribe().get(timeout=1.0) is CLOSED
+    print("✓ A late joiner starts from the current frame and joining a closed broadcaster ends at once")
+
+
+def test_async_subscription_is_woken_from_the_encoder_thread():
+    slot = FrameSlot()
+    broadcaster = FrameBroadcaster(slot, CountingEncoder(), queue_size=4)
+    subscription = broadcaster.subscribe()
+
+    async def receive():
+        assert await subscription.aget(timeout=0.05) is None
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.05, slot.publish, "a")
+        loop.call_later(0.10, broadcaster.close)
+        return [await subscription.aget(timeout=1.0), await subscription.aget(timeout=1.0)]
+
+    assert asyncio.run(receive()) == ["a#1", CLOSED]
+    assert subscription.delivered == 1
+    print("✓ An awaiting viewer times out when idle and wakes for new frames and for close")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
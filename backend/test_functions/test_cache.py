@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests for the content-addressed prediction result cache
+"""
+
+import sys
+
+import pytest
+
+import conftest  # noqa: F401  (puts the backend on sys.path when run directly)
+from app.cache import CachedResult, ResultCache
+
+
+def entry(name: str, artifact_bytes: int = 0) -> CachedResult:
+    return CachedResult({"annotated_image_url": f"/results/{name}"}, name,
+                        b"x" * artifact_bytes if artifact_bytes else None)
+
+
+def test_hit_and_miss_are_counted():
+    cache = ResultCache()
+    key = ResultCache.key("sha", "v11m:abc", 0.4)
+    assert cache.get(key) is None
+    cache.put(key, entry("a.jpg"))
+    assert cache.get(key).artifact_name == "a.jpg"
+    stats = cache.as_dict()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+    print("✓ Hits and misses are counted")
+
+
+def test_model_confidence_and_variant_are_part_of_the_key():
+    cache = ResultCache()
+    cache.put(ResultCache.key("sha", "v11m:abc", 0.4), entry("a.jpg"))
+    assert cache.get(ResultCache.key("sha", "v11m:def", 0.4)) is None
+    assert cache.get(ResultCache.key("sha", "v11m:abc", 0.3)) is None
+    assert cache.get(ResultCache.key("sha", "v11m:abc", 0.4, "video:stride=2")) is None
+    # Float noise in the threshold does not split the key
+    assert cache.get(ResultCache.key("sha", "v11m:abc", 0.40000001)) is not None
+    print("✓ Another model, threshold or stream variant is a miss")
+
+
+def test_least_recently_used_entries_are_evicted_by_size():
+    first, second, third = entry("1.jpg", 400), entry("2.jpg", 400), entry("3.jpg", 400)
+    cache = ResultCache(max_bytes=first.size * 2 + 10)
+    cache.put("1", first)
+    cache.put("2", second)
+    cache.get("1")
+    cache.put("3", third)
+    # "2" was used least recently, so it goes first
+    assert cache.get("2") is None
+    assert cache.get("1") is first and cache.get("3") is third
+    assert cache.as_dict()["evictions"] == 1
+    assert cache.as_dict()["bytes"] == first.size + third.size
+    print("✓ The least recently used entry is evicted when the cache is full")
+
+
+def test_oversized_entries_and_a_disabled_cache_store_nothing():
+    cache = ResultCache(max_bytes=100)
+    cache.put("big", entry("big.jpg", 1000))
+    assert cache.as_dict()["entries"] == 0
+    disabled = ResultCache(max_bytes=0)
+    disabled.put("small", entry("small.jpg"))
+    assert disabled.get("small") is None
+    print("✓ Entries larger than the cache, or any entry with the cache disabled, are not stored")
+
+
+def test_invalidated_hit_is_recounted_as_a_miss():
+    cache = ResultCache()
+    cache.put("key", entry("gone.jpg", 10))
+    assert cache.get("key") is not None
+    # The artifact turned out to be deleted from storage
+    cache.invalidate("key")
+    stats = cache.as_dict()
+    assert (stats["entries"], stats["bytes"], stats["hits"], stats["misses"]) == (0, 0, 0, 1)
+    print("✓ Invalidating an entry frees its bytes and turns the hit into a miss")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
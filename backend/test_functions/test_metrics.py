@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Tests for the metrics registry: histogram buckets, collectors and the Prometheus text format
+"""
+
+import sys
+import threading
+
+import pytest
+
+import conftest  # noqa: F401  (puts the backend on sys.path when run directly)
+from app.metrics import LATENCY_BUCKETS, STAGES, Histogram, MetricsRegistry, RateMeter
+
+
+def test_histogram_buckets_are_cumulative_with_inclusive_bounds():
+    histogram = Histogram(buckets=(0.01, 0.1, 1.0))
+    for seconds in (0.01, 0.05, 0.5, 7.0):
+        histogram.observe(seconds)
+    cumulative, total, count = histogram.snapshot()
+    # A value equal to a bound falls in that bucket; the last count is +Inf
+    assert cumulative == [1, 2, 3, 4]
+    assert count == 4 and total == pytest.approx(7.56)
+    print("✓ Histogram buckets count every value up to and including their bound")
+
+
+def test_histogram_counts_observations_from_many_threads():
+    histogram = Histogram()
+    threads = [threading.Thread(target=lambda: [histogram.observe(0.002) for _ in range(1000)])
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert histogram.snapshot()[2] == 8000
+    print("✓ Concurrent observations are never lost")
+
+
+def test_render_writes_histograms_in_the_exposition_format():
+    registry = MetricsRegistry(prefix="test_")
+    histogram = registry.histogram("latency_seconds", "Request latency", route="/predict")
+    histogram.observe(0.05)
+    histogram.observe(2.0)
+    assert registry.histogram("latency_seconds", "Request latency", route="/predict") is histogram
+    lines = registry.render().splitlines()
+    assert lines[:2] == ["# HELP test_latency_seconds Request latency", "# TYPE test_latency_seconds histogram"]
+    # One bucket per bound plus +Inf, then the sum and count
+    assert len(lines) == 2 + len(LATENCY_BUCKETS) + 1 + 2
+    for line in ('test_latency_seconds_bucket{route="/predict",le="0.025"} 0',
+                 'test_latency_seconds_bucket{route="/predict",le="0.05"} 1',
+                 'test_latency_seconds_bucket{route="/predict",le="1.0"} 1',
+                 'test_latency_seconds_bucket{route="/predict",le="2.5"} 2',
+                 'test_latency_seconds_bucket{route="/predict",le="+Inf"} 2'):
+        assert line in lines
+    assert lines[-2:] == ['test_latency_seconds_sum{route="/predict"} 2.05',
+                          'test_latency_seconds_count{route="/predict"} 2']
+    print("✓ Histograms render as _bucket, _sum and _count series with an le label")
+
+
+def test_collector_samples_are_grouped_escaped_and_isolated():
+    registry = MetricsRegistry(prefix="test_")
+    registry.register_collector(lambda: [("streams_active", "gauge", "Active streams", {}, 2)])
+    registry.register_collector(lambda: [
+        ("frames_total", "counter", "Frames processed", {"stream": 'cam "1"'}, 10),
+        ("frames_total", "counter", "Frames processed", {"stream": "cam2"}, 0.5),
+    ])
+
+    def broken():
+        raise RuntimeError("collector failed")
+
+    registry.register_collector(broken)
+    assert registry.render().splitlines() == [
+        "# HELP test_streams_active Active streams",
+        "# TYPE test_streams_active gauge",
+        "test_streams_active 2",
+        "# HELP test_frames_total Frames processed",
+        "# TYPE test_frames_total counter",
+        'test_frames_total{stream="cam \\"1\\""} 10',
+        'test_frames_total{stream="cam2"} 0.5',
+    ]
+    print("✓ Collector samples are grouped per metric, label values escaped and a failing collector skipped")
+
+
+def test_stage_latency_histograms_are_shared_per_stream():
+    registry = MetricsRegistry()
+    first = registry.stage_latency("cam1")
+    assert set(first) == set(STAGES)
+    assert registry.stage_latency("cam1")["decode"] is first["decode"]
+    assert registry.stage_latency("cam2")["decode"] is not first["decode"]
+    assert registry.as_dict() == {"stage_latency_seconds": 2 * len(STAGES)}
+    print("✓ stage_latency returns the same histograms for a stream and separate ones per stream")
+
+
+def test_rate_meter_needs_two_events():
+    meter = RateMeter(window_seconds=5.0)
+    assert meter.rate() == 0.0
+    meter.mark()
+    assert meter.rate() == 0.0
+    for _ in range(10):
+        meter.mark()
+    assert meter.rate() > 0.0
+    print("✓ The rate is zero until two events fall inside the window")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Tests for adaptive inference: the frame stride, the motion gate and escalation on fire or smoke
+"""
+
+import sys
+
+import numpy as np
+import pytest
+
+from conftest import FakeResult
+from app.inference import Detections
+from app.motion import AdaptiveStride, MotionGate
+
+NOTHING = Detections.empty({0: "fire", 1: "smoke"})
+
+
+def frame(level: int) -> np.ndarray:
+    return np.full((120, 160, 3), level, dtype=np.uint8)
+
+
+def detections(confidence: float) -> Detections:
+    return Detections.from_result(FakeResult([[10, 20, 100, 120, confidence, 0]]))
+
+
+def test_stride_runs_inference_on_every_nth_frame():
+    stride = AdaptiveStride(stride=3)
+    decisions = [stride.should_infer(frame(0), NOTHING) for _ in range(7)]
+    assert decisions == [True, False, False, True, False, False, True]
+    assert stride.as_dict() == {"stride": 3, "motion_gate": False, "frames_inferred": 3,
+                                "skipped_stride": 4, "skipped_static": 0}
+    print("✓ A stride of 3 infers on frames 1, 4 and 7")
+
+
+def test_motion_gate_skips_static_frames_up_to_max_skip():
+    stride = AdaptiveStride(stride=1, motion_gate=True, max_skip=5)
+    decisions = [stride.should_infer(frame(0), NOTHING) for _ in range(7)]
+    # A static scene is still re-checked after max_skip frames
+    assert decisions == [True, False, False, False, False, True, False]
+    assert stride.should_infer(frame(200), NOTHING) is True
+    assert stride.skipped_static == 5 and stride.frames_inferred == 3
+    print("✓ Static frames are skipped, a changed frame and every max_skip-th frame are inferred")
+
+
+def test_fire_in_the_last_result_escalates_to_every_frame():
+    stride = AdaptiveStride(stride=5, escalate_confidence=0.25)
+    assert stride.should_infer(frame(0), NOTHING) is True
+    assert all(stride.should_infer(frame(0), detections(0.9)) for _ in range(4))
+    # A detection below the escalation threshold does not count
+    assert not stride.should_infer(frame(0), detections(0.1))
+    print("✓ A confident fire detection switches to every-frame inference")
+
+
+def test_motion_gate_thresholds():
+    gate = MotionGate(pixel_threshold=25, changed_fraction=0.01)
+    assert gate.changed(frame(0)) is True
+    gate.update(frame(0))
+    assert gate.changed(frame(10)) is False
+    assert gate.changed(frame(60)) is True
+    # A small bright patch covering about 2% of the frame counts as motion
+    patch = frame(0)
+    patch[:20, :20] = 255
+    assert gate.changed(patch) is True
+    print("✓ The motion gate ignores small brightness noise and reports real changes")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests for the pipeline helpers: bounded hand-off between stages, lossy offers and stage workers
+"""
+
+import sys
+import queue
+import threading
+
+import pytest
+
+import conftest  # noqa: F401  (puts the backend on sys.path when run directly)
+from app.pipeline import (
+    END_OF_STREAM, PipelineStage, StageStats, get_until_stopped, offer_latest, put_until_stopped
+)
+
+
+def drain_queue(q: queue.Queue) -> list:
+    items = []
+    while not q.empty():
+        items.append(q.get_nowait())
+    return items
+
+
+def test_offer_latest_keeps_the_newest_items():
+    q = queue.Queue(maxsize=2)
+    assert [offer_latest(q, item) for item in range(5)] == [0, 0, 1, 1, 1]
+    assert drain_queue(q) == [3, 4]
+    print("✓ offer_latest never blocks and drops the oldest queued items when full")
+
+
+def test_blocking_hand_off_gives_up_once_stopped():
+    q = queue.Queue(maxsize=1)
+    stop = threading.Event()
+    assert put_until_stopped(q, "a", stop) is True
+    # A full queue blocks the producer until the stop event is set
+    threading.Timer(0.05, stop.set).start()
+    assert put_until_stopped(q, "b", stop) is False
+    assert drain_queue(q) == ["a"]
+    q.put("c")
+    assert get_until_stopped(q, threading.Event()) == "c"
+    # An empty queue blocks the consumer the same way
+    assert get_until_stopped(q, stop) is END_OF_STREAM
+    print("✓ put_until_stopped and get_until_stopped return once the stop event is set")
+
+
+def test_stage_forwards_results_and_end_of_stream():
+    inputs, outputs = queue.Queue(maxsize=4), queue.Queue(maxsize=4)
+    stop = threading.Event()
+    # None means "nothing to forward", so odd items are filtered out
+    stage = PipelineStage("double", lambda x: x * 2 if x % 2 == 0 else None, inputs, outputs, stop)
+    stage.start()
+    for item in (0, 1, 2, 3, END_OF_STREAM):
+        inputs.put(item)
+    stage.join(timeout=5.0)
+    assert drain_queue(outputs) == [0, 4, END_OF_STREAM]
+    assert stage.error is None and not stop.is_set()
+    stats = stage.stats.as_dict()
+    assert stats["processed"] == 4 and stats["queue_capacity"] == 4 and stats["queue_depth"] == 0
+    print("✓ A stage applies its function, skips None results and passes END_OF_STREAM on")
+
+
+def test_failing_stage_stops_the_whole_pipeline():
+    inputs, outputs = queue.Queue(), queue.Queue()
+    stop = threading.Event()
+
+    def fail(item):
+        raise RuntimeError("decode error")
+
+    stage = PipelineStage("fail", fail, inputs, outputs, stop)
+    stage.start()
+    inputs.put("frame")
+    stage.join(timeout=5.0)
+    assert not stage.thread.is_alive()
+    assert isinstance(stage.error, RuntimeError) and stop.is_set()
+    print("✓ An exception in a stage is recorded and stops every stage sharing the stop event")
+
+
+def test_stage_stats_report_utilisation():
+    stats = StageStats("decode")
+    stats.record(0.0)
+    stats.record(0.002)
+    report = stats.as_dict()
+    assert report["processed"] == 2 and report["busy_ms"] == 2.0
+    assert 0.0 < report["utilisation"] <= 1.0
+    # Without an input queue there is no depth to report
+    assert "queue_depth" not in report
+    print("✓ Stage stats count processed items and busy time")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
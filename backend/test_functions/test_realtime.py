@@ -22,9 +22,9 @@ def test_realtime_processing():
         print(f"✗ Server connection failed: {e}")
         return
     
-    # Test 2: Check video processing status (should be inactive initially)
+    # Test 2: Check stream status (the default stream should not be running initially)
     try:
-        response = requests.get(f"{base_url}/video_processing_status")
+        response = requests.get(f"{base_url}/streams")
         print(f"✓ Status check: {response.json()}")
     except Exception as e:
         print(f"✗ Status check failed: {e}")
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests for the model registry: lazy loading, LRU eviction, hot-swap and missing weights
+"""
+
+import os
+import sys
+import threading
+
+import pytest
+
+from conftest import FakeLoader
+from app.registry import ModelRegistry, ModelUnavailableError, ModelWeightsMissingError, UnknownModelError
+
+
+def test_models_load_lazily_and_once(make_weights):
+    loader = FakeLoader(delay_seconds=0.1)
+    registry = ModelRegistry(make_weights({"a": 0.1, "b": 0.1}), "a", device="cpu", loader=loader)
+    assert loader.loads == []
+    # Concurrent first requests share one load
+    threads = [threading.Thread(target=registry.get) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert loader.loads == ["a.pt"]
+    assert registry.get().name == "a" and registry.get("b").name == "b"
+    assert loader.loads == ["a.pt", "b.pt"]
+    print("✓ Models load on first use, once, even under concurrent requests")
+
+
+def test_least_recently_used_model_is_evicted_but_never_the_active_one(make_weights, loader):
+    registry = ModelRegistry(make_weights({"a": 1, "b": 1, "c": 1}), "a", device="cpu",
+                             memory_budget_mb=2.5, loader=loader)
+    registry.get("a")
+    registry.get("b")
+    registry.get("c")
+    loaded = {info["name"]: info["loaded"] for info in registry.list()}
+    assert loaded == {"a": True, "b": False, "c": True}
+    print("✓ The least recently used model is evicted to meet the budget, keeping the active one")
+
+
+def test_activate_swaps_the_default_model(make_weights, loader):
+    registry = ModelRegistry(make_weights({"a": 0.1, "b": 0.1}), "a", device="cpu", loader=loader)
+    before = registry.get()
+    registry.activate("b")
+    assert registry.active == "b" and registry.get().name == "b"
+    # Work that already holds the old model keeps it
+    assert before.name == "a"
+    try:
+        registry.activate("missing")
+    except UnknownModelError:
+        pass
+    else:
+        raise AssertionError("an unknown model was activated")
+    assert registry.active == "b"
+    print("✓ activate() hot-swaps the active model and rejects unknown names")
+
+
+def test_missing_or_broken_weights_are_reported(make_weights, loader):
+    paths = make_weights({"a": 0.1})
+    paths["gone"] = os.path.join(os.path.dirname(paths["a"]), "gone.pt")
+    registry = ModelRegistry(paths, "a", device="cpu", loader=loader)
+    assert [info["available"] for info in registry.list()] == [True, False]
+    for call in (registry.check_available, registry.get):
+        try:
+            call("gone")
+        except ModelWeightsMissingError as e:
+            assert "gone.pt" in str(e)
+        else:
+            raise AssertionError("missing weights were not reported")
+
+    broken = ModelRegistry(make_weights({"b": 0.1}), "b", device="cpu", loader=FakeLoader(fail=True))
+    try:
+        broken.get()
+    except ModelWeightsMissingError:
+        raise AssertionError("a load failure was reported as missing weights")
+    except ModelUnavailableError as e:
+        assert "corrupt weights" in str(e)
+    else:
+        raise AssertionError("the load failure was swallowed")
+    print("✓ Missing weights and load failures raise ModelUnavailableError subclasses")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests for the result store: background writes, the disk quota and eviction order
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+
+def write_all(store, files):
+    for name, size in files:
+        store.write(name, b"x" * size).result(timeout=5)
+
+
+def test_written_files_can_be_resolved(make_store):
+    store = make_store()
+    future = store.write("annotated_1.jpg", b"jpeg")
+    # resolve() waits for a write that is still pending
+    path = store.resolve("annotated_1.jpg")
+    assert future.done() and path == os.path.join(store.root, "annotated_1.jpg")
+    with open(path, "rb") as f:
+        assert f.read() == b"jpeg"
+    assert store.resolve("missing.jpg") is None
+    assert store.as_dict()["files"] == 1 and store.as_dict()["bytes"] == 4
+    print("✓ A written file resolves to its path once the write has finished")
+
+
+def test_names_outside_the_store_are_rejected(make_store):
+    store = make_store()
+    for name in ("../escape.jpg", "/etc/passwd", ".hidden", ".."):
+        assert store.resolve(name) is None
+    try:
+        store.write("../escape.jpg", b"x")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("a path outside the store was accepted")
+    print("✓ Path traversal and hidden names are rejected")
+
+
+def test_least_recently_used_files_are_evicted_over_quota(make_store):
+    store = make_store(max_bytes=250)
+    write_all(store, [("a.jpg", 100), ("b.jpg", 100)])
+    # Reading a file counts as use, so b is now the oldest
+    store.resolve("a.jpg")
+    write_all(store, [("c.jpg", 100)])
+    assert sorted(os.listdir(store.root)) == ["a.jpg", "c.jpg"]
+    assert store.as_dict()["bytes"] == 200 and store.evicted == 1
+    print("✓ The least recently used file is evicted when the quota is exceeded")
+
+
+def test_pinned_files_are_never_evicted(make_store):
+    store = make_store(max_bytes=150)
+    write_all(store, [("input.mp4", 100)])
+    store.pin("input.mp4")
+    write_all(store, [("output.mp4", 100)])
+    assert sorted(os.listdir(store.root)) == ["input.mp4", "output.mp4"]
+    store.unpin("input.mp4")
+    store.enforce_quota()
+    assert os.listdir(store.root) == ["output.mp4"]
+    print("✓ A pinned file survives the quota until it is unpinned")
+
+
+def test_expired_files_are_evicted_under_quota(make_store):
+    store = make_store(max_age_seconds=0.2)
+    write_all(store, [("old.jpg", 10)])
+    time.sleep(0.3)
+    write_all(store, [("new.jpg", 10)])
+    assert os.listdir(store.root) == ["new.jpg"]
+    print("✓ Files older than the maximum age are evicted even under the size limit")
+
+
+def test_existing_files_count_against_the_quota_on_startup(tmp_path, make_store):
+    for name in ("1.jpg", "2.jpg", "3.jpg"):
+        (tmp_path / name).write_bytes(b"x" * 100)
+        time.sleep(0.01)
+    store = make_store(max_bytes=200)
+    assert store.as_dict()["files"] == 2 and store.as_dict()["bytes"] == 200
+    print("✓ Files already on disk are indexed and trimmed to the quota at startup")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests for the stream registry: starting, replacing, the active-stream limit and pruning ended streams
+"""
+
+import sys
+
+import pytest
+
+from conftest import drain, wait_until
+from app.streams import StreamLimitError, StreamRegistry
+
+
+def test_stream_analyses_the_whole_video_and_ends_its_viewers(detection_service, make_video):
+    video = make_video("short.mp4", 20)
+    stream = detection_service.streams.start("cam1", video)
+    viewer = stream.broadcaster.subscribe()
+    # The viewer gets end-of-stream when the video finishes, not keep-alives forever
+    frames = drain(viewer, timeout=10.0)
+    stream.thread.join(timeout=5.0)
+    assert stream.status == "finished" and not stream.active
+    assert stream.frames_processed == 20 and 0 < len(frames) <= 20
+    assert all(len(frame.detections) == 1 for frame in frames)
+    assert stream.broadcaster.closed and stream.detections_broadcaster.closed
+    print(f"✓ 20 frames analysed, {len(frames)} shown live, and the viewer was closed at the end")
+
+
+def test_bad_options_leave_the_running_stream_alone(detection_service, make_video):
+    video = make_video("long.mp4", 150)
+    running = detection_service.streams.start("cam1", video)
+    for options in ({"tile_size": 5}, {"cascade": "nope"}):
+        try:
+            detection_service.streams.start("cam1", video, **options)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"{options} was accepted")
+    assert detection_service.streams.get("cam1") is running
+    assert running.active and not running.stop_event.is_set()
+    print("✓ A replacement with bad options is rejected before the running stream is stopped")
+
+
+def test_starting_an_id_again_replaces_its_stream(detection_service, make_video):
+    video = make_video("long.mp4", 150)
+    first = detection_service.streams.start("cam1", video)
+    viewer = first.broadcaster.subscribe()
+    second = detection_service.streams.start("cam1", video)
+    assert first.status == "stopped" and not first.active
+    drain(viewer, timeout=5.0)
+    assert first.broadcaster.closed
+    assert detection_service.streams.get("cam1") is second and second.active
+    assert [info["stream_id"] for info in detection_service.streams.list()] == ["cam1"]
+    print("✓ Restarting a stream ID stops the old stream, closes its viewers and runs the new one")
+
+
+def test_active_stream_limit(detection_service, make_video):
+    video = make_video("long.mp4", 150)
+    registry = StreamRegistry(detection_service, max_streams=1, results_dir=detection_service.storage.root)
+    try:
+        registry.start("cam1", video)
+        try:
+            registry.start("cam2", video)
+        except StreamLimitError:
+            pass
+        else:
+            raise AssertionError("a stream over the limit was started")
+        # Replacing a stream does not count it twice
+        registry.start("cam1", video)
+        assert registry.active_count() == 1
+        try:
+            registry.start("bad id!", video)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("an invalid stream id was accepted")
+    finally:
+        registry.stop_all()
+    print("✓ Streams over the limit are refused while the same ID can still be restarted")
+
+
+def test_oldest_ended_streams_are_pruned(detection_service, make_video):
+    video = make_video("short.mp4", 10)
+    registry = StreamRegistry(detection_service, results_dir=detection_service.storage.root, max_finished=1)
+    try:
+        first = registry.start("a", video)
+        assert wait_until(lambda: not first.active, timeout=10.0)
+        second = registry.start("b", video)
+        assert wait_until(lambda: not second.active, timeout=10.0)
+        registry.start("c", video)
+        # Only the newest ended stream is kept beside the running one
+        assert registry.get("a") is None and registry.get("b") is second
+        assert first.broadcaster.closed
+    finally:
+        registry.stop_all()
+    print("✓ Ended streams beyond max_finished are forgotten, oldest first")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests for sliced inference: the tile grid, box merging across tile borders and ROI masking
+"""
+
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+from conftest import FakeResult, RecordingModel
+from app.tiling import Tiler, build_tiler, merge_boxes, tile_grid
+
+
+class BlobDetector(RecordingModel):
+    """Reports every white blob in an image as a fire box
+
+    A blob cut off by a tile border is reported as a partial box, like a real
+    model would. Larger boxes score higher, so the complete box wins a merge.
+    """
+
+    def predict(self, source):
+        contours, _ = cv2.findContours(np.ascontiguousarray(source[:, :, 0]), cv2.RETR_EXTERNAL,
+                                       cv2.CHAIN_APPROX_SIMPLE)
+        rows = []
+        for contour in contours:
+            x, y, w, h = cv2.boundingRect(contour)
+            rows.append([x, y, x + w, y + h, min(0.5 + w * h / 20000.0, 0.99), 0])
+        return FakeResult(rows)
+
+
+def frame_with_blobs(width: int, height: int, blobs):
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    for x1, y1, x2, y2 in blobs:
+        frame[y1:y2, x1:x2] = 255
+    return frame
+
+
+def test_tile_grid_covers_the_frame_with_overlap():
+    tiles = tile_grid(1920, 1080, 640, 0.2)
+    covered = np.zeros((1080, 1920), dtype=bool)
+    for x1, y1, x2, y2 in tiles:
+        assert x2 - x1 == 640 and y2 - y1 == 640
+        covered[y1:y2, x1:x2] = True
+    assert covered.all()
+    # The last column and row are aligned to the frame edge instead of running past it
+    assert max(x2 for _, _, x2, _ in tiles) == 1920 and max(y2 for _, _, _, y2 in tiles) == 1080
+    assert tile_grid(320, 240, 640, 0.2) == [(0, 0, 320, 240)]
+    print(f"✓ {len(tiles)} overlapping tiles cover a 1920x1080 frame")
+
+
+def test_merge_keeps_the_complete_box_over_a_cut_off_one():
+    boxes = np.array([[600, 100, 700, 200], [600, 100, 640, 200], [600, 100, 700, 200]], dtype=np.float32)
+    scores = np.array([0.9, 0.6, 0.8], dtype=np.float32)
+    classes = np.array([0, 0, 1])
+    # The cut-off box has a low IoU with the complete one but lies entirely inside it
+    assert sorted(merge_boxes(boxes, scores, classes).tolist()) == [0, 2]
+    print("✓ Box merging drops a cut-off duplicate of the same class and keeps other classes")
+
+
+def test_detections_across_tile_borders_are_merged_into_frame_coordinates():
+    blobs = [(600, 100, 700, 200), (1500, 600, 1540, 640)]
+    frame = frame_with_blobs(1920, 1080, blobs)
+    model = BlobDetector()
+    tiler = Tiler(640, 0.2)
+    detections = tiler.detect(frame, model)
+    # One forward pass: every tile plus the whole frame
+    assert len(model.batches) == 1 and len(model.batches[0]) == len(tile_grid(1920, 1080, 640, 0.2)) + 1
+    assert sorted(map(tuple, detections.xyxy.astype(int).tolist())) == blobs
+    assert tiler.as_dict()["frames"] == 1
+    print("✓ Blobs split by tile borders come back once each, in frame coordinates")
+
+
+def test_roi_skips_tiles_and_drops_detections_outside_it():
+    blobs = [(100, 100, 150, 150), (1700, 100, 1750, 150)]
+    frame = frame_with_blobs(1920, 1080, blobs)
+    # The left third of the frame only
+    tiler = Tiler(640, 0.2, roi=[[(0.0, 0.0), (0.3, 0.0), (0.3, 1.0), (0.0, 1.0)]])
+    detections = tiler.detect(frame, BlobDetector())
+    assert detections.xyxy.astype(int).tolist() == [list(blobs[0])]
+    assert tiler.stats.tiles_skipped > 0
+    print(f"✓ The ROI skipped {tiler.stats.tiles_skipped} tiles and the detection outside it")
+
+
+def test_build_tiler_and_invalid_settings():
+    assert build_tiler(0) is None and build_tiler(None) is None
+    assert build_tiler(640).overlap == 0.2
+    for tile_size, overlap in ((16, 0.2), (640, 1.0), (640, -0.1)):
+        try:
+            Tiler(tile_size, overlap)
+        except ValueError:
+            continue
+        raise AssertionError(f"Tiler({tile_size}, {overlap}) was accepted")
+    print("✓ Tiling is off without a tile size and bad settings are rejected")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
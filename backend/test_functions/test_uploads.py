@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Tests for uploads written chunk by chunk and followed by readers while they grow
+"""
+
+import os
+import sys
+import time
+import hashlib
+import threading
+
+import pytest
+
+from conftest import wait_until
+from app.uploads import UploadTooLargeError, UploadWriter
+
+
+def test_follower_waits_for_bytes_while_the_upload_grows(tmp_path):
+    upload = UploadWriter(str(tmp_path / "video.mp4"), max_bytes=1024)
+    seen = []
+
+    def follow():
+        for count in (4, 8, 12):
+            seen.append((upload.wait_for_bytes(count, timeout=5.0), upload.bytes_received))
+
+    follower = threading.Thread(target=follow)
+    follower.start()
+    for chunk in (b"abcd", b"efgh", b"ijkl"):
+        time.sleep(0.02)
+        upload.write(chunk)
+    follower.join(timeout=5.0)
+    assert [arrived for arrived, _ in seen] == [True, True, True]
+    assert all(received >= count for (_, received), count in zip(seen, (4, 8, 12)))
+    # Every chunk is flushed, so a follower can read what it waited for
+    with open(upload.path, "rb") as f:
+        assert f.read() == b"abcdefghijkl"
+    assert upload.finish() == hashlib.sha256(b"abcdefghijkl").hexdigest()
+    print("✓ A follower wakes as each chunk arrives and reads it from disk")
+
+
+def test_wait_ends_when_the_upload_ends_short(tmp_path):
+    upload = UploadWriter(str(tmp_path / "video.mp4"), max_bytes=1024)
+    upload.write(b"abc")
+    threading.Timer(0.05, upload.finish).start()
+    started = time.monotonic()
+    assert upload.wait_for_bytes(100, timeout=5.0) is False
+    assert time.monotonic() - started < 2.0
+    assert upload.as_dict() == {"path": upload.path, "bytes_received": 3, "done": True, "failed": False}
+    print("✓ Waiting for bytes that will never come ends as soon as the upload finishes")
+
+
+def test_oversized_upload_is_rejected_and_deleted(tmp_path):
+    upload = UploadWriter(str(tmp_path / "video.mp4"), max_bytes=8)
+    upload.write(b"12345678")
+    try:
+        upload.write(b"9")
+    except UploadTooLargeError:
+        pass
+    else:
+        raise AssertionError("an upload over the limit was accepted")
+    assert upload.bytes_received == 8
+    upload.abort()
+    assert upload.done and upload.failed and not os.path.exists(upload.path)
+    print("✓ Writing past the limit raises and abort() deletes the partial file")
+
+
+def test_stream_follows_a_video_while_it_uploads(detection_service, make_video, tmp_path):
+    with open(make_video("source.mp4", 20), "rb") as f:
+        data = f.read()
+    upload = UploadWriter(str(tmp_path / "upload.mp4"), max_bytes=len(data))
+    stream = detection_service.streams.start("upload", upload.path, upload=upload)
+    chunk_size = len(data) // 4 + 1
+    for start in range(0, len(data), chunk_size):
+        upload.write(data[start:start + chunk_size])
+        time.sleep(0.05)
+    upload.finish()
+    assert wait_until(lambda: not stream.active, timeout=10.0)
+    assert stream.status == "finished" and stream.frames_processed == 20
+    print("✓ A stream started on an upload in progress analyses every frame once it has arrived")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
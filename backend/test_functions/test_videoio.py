@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Tests for video I/O: backend selection and fallbacks, background encoding and decode-time downscaling
+"""
+
+import sys
+import shutil
+import threading
+
+import numpy as np
+import pytest
+
+from conftest import wait_until
+from app.metrics import Histogram
+from app.videoio import (
+    BackgroundWriter, VideoInfo, open_reader, open_writer, resolve_video_backend, scaled_size
+)
+
+
+class RecordingSink:
+    """Stands in for an encoder: records frames, optionally fails on one or blocks until released"""
+
+    codec = "fake"
+
+    def __init__(self, fail_on: int = None, gate: threading.Event = None):
+        self.frames = []
+        self.fail_on = fail_on
+        self.gate = gate
+        self.closed = False
+
+    def write(self, frame):
+        if self.gate is not None:
+            self.gate.wait(timeout=5)
+        if len(self.frames) == self.fail_on:
+            raise IOError("disk full")
+        self.frames.append(frame)
+
+    def close(self):
+        self.closed = True
+
+
+def available(backend: str) -> bool:
+    if backend == "ffmpeg":
+        return shutil.which("ffmpeg") is not None
+    if backend == "pyav":
+        try:
+            import av  # noqa: F401
+        except ImportError:
+            return False
+    return True
+
+
+def test_auto_backend_falls_back_to_what_is_installed(monkeypatch):
+    assert resolve_video_backend("ffmpeg") == "ffmpeg"
+    # A None entry makes "import av" raise ImportError
+    monkeypatch.setitem(sys.modules, "av", None)
+    monkeypatch.setattr(shutil, "which", lambda name: "/usr/bin/ffmpeg")
+    assert resolve_video_backend("auto") == "ffmpeg"
+    monkeypatch.setattr(shutil, "which", lambda name: None)
+    assert resolve_video_backend("auto") == "opencv"
+    print("✓ auto picks pyav, then ffmpeg, then opencv, depending on what is installed")
+
+
+def test_unknown_or_missing_backends_are_reported(tmp_path, monkeypatch):
+    info = VideoInfo(30.0, 64, 48)
+    for open_video in (lambda: open_reader("x.mp4", "gstreamer"),
+                       lambda: open_writer(str(tmp_path / "x.mp4"), info, "gstreamer")):
+        try:
+            open_video()
+        except ValueError:
+            continue
+        raise AssertionError("an unknown video backend was accepted")
+    monkeypatch.setattr(shutil, "which", lambda name: None)
+    try:
+        open_writer(str(tmp_path / "x.mp4"), info, "ffmpeg")
+    except RuntimeError as e:
+        assert "ffmpeg" in str(e)
+    else:
+        raise AssertionError("the ffmpeg backend opened without an ffmpeg binary")
+    print("✓ Unknown backends raise ValueError and a missing ffmpeg binary raises RuntimeError")
+
+
+def test_background_writer_encodes_in_order_and_closes():
+    sink = RecordingSink()
+    latency = Histogram()
+    writer = BackgroundWriter(sink, queue_size=4, latency=latency)
+    for i in range(10):
+        writer.write(i)
+    writer.release()
+    assert sink.frames == list(range(10)) and sink.closed
+    assert writer.frames_written == 10 and writer.error is None and writer.codec == "fake"
+    assert latency.snapshot()[2] == 10
+    print("✓ Frames are encoded in order on the writer thread and the sink is closed on release")
+
+
+def test_background_writer_queue_bounds_the_producer():
+    gate = threading.Event()
+    writer = BackgroundWriter(RecordingSink(gate=gate), queue_size=2)
+    producer = threading.Thread(target=lambda: [writer.write(i) for i in range(6)])
+    producer.start()
+    # One frame is held by the blocked encoder, two more fill the queue
+    assert wait_until(lambda: writer.queue_depth == 2)
+    assert producer.is_alive()
+    gate.set()
+    producer.join(timeout=5.0)
+    writer.release()
+    assert writer.frames_written == 6
+    print("✓ write() blocks once the bounded queue is full and resumes as frames are encoded")
+
+
+def test_failed_encoder_keeps_draining_so_producers_never_block():
+    sink = RecordingSink(fail_on=2)
+    writer = BackgroundWriter(sink, queue_size=1)
+    for i in range(20):
+        writer.write(i)
+    writer.release()
+    assert isinstance(writer.error, IOError)
+    assert sink.frames == [0, 1] and sink.closed
+    print("✓ After an encode error the writer drops frames, records the error and still closes the sink")
+
+
+@pytest.mark.parametrize("backend", ["opencv", "ffmpeg", "pyav"])
+def test_written_video_reads_back_downscaled(tmp_path, backend):
+    if not available(backend):
+        pytest.skip(f"the {backend} video backend is not installed")
+    path = str(tmp_path / "out.mp4")
+    writer = open_writer(path, VideoInfo(10.0, 320, 240), backend)
+    for i in range(12):
+        writer.write(np.full((240, 320, 3), i * 20, dtype=np.uint8))
+    writer.release()
+    assert writer.error is None and writer.frames_written == 12
+
+    reader = open_reader(path, backend, max_width=160)
+    try:
+        frames = []
+        frame = reader.read()
+        while frame is not None:
+            frames.append(frame)
+            frame = reader.read()
+    finally:
+        reader.release()
+    assert (reader.info.width, reader.info.height) == (160, 120)
+    assert len(frames) == 12 and all(frame.shape == (120, 160, 3) for frame in frames)
+    print(f"✓ {backend}: 12 frames written as {writer.codec} read back at 160x120")
+
+
+def test_scaled_size_keeps_aspect_ratio_and_even_dimensions():
+    assert scaled_size(1920, 1080, None) == (1920, 1080)
+    assert scaled_size(640, 480, 1280) == (640, 480)
+    assert scaled_size(1920, 1080, 640) == (640, 360)
+    assert scaled_size(1000, 333, 501) == (500, 166)
+    print("✓ Downscaling keeps the aspect ratio, rounds to even sizes and never upscales")
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q", "-s"]))